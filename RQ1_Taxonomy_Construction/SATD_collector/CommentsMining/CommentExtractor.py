@@ -1,31 +1,93 @@
+import bisect
 import re
 
 
-def extract_comments(text):
-    comments = []
+# Outside strings: the constructs that start a comment, a quoted string or a heredoc
+code_token_pattern = re.compile(r'#|//|/\*|"|<<-?([A-Za-z_][\w-]*)[ \t]*(?=\r?\n)')
+# Inside a quoted string: escapes (including the $${ and %%{ literals), the end of the string,
+# a template interpolation or directive, or a newline that HCL never allows in a quoted string
+string_token_pattern = re.compile(r'\\.|\$\$\{|%%\{|"|[$%]\{|\n', re.S)
+# Inside an interpolation: nested strings and braces
+template_token_pattern = re.compile(r'["{}]')
+
+
+def iter_comments(text):
+    """
+    Yields the (comment, line_number) pairs of a Terraform file in a single pass.
 
-    # Regular expression pattern to match single-line comments
-    single_line_pattern = r'(?<!:)(//|#)(.*?)(?=\n|$)'
-    # Regular expression pattern to match multi-line comments
-    multi_line_pattern = r'/\*([\s\S]*?)\*/'
+    Comment markers inside quoted strings, template interpolations and heredocs are not comments
+    and are skipped. Line numbers are counted incrementally between two comments, so the whole
+    file is scanned once whatever its number of comments.
+    """
+    line_number = 1
+    counted_up_to = 0
+    # Enclosing strings ('"'), interpolations ('${') and braces inside them ('{'), innermost last
+    stack = []
+    i = 0
+    n = len(text)
+
+    while i < n:
+        if not stack:
+            match = code_token_pattern.search(text, i)
+            if match is None:
+                return
+            token = match.group(0)
+            start = match.start()
+
+            if token == '"':
+                stack.append('"')
+                i = match.end()
+                continue
+
+            if token.startswith('<<'):
+                # Skip the heredoc body up to the line holding only its closing marker
+                closing = re.compile(r'^[ \t]*' + re.escape(match.group(1)) + r'[ \t]*\r?$', re.M).search(text, match.end())
+                i = closing.end() if closing else n
+                continue
+
+            line_number += text.count('\n', counted_up_to, start)
+            counted_up_to = start
+
+            if token == '/*':
+                end = text.find('*/', start + 2)
+                if end == -1:
+                    return
+                yield remove_n("/*" + text[start + 2:end].strip() + "*/"), line_number
+                i = end + 2
+            else:
+                end = text.find('\n', start)
+                if end == -1:
+                    end = n
+                yield text[start:end], line_number
+                i = end
+
+        elif stack[-1] == '"':
+            match = string_token_pattern.search(text, i)
+            if match is None:
+                return
+            token = match.group(0)
+            if token == '"' or token == '\n':
+                stack.pop()
+            elif token == '${' or token == '%{':
+                stack.append('${')
+            i = match.end()
 
-    # Extract single-line comments
-    single_line_comments = re.finditer(single_line_pattern, text)
-    for match in single_line_comments:
-        comment_symbol = match.group(1)
-        comment_text = match.group(2)
-        comment = comment_symbol + comment_text
-        line_number = text.count('\n', 0, match.start()) + 1
-        comments.append((comment, line_number))
+        else:
+            match = template_token_pattern.search(text, i)
+            if match is None:
+                return
+            token = match.group(0)
+            if token == '"':
+                stack.append('"')
+            elif token == '{':
+                stack.append('{')
+            else:
+                stack.pop()
+            i = match.end()
 
-    # Extract multi-line comments
-    multi_line_comments = re.finditer(multi_line_pattern, text)
-    for match in multi_line_comments:
-        comment = "/*" + match.group(1).strip() + "*/"
-        line_number = text.count('\n', 0, match.start()) + 1
-        comments.append((remove_n(comment), line_number))
 
-    return comments
+def extract_comments(text):
+    return list(iter_comments(text))
 
 
 def trier_par_numero_ligne(comment_list):
@@ -62,12 +124,21 @@ def remove_n(text):
 
 
 
-def extract_comment_block(terraform_content, line_id):
+def find_comment_blocks(lines):
+    """
+    Groups the comment lines of a file into blocks.
+
+    Args:
+        lines (list): The lines of the file.
+
+    Returns:
+        A list of (comment, start_line, end_line) with the text of each block and its first and
+        last lines, in file order. The blocks do not overlap.
+    """
     comment_blocks = []
     current_block = []
     start_line = None
 
-    lines = terraform_content.split('\n')
     i = 0
     while i < len(lines):
         line = lines[i]
@@ -112,10 +183,62 @@ def extract_comment_block(terraform_content, line_id):
     if current_block:
         comment_blocks.append((' '.join(current_block), start_line, i))
 
-    for comment, start_line, end_line in comment_blocks:
-        if(start_line<=line_id and line_id<=end_line):
-            return comment
-        
-    #     
-    if 0 < line_id <= len(lines):
-        return lines[line_id - 1]
\ No newline at end of file
+    return comment_blocks
+
+
+class CommentBlockIndex:
+    """
+    Comment blocks of one file revision, shared by all of its SATD comments.
+
+    The revision is split into lines and its blocks are built once, on the first lookup, then the
+    block holding a line is found by bisection over the block start lines.
+
+    Attributes:
+        terraform_content (str): The source code of the revision.
+        lines (list): The lines of the revision.
+        blocks (list): The (comment, start_line, end_line) blocks, see `find_comment_blocks`.
+        start_lines (list): The start line of each block, sorted.
+    """
+
+    def __init__(self, terraform_content):
+        self.terraform_content = terraform_content
+        self.lines = None
+        self.blocks = None
+        self.start_lines = None
+
+    def index(self):
+        if self.blocks is not None:
+            return
+        self.lines = self.terraform_content.split('\n')
+        self.blocks = find_comment_blocks(self.lines)
+        self.start_lines = [start_line for _, start_line, _ in self.blocks]
+        # The lines hold the whole revision
+        self.terraform_content = None
+
+    def find_block(self, line_id):
+        """
+        Returns the (comment, start_line, end_line) block holding a line, None if the line is in no block.
+        """
+        self.index()
+        position = bisect.bisect_right(self.start_lines, line_id) - 1
+        if position >= 0:
+            block = self.blocks[position]
+            if line_id <= block[2]:
+                return block
+        return None
+
+    def extract(self, line_id):
+        """
+        Returns the comment block holding a line, or the line itself when it is in no block.
+        """
+        block = self.find_block(line_id)
+        if block is not None:
+            return block[0]
+
+        if 0 < line_id <= len(self.lines):
+            return self.lines[line_id - 1]
+
+
+def extract_comment_block(terraform_content, line_id):
+    # One-off lookup, the executors share a CommentBlockIndex between the comments of a revision
+    return CommentBlockIndex(terraform_content).extract(line_id)
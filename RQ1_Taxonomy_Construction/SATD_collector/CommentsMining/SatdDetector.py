@@ -1,4 +1,9 @@
+import bisect
+import queue
+import re
 import subprocess
+import threading
+from collections import Counter
 from pathlib import Path
 
 from RQ1_Taxonomy_Construction.SATD_collector.CommentsMining.CommentExtractor import remove_newlines
@@ -27,44 +32,71 @@ class SATDDetector:
     def detect(self):
         pass  # This method will be overridden by subclasses bellow
 
+    def detect_revision(self, comments, file, modified_file=None):
+        # Detectors without memory of the previous revisions examine every comment
+        return self.detect(comments)
 
-class KeywordList1Detector(SATDDetector):
-    def detect(self, comments):
-        satdComments=[]
-        for i in range(len(comments) - 1, -1, -1):
-            if is_satd_comment_1(comments[i][0].lower()) == 1:
-                satdComments.append(comments[i])
-                comments.pop(i)
-        
-        satdComments.reverse()
+    def forget_revision(self, file):
+        pass  # Overridden by detectors keeping the previous revision of the files
 
-        return satdComments
-    
+    def may_detect(self, comments):
+        # Whether detect could report one of the comments, without modifying them; safe from any thread
+        return len(comments) > 0
 
-class KeywordList2Detector(SATDDetector):
-    def detect(self, comments):
-        satdComments=[]
-        for i in range(len(comments) - 1, -1, -1):
-            if is_satd_comment_2(comments[i][0].lower()) == 1:
-                satdComments.append(comments[i])
-                comments.pop(i)
-        
-        satdComments.reverse()
-        return satdComments
-    
+    def classify_comments(self, comments):
+        # Verdict of each comment, without modifying them: True for SATD, False for not SATD, None for no verdict
+        satd_ids = {id(comment) for comment in self.detect(list(comments))}
+        return [id(comment) in satd_ids for comment in comments]
+
+    def close(self):
+        pass  # Overridden by detectors holding an external process
+
+
+class KeywordDetector(SATDDetector):
+    """
+    Detects the comments holding a keyword of a list, counting the keyword each detected comment matched.
+    """
+
+    def __init__(self):
+        # Number of detected satd comments per matched keyword
+        self.keyword_counts = Counter()
 
+    def pattern(self):
+        pass  # Overridden by the detector of each keyword list
 
-class KeywordListsDetector(SATDDetector):
     def detect(self, comments):
         satdComments=[]
         for i in range(len(comments) - 1, -1, -1):
-            if is_satd_comment_3(comments[i][0].lower()) == 1:
+            keyword = find_satd_keyword(comments[i][0].lower(), self.pattern())
+            if keyword is not None:
+                self.keyword_counts[keyword] += 1
                 satdComments.append(comments[i])
                 comments.pop(i)
-        
+
         satdComments.reverse()
         return satdComments
 
+    def may_detect(self, comments):
+        return any(find_satd_keyword(comment[0].lower(), self.pattern()) is not None for comment in comments)
+
+    def get_keyword_counts(self):
+        return self.keyword_counts
+
+
+class KeywordList1Detector(KeywordDetector):
+    def pattern(self):
+        return keywordList1Pattern
+
+
+class KeywordList2Detector(KeywordDetector):
+    def pattern(self):
+        return keywordList2Pattern
+
+
+class KeywordListsDetector(KeywordDetector):
+    def pattern(self):
+        return keywordListsPattern
+
 
 
 class MLModelDetector(SATDDetector):
@@ -121,22 +153,296 @@ class MLModelDetector(SATDDetector):
         return satdComments
 
 
+
+class BatchMLModelDetector(SATDDetector):
+    """
+    SATD detector model kept alive in a single Java process for the whole run.
+
+    The comments are sent one at a time to the `test` mode of satd_detector.jar, instead of
+    launching one JVM per comment, and each one waits for its verdict before the next is written.
+    Verdicts are only told apart by their order, so every call ends with two sentinel comments
+    whose verdicts differ and were recorded when the process started: an extra verdict printed for
+    one of the comments shifts the verdicts read for the sentinels, and the verdicts of the call
+    are then dropped instead of being paired with the wrong comments.
+    """
+
+    # Matches the verdict printed by the jar for each comment
+    label_pattern = re.compile(r'>(Not SATD|SATD)')
+
+    # A clear SATD comment and a clear non SATD one
+    sentinels = ("TODO: temporary hack, remove this workaround later", "Name of the storage bucket")
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self.process = None
+        self.labels = None
+        self.sentinel_labels = None
+
+    def start(self):
+        command = [
+            "java",
+            "--add-opens", "java.base/java.lang=ALL-UNNAMED",
+            "-jar", str(SATD_JAR),
+            "test"  # trigger test mode
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1)
+
+        # Read the output in the background so a verdict can be waited for with a timeout
+        self.labels = queue.Queue()
+        threading.Thread(target=self.read_labels, args=(self.process.stdout, self.labels), daemon=True).start()
+
+        self.sentinel_labels = [self.classify_one(sentinel) for sentinel in self.sentinels]
+        if self.sentinel_labels != [True, False]:
+            print("SATD detector model gave unexpected verdicts to the sentinel comments:", self.sentinel_labels)
+
+    def read_labels(self, stdout, labels):
+        for line in stdout:
+            match = self.label_pattern.search(line)
+            if match:
+                labels.put(match.group(1) == "SATD")
+
+    def classify(self, comments):
+        """
+        Sends comments through the detector model, one at a time.
+
+        Args:
+            comments (list): The comment texts to classify.
+
+        Returns:
+            A list with, for each comment and in the same order, True for SATD, False for not SATD
+            and None when the model gave no verdict in time or its verdicts were out of step.
+        """
+        if self.process is None or self.process.poll() is not None:
+            self.start()
+
+        # Verdicts left over from the previous call belong to none of these comments
+        if self.discard_labels():
+            print("Discarded unexpected verdicts of the SATD detector model, restarting it")
+            self.close()
+            self.start()
+
+        results = [self.classify_one(comment) for comment in comments]
+
+        if self.process is not None and [self.classify_one(sentinel) for sentinel in self.sentinels] != self.sentinel_labels:
+            print("SATD detector model verdicts out of step with the comments, restarting it")
+            self.close()
+            return [None] * len(comments)
+        return results
+
+    def classify_one(self, comment):
+        # Send a single comment and wait for its verdict, True, False or None
+        if self.process is None:
+            return None
+        try:
+            self.process.stdin.write(remove_newlines(comment) + "\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            print("Error running Java:", e)
+            self.close()
+            return None
+
+        try:
+            return self.labels.get(timeout=self.timeout)
+        except queue.Empty:
+            # A late verdict would be read for the next comment, start over with a fresh process
+            print("Java process timed out for comment:", remove_newlines(comment))
+            self.close()
+            return None
+
+    def discard_labels(self):
+        discarded = 0
+        while True:
+            try:
+                self.labels.get_nowait()
+            except queue.Empty:
+                return discarded
+            discarded += 1
+
+    def detect(self, comments):
+        satdComments = []
+        if not comments:
+            return satdComments
+
+        labels = self.classify([comment[0] for comment in comments])
+        for i in range(len(comments) - 1, -1, -1):
+            if labels[i]:
+                satdComments.append(comments[i])
+                comments.pop(i)
+
+        satdComments.reverse()
+        return satdComments
+
+    def classify_comments(self, comments):
+        if not comments:
+            return []
+        return self.classify([comment[0] for comment in comments])
+
+    def close(self):
+        if self.process is None:
+            return
+        try:
+            if self.process.poll() is None:
+                self.process.stdin.write("/exit\n")  # /exit ends the Java test mode
+                self.process.stdin.flush()
+            self.process.wait(timeout=10)
+        except (BrokenPipeError, OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+        self.process = None
+
+
+class MemoizedDetector(SATDDetector):
+    """
+    Wraps a detector and reuses its verdicts for the comments a modification left untouched.
+
+    The comments of the last revision of every tracked file are kept with their verdict. On a
+    modification, the comments outside the changed hunks of the PyDriller `diff_parsed` are shifted
+    to their line in the new revision; a comment found again at its shifted line with the same text
+    keeps its verdict and every other comment goes through the wrapped detector. A verdict only
+    depends on the comment text, so the SATD comments found are those of a full detection.
+
+    Only the detector calls are saved: the comments are still extracted from, and tracked over, the
+    whole revision. This pays off with the ML detector, not with the keyword detectors, which are
+    cheaper than the diff bookkeeping. A comment the detector gave no verdict for (a model timeout)
+    counts as not SATD in its revision, like in a full detection, and is detected again in the next.
+    """
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.revisions = {}
+        self.reused = 0
+        self.detected = 0
+
+    def detect(self, comments):
+        self.detected += len(comments)
+        return self.detector.detect(comments)
+
+    def classify_comments(self, comments):
+        self.detected += len(comments)
+        return self.detector.classify_comments(comments)
+
+    def detect_revision(self, comments, file, modified_file=None):
+        known_verdicts = {}
+        previous = self.revisions.get(file.get_id())
+        if previous is not None and modified_file is not None:
+            known_verdicts = shift_verdicts(previous, modified_file.diff_parsed)
+
+        verdicts = [known_verdicts.get((comment[1], comment[0])) for comment in comments]
+        pending = [comment for comment, verdict in zip(comments, verdicts) if verdict is None]
+        self.reused += len(comments) - len(pending)
+
+        pending_verdicts = iter(self.classify_comments(pending))
+        verdicts = [next(pending_verdicts) if verdict is None else verdict for verdict in verdicts]
+        # Missing verdicts are not remembered, shift_verdicts skips them
+        self.revisions[file.get_id()] = [(comment[0], comment[1], verdict) for comment, verdict in zip(comments, verdicts)]
+
+        # Like the other detectors, leave the non SATD comments in the list and return the SATD ones
+        satdComments = [comment for comment, verdict in zip(comments, verdicts) if verdict]
+        comments[:] = [comment for comment, verdict in zip(comments, verdicts) if not verdict]
+        return satdComments
+
+    def may_detect(self, comments):
+        return self.detector.may_detect(comments)
+
+    def forget_revision(self, file):
+        if file is not None:
+            self.revisions.pop(file.get_id(), None)
+
+    def get_stats(self):
+        return {"reused": self.reused, "detected": self.detected}
+
+    def close(self):
+        self.detector.close()
+
+
+def shift_verdicts(previous, diff_parsed):
+    """
+    Maps the comments of a revision that are outside the changed lines to their line in the next revision.
+
+    Args:
+        previous (list): The (comment, line_number, is_satd) triples of the previous revision.
+        diff_parsed (dict): The PyDriller parsed diff, with the 'added' and 'deleted' (line_number, line) pairs.
+
+    Returns:
+        A dictionary giving the verdict of each (line_number, comment) of the next revision, for the
+        comments that have one.
+    """
+    deleted = sorted(line_number for line_number, _ in diff_parsed['deleted'])
+    added = sorted(line_number for line_number, _ in diff_parsed['added'])
+    deleted_lines = set(deleted)
+
+    shifted = {}
+    for comment, line_number, is_satd in previous:
+        if is_satd is None or line_number in deleted_lines:
+            continue
+        # Rank of the line among the unchanged lines of the previous revision ...
+        rank = line_number - bisect.bisect_left(deleted, line_number)
+        # ... is the rank of its line among the unchanged lines of the next revision
+        new_line_number = rank
+        while rank + bisect.bisect_right(added, new_line_number) != new_line_number:
+            new_line_number = rank + bisect.bisect_right(added, new_line_number)
+        shifted[(new_line_number, comment)] = is_satd
+    return shifted
+
+
+def compile_keywords(keywords):
+    """
+    Compiles a keyword list into a single regular expression matching any of its keywords.
+
+    The keywords are merged into a trie before being written as nested alternations, so at each
+    position of a comment the regex engine follows one path of the trie (as an Aho-Corasick
+    automaton would) instead of trying every keyword. Longer keywords win over their prefixes.
+    """
+    trie = {}
+    for word in set(keywords):
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}  # end of keyword
+
+    def to_regex(node):
+        branches = [re.escape(char) + to_regex(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        alternation = '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            return alternation + '?'
+        return alternation
+
+    return re.compile(to_regex(trie))
+
+
+# Compiled once at import
+keywordList1Pattern = compile_keywords(keywordList1)
+keywordList2Pattern = compile_keywords(keywordList2)
+keywordListsPattern = compile_keywords(keywordList1 + keywordList2)
+
+
+def find_satd_keyword(comment, pattern=keywordListsPattern):
+    # Return the first keyword of the pattern found in the (lowercased) comment, None if there is none
+    match = pattern.search(comment)
+    if match:
+        return match.group(0)
+    return None
+
+
 def is_satd_comment_1(comment):
     # Filtrer les commentaires qui contiennent au moins un mot de word_list
-    if any(word in comment for word in keywordList1):
+    if keywordList1Pattern.search(comment):
         return 1
     return 0 
 
 
 def is_satd_comment_2(comment):
     # Filtrer les commentaires qui contiennent au moins un mot de word_list
-    if any(word in comment for word in keywordList2):
+    if keywordList2Pattern.search(comment):
         return 1
     return 0 
 
 
 def is_satd_comment_3(comment):
     # Filtrer les commentaires qui contiennent au moins un mot de word_list
-    if any(word in comment for word in keywordList1) or any(word in comment for word in keywordList2):
+    if keywordListsPattern.search(comment):
         return 1
     return 0 
\ No newline at end of file
@@ -1,12 +1,11 @@
-from RQ1_Taxonomy_Construction.SATD_collector.CommentsMining.SatdKeyWordLists import keywordList1
+from RQ1_Taxonomy_Construction.SATD_collector.CommentsMining.SatdDetector import keywordList1Pattern
 
 
 def find_keyword_in_multiline_comment(comment):
     lines = comment.split('\n')  # Split the multiline comment into lines
     for i, line in enumerate(lines, start=1):  # Iterate through lines with line numbers
-        for keyword in keywordList1:  # Iterate through keywords
-            if keyword in line.lower():  # Check if the keyword is in the line
-                return line, i  # Return the line and its line number
+        if keywordList1Pattern.search(line.lower()):  # Check if any keyword is in the line
+            return line, i  # Return the line and its line number
     return None  # Return None if no keyword found
 
 
@@ -4,3 +4,66 @@ def add_line_to_csv(row_data, csv_file_path):
     with open(csv_file_path, 'a', newline='') as csvfile:
         csv_writer = csv.writer(csvfile)
         csv_writer.writerow(row_data)
+
+
+class BufferedCsvWriter:
+    """
+    Appends rows to a CSV file kept open for the whole run.
+
+    Rows are buffered until `checkpoint()` marks them complete (the collector calls it after each
+    commit), then written in batches of `batch_size` rows. `flush()` and `close()` only write the
+    checkpointed rows, so after a crash the file ends on a commit boundary.
+
+    The written rows are also handed to `columnar_writer` if any, e.g. a ParquetDatasetWriter
+    mirroring the csv file, which is flushed and closed along with it.
+    """
+
+    def __init__(self, csv_file_path, batch_size=1000, columnar_writer=None):
+        self.csv_file_path = csv_file_path
+        self.batch_size = batch_size
+        self.columnar_writer = columnar_writer
+        self.csvfile = open(csv_file_path, 'a', newline='')
+        self.csv_writer = csv.writer(self.csvfile)
+        self.pending_rows = []
+        self.complete_rows = []
+
+    def get_csv_file_path(self):
+        return self.csv_file_path
+
+    def add_line(self, row_data):
+        self.pending_rows.append(row_data)
+
+    def checkpoint(self):
+        # The rows added so far belong to fully processed commits
+        self.complete_rows.extend(self.pending_rows)
+        self.pending_rows = []
+        if len(self.complete_rows) >= self.batch_size:
+            self.write_complete_rows()
+
+    def write_complete_rows(self):
+        self.csv_writer.writerows(self.complete_rows)
+        if self.columnar_writer is not None:
+            self.columnar_writer.add_rows(self.complete_rows)
+        self.complete_rows = []
+
+    def flush(self):
+        self.write_complete_rows()
+        self.csvfile.flush()
+        if self.columnar_writer is not None:
+            self.columnar_writer.flush()
+
+    def get_size(self):
+        # Size of the file once flushed, i.e. up to the last checkpointed row
+        self.flush()
+        return self.csvfile.tell()
+
+    def close(self):
+        if self.csvfile.closed:
+            return
+        if self.pending_rows:
+            print(f"Discarding {len(self.pending_rows)} rows of an unfinished commit from {self.csv_file_path}")
+            self.pending_rows = []
+        self.flush()
+        self.csvfile.close()
+        if self.columnar_writer is not None:
+            self.columnar_writer.close()
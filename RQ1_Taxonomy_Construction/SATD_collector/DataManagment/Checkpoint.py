@@ -0,0 +1,64 @@
+import os
+import pickle
+from urllib.parse import urlparse
+
+
+class TraversalCheckpoint:
+    """
+    Snapshot of a repository traversal, written periodically so an interrupted mining run resumes.
+
+    A checkpoint holds what `save_checkpoint` of main.py stores: the project, the hash of the last
+    processed commit, the paths of the output csv files and their size at that commit, the Parquet
+    parts written up to that commit, and the tracker state (files and SATD comments being tracked).
+    It is written to a temporary file then renamed, so a crash while saving keeps the previous
+    checkpoint intact.
+
+    Attributes:
+        checkpoint_path (str): The path to the checkpoint of the repository and detection type.
+    """
+
+    def __init__(self, repo_url, detect_type, checkpoint_dir='Data_checkpoints'):
+        # Extract the repository name from the URL
+        repo_name = urlparse(repo_url).path.strip('/').replace('/', '_')
+
+        # Create the output directory if it doesn't exist
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+        self.checkpoint_path = os.path.join(checkpoint_dir, f"{repo_name}.{detect_type}.pickle")
+
+    def exists(self):
+        return os.path.exists(self.checkpoint_path)
+
+    def save(self, state):
+        """
+        Atomically replaces the checkpoint with the given state.
+
+        Args:
+            state (dict): The picklable tracker state of the traversal.
+        """
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def load(self):
+        """
+        Returns the saved state, or None if the repository has no checkpoint.
+        """
+        if not self.exists():
+            return None
+        with open(self.checkpoint_path, 'rb') as file:
+            return pickle.load(file)
+
+    def remove(self):
+        if self.exists():
+            os.remove(self.checkpoint_path)
+
+
+def truncate_csv_files(csv_sizes):
+    # Drop the rows written after the checkpoint, they belong to commits that will be mined again
+    for csv_file_path, size in csv_sizes.items():
+        with open(csv_file_path, 'r+b') as file:
+            file.truncate(size)
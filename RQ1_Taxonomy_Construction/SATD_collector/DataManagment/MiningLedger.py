@@ -0,0 +1,54 @@
+import csv
+import os
+from datetime import datetime
+
+
+class MiningLedger:
+    """
+    Per-repository status of a batch of mining runs, kept in an append-only CSV.
+
+    A repository is 'mined' once its worker produced its csv files, 'done' once its results were
+    merged into the data of all projects, and 'failed' if its mining raised. The last entry of a
+    repository wins, so an interrupted batch resumes by skipping the 'done' repositories and
+    merging the 'mined' ones without mining them again.
+
+    Attributes:
+        ledger_path (str): The path to the ledger CSV.
+        entries (dict): The last recorded row of each repository URL.
+    """
+
+    MINED = 'mined'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    header = ['Repo URL', 'Status', 'Comments Csv', 'Tracked Satd Csv', 'Message', 'Time']
+
+    def __init__(self, ledger_path):
+        self.ledger_path = ledger_path
+        self.entries = {}
+
+        if os.path.exists(ledger_path):
+            with open(ledger_path, newline='') as csvfile:
+                for row in csv.DictReader(csvfile):
+                    self.entries[row['Repo URL']] = row
+        else:
+            with open(ledger_path, 'w', newline='') as csvfile:
+                csv.writer(csvfile).writerow(self.header)
+
+    def get_status(self, repo_url):
+        entry = self.entries.get(repo_url)
+        return entry['Status'] if entry is not None else None
+
+    def get_entry(self, repo_url):
+        return self.entries.get(repo_url)
+
+    def record(self, repo_url, status, csv_comments_file_path='', csv_tracked_satd_file_path='', message=''):
+        """
+        Appends the new status of a repository and makes it durable before returning.
+        """
+        row = [repo_url, status, csv_comments_file_path, csv_tracked_satd_file_path, message, datetime.now().isoformat(timespec='seconds')]
+        with open(self.ledger_path, 'a', newline='') as csvfile:
+            csv.writer(csvfile).writerow(row)
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+        self.entries[repo_url] = dict(zip(self.header, row))
@@ -0,0 +1,107 @@
+import os
+from urllib.parse import urlparse
+
+
+# Columns of the comments dataset, in the order of the values of the comments csv rows
+# (the rows hold the commit date before the developer email, unlike the csv header)
+COMMENTS_COLUMNS = [
+    ('repo_url', 'dictionary'), ('old_file_path', 'dictionary'), ('new_file_path', 'dictionary'),
+    ('comment', 'string'), ('line_id', 'int'), ('num_of_lines', 'int'),
+    ('commit_hash', 'dictionary'), ('commit_message', 'dictionary'), ('commit_date', 'dictionary'), ('developer_email', 'dictionary'),
+    ('is_satd', 'int'),
+]
+
+# Columns of the tracked satd dataset, in the order of the rows of the tracked satd csv
+TRACKED_SATD_COLUMNS = [
+    ('repo_url', 'dictionary'), ('satd_comment_id', 'dictionary'), ('old_file_path', 'dictionary'), ('new_file_path', 'dictionary'),
+    ('satd_comment', 'dictionary'), ('context', 'dictionary'), ('bloc', 'dictionary'), ('bloc_type', 'dictionary'),
+    ('line_id', 'int'), ('num_of_lines', 'int'),
+    ('commit_hash', 'dictionary'), ('commit_message', 'dictionary'), ('commit_date', 'dictionary'), ('developer_email', 'dictionary'),
+    ('tracking_type', 'int'),
+]
+
+
+class ParquetDatasetWriter:
+    """
+    Writes the rows of a collector csv to a Parquet dataset partitioned by repository.
+
+    The rows of a repository go to `<dataset_dir>/repo=<repo name>/part-<n>.parquet`, so a whole
+    corpus loads as one dataset with `pyarrow.dataset` or `pandas.read_parquet`. Repository,
+    commit, path and block columns repeat over many rows and are dictionary-encoded. A part file
+    is written on every `flush()`, i.e. at the checkpoints of the csv writer it mirrors, so the
+    parts listed in a checkpoint hold exactly the rows of the checkpointed commits.
+
+    Requires pyarrow, only imported when a Parquet output is requested.
+
+    Attributes:
+        partition_dir (str): The directory of the repository partition.
+        columns (list): The (name, kind) of the columns, kind being 'dictionary', 'string' or 'int'.
+        parts (list): The paths of the part files written so far.
+    """
+
+    def __init__(self, dataset_dir, repo_url, columns, parts=None):
+        import pyarrow
+        import pyarrow.parquet
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+
+        repo_name = urlparse(repo_url).path.strip('/').replace('/', '_')
+        self.partition_dir = os.path.join(dataset_dir, f"repo={repo_name}")
+        os.makedirs(self.partition_dir, exist_ok=True)
+
+        self.columns = columns
+        self.schema = pyarrow.schema([(name, self.arrow_type(kind)) for name, kind in columns])
+        self.rows = []
+        self.parts = list(parts) if parts is not None else []
+
+        if parts is not None:
+            # Resumed run: drop the parts written after the checkpoint
+            for file_name in os.listdir(self.partition_dir):
+                part_path = os.path.join(self.partition_dir, file_name)
+                if file_name.startswith('part-') and part_path not in self.parts:
+                    os.remove(part_path)
+
+    def arrow_type(self, kind):
+        if kind == 'dictionary':
+            return self.pa.dictionary(self.pa.int32(), self.pa.string())
+        if kind == 'int':
+            return self.pa.int64()
+        return self.pa.string()
+
+    def add_rows(self, rows):
+        self.rows.extend(rows)
+
+    def flush(self):
+        """
+        Writes the rows received since the last flush as a new part file.
+        """
+        if not self.rows:
+            return
+
+        arrays = []
+        for position, (name, kind) in enumerate(self.columns):
+            values = [to_column_value(row[position], kind) for row in self.rows]
+            if kind == 'dictionary':
+                arrays.append(self.pa.array(values, type=self.pa.string()).dictionary_encode())
+            else:
+                arrays.append(self.pa.array(values, type=self.arrow_type(kind)))
+
+        part_path = os.path.join(self.partition_dir, f"part-{len(self.parts):05d}.parquet")
+        self.pq.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema), part_path, compression='zstd')
+        self.parts.append(part_path)
+        self.rows = []
+
+    def get_parts(self):
+        return self.parts
+
+    def close(self):
+        self.flush()
+
+
+def to_column_value(value, kind):
+    # The csv rows mix ints, strings, datetimes and None, the dataset columns have a single type
+    if value is None:
+        return None
+    if kind == 'int':
+        return int(value) if value != '' else None
+    return str(value)
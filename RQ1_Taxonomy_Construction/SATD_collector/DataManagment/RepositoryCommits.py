@@ -0,0 +1,43 @@
+import subprocess
+
+
+def clone_repository(repo_url, clone_dir):
+    """
+    Clones a repository into an empty directory and returns the path of the clone.
+    """
+    subprocess.run(['git', 'clone', '--quiet', repo_url, clone_dir], capture_output=True, text=True, check=True)
+    return clone_dir
+
+
+def list_terraform_commits(repo_path):
+    """
+    Lists the hashes of the commits of HEAD that touch a .tf path.
+
+    Git answers from its commit graph and tree objects without producing any patch, so PyDriller
+    only has to compute the diffs of these commits. `--full-history` keeps the commits of merged
+    branches that git log would otherwise simplify away, as PyDriller visits them too.
+
+    Args:
+        repo_path (str): The path to a local clone of the repository.
+
+    Returns:
+        The list of commit hashes, newest first.
+    """
+    result = subprocess.run(['git', '-C', repo_path, 'rev-list', '--full-history', 'HEAD', '--', '*.tf'], capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def commits_after(commits, last_commit_hash):
+    """
+    Returns the commits of `list_terraform_commits` that a traversal visits after the given one.
+
+    PyDriller visits the commits in the reverse order of git rev-list, so these are the commits
+    listed before it. Slicing by position keeps the side-branch commits that do not descend from
+    it, which Repository(from_commit=...) would drop with its --ancestry-path.
+
+    Raises:
+        ValueError: If the commit is not in the list, e.g. after a history rewrite.
+    """
+    if last_commit_hash not in commits:
+        raise ValueError(f"Commit {last_commit_hash} to resume after is not a commit touching .tf files of the repository")
+    return commits[:commits.index(last_commit_hash)]
@@ -0,0 +1,283 @@
+import csv
+import sqlite3
+
+from RQ1_Taxonomy_Construction.SATD_collector.extract_satd_dataset.extract_conc_data import start_satd_data, update_satd_data, satd_data_row
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    project_id INTEGER PRIMARY KEY,
+    repo_url TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS commits (
+    commit_id INTEGER PRIMARY KEY,
+    project_id INTEGER NOT NULL REFERENCES projects (project_id),
+    hash TEXT NOT NULL,
+    message TEXT,
+    developer_email TEXT,
+    commit_date TEXT,
+    UNIQUE (project_id, hash)
+);
+CREATE TABLE IF NOT EXISTS file_revisions (
+    revision_id INTEGER PRIMARY KEY,
+    commit_id INTEGER NOT NULL REFERENCES commits (commit_id),
+    old_path TEXT,
+    new_path TEXT,
+    num_of_lines INTEGER,
+    UNIQUE (commit_id, old_path, new_path)
+);
+CREATE TABLE IF NOT EXISTS comments (
+    comment_id INTEGER PRIMARY KEY,
+    revision_id INTEGER NOT NULL REFERENCES file_revisions (revision_id),
+    comment TEXT,
+    line_id INTEGER,
+    is_satd INTEGER
+);
+CREATE TABLE IF NOT EXISTS satd_instances (
+    instance_id INTEGER PRIMARY KEY,
+    project_id INTEGER NOT NULL REFERENCES projects (project_id),
+    satd_id TEXT NOT NULL,
+    satd_comment TEXT,
+    UNIQUE (project_id, satd_id)
+);
+CREATE TABLE IF NOT EXISTS tracking_events (
+    event_id INTEGER PRIMARY KEY,
+    instance_id INTEGER NOT NULL REFERENCES satd_instances (instance_id),
+    revision_id INTEGER NOT NULL REFERENCES file_revisions (revision_id),
+    context TEXT,
+    bloc TEXT,
+    bloc_type TEXT,
+    line_id INTEGER,
+    tracking_type INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS satd_instances_satd_id ON satd_instances (satd_id);
+CREATE INDEX IF NOT EXISTS tracking_events_instance ON tracking_events (instance_id);
+CREATE INDEX IF NOT EXISTS tracking_events_revision ON tracking_events (revision_id);
+CREATE INDEX IF NOT EXISTS comments_revision ON comments (revision_id);
+CREATE INDEX IF NOT EXISTS commits_hash ON commits (hash);
+CREATE INDEX IF NOT EXISTS file_revisions_commit ON file_revisions (commit_id);
+CREATE INDEX IF NOT EXISTS file_revisions_old_path ON file_revisions (old_path);
+CREATE INDEX IF NOT EXISTS file_revisions_new_path ON file_revisions (new_path);
+"""
+
+# The tracking events of a satd comment, as rows of the tracked satd csv in commit order
+EVENTS_QUERY = """
+SELECT projects.repo_url, satd_instances.satd_id, file_revisions.old_path, file_revisions.new_path,
+       satd_instances.satd_comment, tracking_events.context, tracking_events.bloc, tracking_events.bloc_type,
+       tracking_events.line_id, file_revisions.num_of_lines, commits.hash, commits.message,
+       commits.commit_date, commits.developer_email, tracking_events.tracking_type
+FROM tracking_events
+JOIN satd_instances ON satd_instances.instance_id = tracking_events.instance_id
+JOIN projects ON projects.project_id = satd_instances.project_id
+JOIN file_revisions ON file_revisions.revision_id = tracking_events.revision_id
+JOIN commits ON commits.commit_id = file_revisions.commit_id
+"""
+
+
+class SatdStore:
+    """
+    Normalized SQLite store of the mined comments and tracked SATD comments.
+
+    The repeated columns of the csv files (repository, commit, file paths, satd comment text) are
+    kept once in the projects, commits, file_revisions and satd_instances tables, referenced by the
+    comments and tracking_events tables. A repository is loaded from its csv files in bulk, then the
+    history of a satd comment and the counters of the projects details are SQL queries.
+
+    Attributes:
+        db_path (str): The path to the SQLite database.
+    """
+
+    def __init__(self, db_path="Data/satd_store.sqlite"):
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path, timeout=60)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    def get_project_id(self, repo_url):
+        row = self.connection.execute("SELECT project_id FROM projects WHERE repo_url = ?", (repo_url,)).fetchone()
+        return row[0] if row is not None else None
+
+    def remove_repository(self, repo_url):
+        project_id = self.get_project_id(repo_url)
+        if project_id is None:
+            return
+        revisions = "SELECT revision_id FROM file_revisions WHERE commit_id IN (SELECT commit_id FROM commits WHERE project_id = ?)"
+        self.connection.execute(f"DELETE FROM tracking_events WHERE revision_id IN ({revisions})", (project_id,))
+        self.connection.execute(f"DELETE FROM comments WHERE revision_id IN ({revisions})", (project_id,))
+        self.connection.execute(f"DELETE FROM file_revisions WHERE revision_id IN ({revisions})", (project_id,))
+        self.connection.execute("DELETE FROM satd_instances WHERE project_id = ?", (project_id,))
+        self.connection.execute("DELETE FROM commits WHERE project_id = ?", (project_id,))
+        self.connection.execute("DELETE FROM projects WHERE project_id = ?", (project_id,))
+
+    def load_repository(self, repo_url, csv_comments_file_path, csv_tracked_satd_file_path, batch_size=10000):
+        """
+        Loads the csv files of a mined repository, replacing the data previously loaded for it.
+
+        The rows are inserted in batches within a single transaction, the ids of the commits, file
+        revisions and satd comments already inserted being kept in memory instead of queried.
+
+        Args:
+            repo_url (str): The URL of the mined repository.
+            csv_comments_file_path (str): The path to the comments csv of the repository.
+            csv_tracked_satd_file_path (str): The path to the tracked satd csv of the repository.
+            batch_size (int): The number of comments or tracking events inserted per batch.
+        """
+        with self.connection:
+            self.remove_repository(repo_url)
+            project_id = self.connection.execute("INSERT INTO projects (repo_url) VALUES (?)", (repo_url,)).lastrowid
+            commit_ids = {}
+            revision_ids = {}
+            instance_ids = {}
+
+            def revision_id(commit_hash, message, commit_date, developer_email, old_path, new_path, num_of_lines):
+                commit_id = commit_ids.get(commit_hash)
+                if commit_id is None:
+                    commit_id = commit_ids[commit_hash] = self.connection.execute(
+                        "INSERT INTO commits (project_id, hash, message, developer_email, commit_date) VALUES (?, ?, ?, ?, ?)",
+                        (project_id, commit_hash, message, developer_email, commit_date)
+                    ).lastrowid
+                key = (commit_id, old_path, new_path)
+                if key not in revision_ids:
+                    revision_ids[key] = self.connection.execute(
+                        "INSERT INTO file_revisions (commit_id, old_path, new_path, num_of_lines) VALUES (?, ?, ?, ?)",
+                        (commit_id, old_path, new_path, to_int(num_of_lines))
+                    ).lastrowid
+                return revision_ids[key]
+
+            # tracked satd csv: repo, id, old path, new path, satd comment, context, bloc, bloc type, line, num of lines, hash, message, date, email, tracking type
+            events = []
+            for row in read_rows(csv_tracked_satd_file_path):
+                instance_id = instance_ids.get(row[1])
+                if instance_id is None:
+                    instance_id = instance_ids[row[1]] = self.connection.execute(
+                        "INSERT INTO satd_instances (project_id, satd_id, satd_comment) VALUES (?, ?, ?)",
+                        (project_id, row[1], row[4])
+                    ).lastrowid
+                events.append((instance_id, revision_id(row[10], row[11], row[12], row[13], row[2], row[3], row[9]), row[5], row[6], row[7], to_int(row[8]), int(row[14])))
+                if len(events) >= batch_size:
+                    self.insert_tracking_events(events)
+                    events = []
+            self.insert_tracking_events(events)
+
+            # After the tracked satd csv, whose rows hold the whole commit messages instead of their first line
+            # comments csv: repo, old path, new path, comment, line, num of lines, hash, message, date, email, is satd
+            comments = []
+            for row in read_rows(csv_comments_file_path):
+                comments.append((revision_id(row[6], row[7], row[8], row[9], row[1], row[2], row[5]), row[3], to_int(row[4]), to_int(row[10])))
+                if len(comments) >= batch_size:
+                    self.insert_comments(comments)
+                    comments = []
+            self.insert_comments(comments)
+
+    def insert_comments(self, comments):
+        self.connection.executemany("INSERT INTO comments (revision_id, comment, line_id, is_satd) VALUES (?, ?, ?, ?)", comments)
+
+    def insert_tracking_events(self, events):
+        self.connection.executemany(
+            "INSERT INTO tracking_events (instance_id, revision_id, context, bloc, bloc_type, line_id, tracking_type) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            events
+        )
+
+    def get_satd_history(self, repo_url, satd_id):
+        """
+        Returns the tracking events of a satd comment, in commit order, as rows of the tracked satd csv.
+        """
+        rows = self.connection.execute(
+            EVENTS_QUERY + "WHERE projects.repo_url = ? AND satd_instances.satd_id = ? ORDER BY tracking_events.event_id",
+            (repo_url, str(satd_id))
+        ).fetchall()
+        return [to_csv_row(row) for row in rows]
+
+    def get_satd_lifecycle(self, repo_url, satd_id):
+        """
+        Returns the row of a satd comment in the satd data of all projects, None if it is unknown.
+        """
+        satd_data = None
+        for row in self.get_satd_history(repo_url, satd_id):
+            if satd_data is None:
+                satd_data = start_satd_data(row)
+            update_satd_data(satd_data, row)
+        return satd_data_row(satd_data) if satd_data is not None else None
+
+    def get_satd_lifecycles(self, repo_url):
+        """
+        Returns the rows of all the satd comments of a repository in the satd data of all projects,
+        in order of first occurence, from a single query.
+        """
+        rows = self.connection.execute(
+            EVENTS_QUERY + "WHERE projects.repo_url = ? ORDER BY tracking_events.instance_id, tracking_events.event_id",
+            (repo_url,)
+        )
+        satd_data_by_id = {}
+        for row in rows:
+            row = to_csv_row(row)
+            satd_data = satd_data_by_id.get(row[1])
+            if satd_data is None:
+                satd_data = satd_data_by_id[row[1]] = start_satd_data(row)
+            update_satd_data(satd_data, row)
+        return [satd_data_row(satd_data) for satd_data in satd_data_by_id.values()]
+
+    def get_project_counters(self, repo_url):
+        """
+        Computes the counters of a repository in the projects details.
+
+        Returns:
+            A dict with the number of comments, of satd comments (tracking events), of different satd
+            comments, and of satd comments not yet adressed, adressed and deleted with their file.
+        """
+        project_id = self.get_project_id(repo_url)
+        num_comments = self.connection.execute(
+            "SELECT COUNT(*) FROM comments JOIN file_revisions ON file_revisions.revision_id = comments.revision_id "
+            "JOIN commits ON commits.commit_id = file_revisions.commit_id WHERE commits.project_id = ?",
+            (project_id,)
+        ).fetchone()[0]
+        num_satd_comments = self.connection.execute(
+            "SELECT COUNT(*) FROM tracking_events JOIN satd_instances ON satd_instances.instance_id = tracking_events.instance_id "
+            "WHERE satd_instances.project_id = ?",
+            (project_id,)
+        ).fetchone()[0]
+
+        # The type of a satd comment is given by its last removal (0), modification (2) or file deletion (3) event
+        satd_types = dict(self.connection.execute(
+            "SELECT satd_type, COUNT(*) FROM ("
+            "  SELECT COALESCE(("
+            "    SELECT CASE tracking_type WHEN 0 THEN 1 WHEN 3 THEN 2 ELSE 0 END FROM tracking_events"
+            "    WHERE tracking_events.instance_id = satd_instances.instance_id AND tracking_type IN (0, 2, 3)"
+            "    ORDER BY event_id DESC LIMIT 1"
+            "  ), 0) AS satd_type FROM satd_instances WHERE project_id = ?"
+            ") GROUP BY satd_type",
+            (project_id,)
+        ).fetchall())
+
+        return {
+            "num_comments": num_comments,
+            "num_satd_comments": num_satd_comments,
+            "num_diff_satd": sum(satd_types.values()),
+            "not_yet_adressed": satd_types.get(0, 0),
+            "adressed": satd_types.get(1, 0),
+            "file_deleted": satd_types.get(2, 0),
+        }
+
+    def close(self):
+        self.connection.close()
+
+
+def read_rows(csv_file_path):
+    # The rows of a collector csv, without its header
+    with open(csv_file_path, newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader, None)
+        for row in reader:
+            if len(row) > 1:
+                yield row
+
+
+def to_int(value):
+    return int(value) if value not in (None, '') else None
+
+
+def to_csv_row(row):
+    # Back to the csv values read by the satd data aggregation
+    return ['' if value is None else str(value) for value in row]
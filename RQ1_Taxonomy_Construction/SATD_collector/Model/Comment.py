@@ -1,13 +1,13 @@
 from RQ1_Taxonomy_Construction.SATD_collector.Model.File import File
+from RQ1_Taxonomy_Construction.SATD_collector.Model.Identifiers import stable_id
 
 
 class Comment:
-    # Static variable to keep track of the last assigned ID
-    id_counter = 0
+    __slots__ = ('id', 'file', 'comment_content', 'line_number', 'file_id')
 
     def __init__(self, file: File, comment_content: str, line_number: int):
-        Comment.id_counter +=1
-        self.id = Comment.id_counter
+        # Derived from the file, line and content of the comment
+        self.id = stable_id(file.get_id(), line_number, comment_content)
         self.file = file
         self.comment_content = comment_content
         self.line_number = line_number
@@ -2,6 +2,7 @@ from RQ1_Taxonomy_Construction.SATD_collector.Model.Project import Project
 
 
 class Commit:
+    __slots__ = ('id', 'project', 'commit_msg', 'developer_email', 'committer_date', 'commit_hash')
 
     def __init__(self, commit_hash: str, project:Project, commit_msg: str, committer_date, developer_email: str):
 
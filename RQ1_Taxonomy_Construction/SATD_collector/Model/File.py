@@ -1,15 +1,21 @@
 from RQ1_Taxonomy_Construction.SATD_collector.Model.Commit import Commit
+from RQ1_Taxonomy_Construction.SATD_collector.Model.Identifiers import stable_id
 
 
 class File:
-    # Static variable to keep track of the last assigned ID
-    id_counter = 0
+    """
+    The last revision of a tracked .tf file.
+
+    The source code is only kept while the revision is processed, `release_source()` drops it
+    afterwards so the tracked files do not pin the content of their last revision.
+    """
+
+    __slots__ = ('id', 'filename', 'source_code', 'old_file_path', 'new_file_path', 'modification_type', 'num_lines', 'commit', 'files_list')
 
     def __init__(self, filename, source_code, old_file_path, new_file_path, num_lines, modification_type, commit: Commit):
 
-        # Increment the static ID counter and assign it to the current instance
-        File.id_counter += 1
-        self.id = File.id_counter
+        # Derived from the repo, the commit where the file starts being tracked and its path there
+        self.id = stable_id(commit.get_project().get_project_url(), commit.get_commit_hash(), new_file_path or old_file_path)
         self.filename = filename
         self.source_code = source_code
         self.old_file_path = old_file_path
@@ -17,9 +23,11 @@ class File:
         self.modification_type = modification_type
         self.num_lines = num_lines
         self.commit = commit
+        # FilesList indexing this file by path, notified when the paths change
+        self.files_list = None
 
     def __repr__(self):
-        return f"<File(filename={self.filename}, file_source_code={self.source_code},old_file_path={self.old_file_path},new_file_path={self.new_file_path} , modification_type={self.modification_type}, num_lines={self.num_lines}, commit_hash={self.commit.get_commit_hash()}, commit_msg={self.commit.get_commit_msg()}, commit_author_email={self.commit.get_developer_email()}, commit_committer_date={self.commit.get_committer_date()})>"
+        return f"<File(filename={self.filename}, source_code_length={len(self.source_code) if self.source_code is not None else None},old_file_path={self.old_file_path},new_file_path={self.new_file_path} , modification_type={self.modification_type}, num_lines={self.num_lines}, commit_hash={self.commit.get_commit_hash()}, commit_msg={self.commit.get_commit_msg()}, commit_author_email={self.commit.get_developer_email()}, commit_committer_date={self.commit.get_committer_date()})>"
 
     def get_id(self):
         return self.id
@@ -36,17 +44,25 @@ class File:
     def set_source_code(self, source_code):
         self.source_code = source_code
 
+    def release_source(self):
+        # The revision is analyzed, the next one comes with its own source code
+        self.source_code = None
+
     def get_old_file_path(self):
         return self.old_file_path
 
     def set_old_file_path(self, old_file_path):
+        previous_old_path = self.old_file_path
         self.old_file_path = old_file_path
+        self.notify_paths_changed(previous_old_path, self.new_file_path)
 
     def get_new_file_path(self):
         return self.new_file_path
 
     def set_new_file_path(self, new_file_path):
+        previous_new_path = self.new_file_path
         self.new_file_path = new_file_path
+        self.notify_paths_changed(self.old_file_path, previous_new_path)
 
     def get_modification_type(self):
         return self.modification_type
@@ -63,7 +79,15 @@ class File:
     def get_commit(self):
         return self.commit
 
+    def set_files_list(self, files_list):
+        self.files_list = files_list
+
+    def notify_paths_changed(self, previous_old_path, previous_new_path):
+        if self.files_list is not None and (previous_old_path, previous_new_path) != (self.old_file_path, self.new_file_path):
+            self.files_list.update_file_paths(self, previous_old_path, previous_new_path)
+
     def modify_attributes(self, filename=None, source_code=None, old_file_path=None, new_file_path=None,num_lines=None,modification_type=None, commit=None):
+        previous_old_path, previous_new_path = self.old_file_path, self.new_file_path
         if filename is not None:
             self.filename = filename
         if source_code is not None:
@@ -78,3 +102,5 @@ class File:
             self.modification_type=modification_type
         if commit is not None:
             self.commit = commit
+
+        self.notify_paths_changed(previous_old_path, previous_new_path)
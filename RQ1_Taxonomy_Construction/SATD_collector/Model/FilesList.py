@@ -3,29 +3,68 @@ from RQ1_Taxonomy_Construction.SATD_collector.Model.File import File
 
 class FilesList:
     def __init__(self):
-        self.fileslist = []
+        # Files in insertion order, with the position giving the order of the former list
+        self.fileslist = {}
+        self.next_position = 0
+        # path -> {position: file} of the files currently holding that old/new path
+        self.files_by_old_path = {}
+        self.files_by_new_path = {}
 
     def get_files_list(self):
-        return self.fileslist
+        return list(self.fileslist)
 
     def set_files_list(self, filesList):
-        self.fileslist=filesList
+        for file in list(self.fileslist):
+            self.remove_file_from_list(file)
+        for file in filesList:
+            self.add_file(file)
 
     def add_file(self, file):
-        self.fileslist.append(file)
+        position = self.next_position
+        self.next_position += 1
+        self.fileslist[file] = position
+        self.files_by_old_path.setdefault(file.get_old_file_path(), {})[position] = file
+        self.files_by_new_path.setdefault(file.get_new_file_path(), {})[position] = file
+        # keep the path indexes up to date when the file gets renamed
+        file.set_files_list(self)
 
     def remove_file_from_list(self, file: File):
         if file in self.fileslist:
-            self.fileslist.remove(file)
+            position = self.fileslist.pop(file)
+            remove_from_index(self.files_by_old_path, file.get_old_file_path(), position)
+            remove_from_index(self.files_by_new_path, file.get_new_file_path(), position)
+            file.set_files_list(None)
+
+    def update_file_paths(self, file: File, previous_old_path, previous_new_path):
+        # Called by the file when its paths change
+        position = self.fileslist.get(file)
+        if position is None:
+            return
+        if previous_old_path != file.get_old_file_path():
+            remove_from_index(self.files_by_old_path, previous_old_path, position)
+            self.files_by_old_path.setdefault(file.get_old_file_path(), {})[position] = file
+        if previous_new_path != file.get_new_file_path():
+            remove_from_index(self.files_by_new_path, previous_new_path, position)
+            self.files_by_new_path.setdefault(file.get_new_file_path(), {})[position] = file
 
     def get_file_by_old_path(self, old_path):
-        for file in self.fileslist:
-            if file.get_old_file_path() == old_path:
-                return file
-        return None
-    
+        return first_in_index(self.files_by_old_path, old_path)
+
     def get_file_by_new_path(self, path):
-        for file in self.fileslist:
-            if file.get_new_file_path() == path:
-                return file
+        return first_in_index(self.files_by_new_path, path)
+
+
+def first_in_index(index, path):
+    # The first added file holding the path, as a scan of the files in order would find
+    files = index.get(path)
+    if not files:
         return None
+    return files[min(files)]
+
+
+def remove_from_index(index, path, position):
+    files = index.get(path)
+    if files is not None:
+        files.pop(position, None)
+        if not files:
+            del index[path]
@@ -0,0 +1,19 @@
+import hashlib
+
+
+def stable_id(*parts):
+    """
+    Derives an identifier from the values locating an entity in the mined corpus.
+
+    The same entity gets the same identifier in every process and run, and entities located by
+    different values get different identifiers (64 bits of a SHA-1 digest), so the outputs of
+    parallel or resumed runs merge without renumbering.
+
+    Args:
+        parts: The values locating the entity, e.g. the repo URL, a commit hash, a path and a line.
+
+    Returns:
+        A string of 16 hexadecimal digits.
+    """
+    digest = hashlib.sha1('\0'.join(str(part) for part in parts).encode('utf-8'))
+    return digest.hexdigest()[:16]
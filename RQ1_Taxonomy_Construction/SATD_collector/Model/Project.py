@@ -1,10 +1,12 @@
+from RQ1_Taxonomy_Construction.SATD_collector.Model.Identifiers import stable_id
+
+
 class Project:
-    # Static variable to keep track of the last assigned ID
-    id_counter = 0
+    __slots__ = ('id', 'project_url', 'project_id')
 
     def __init__(self, project_url):
-        Project.id_counter+=1
-        self.id=Project.id_counter
+        # Derived from the repo URL, the same in every run
+        self.id=stable_id(project_url)
         self.project_url = project_url
 
     def __repr__(self):
@@ -1,17 +1,18 @@
 from RQ1_Taxonomy_Construction.SATD_collector.Model.File import File
+from RQ1_Taxonomy_Construction.SATD_collector.Model.Identifiers import stable_id
 
 
 class SatdComment:
-    # Static variable to keep track of the last assigned ID
-    id_counter = 0
+    __slots__ = ('id', 'file', 'modification_type', 'comment_content', 'block_associated', 'line_number', 'ref_id', 'file_id')
 
     def __init__(self, file : File, modification_type, comment_content, block_associated, line_number,ref_id=None):
-        SatdComment.id_counter+=1
-        self.id = SatdComment.id_counter
+        # Derived from the repo, commit, path and line where the comment is found, and its content
+        self.id = stable_id(file.get_commit().get_project().get_project_url(), file.get_commit().get_commit_hash(),
+                            file.get_new_file_path() or file.get_old_file_path(), line_number, comment_content)
         self.file=file
         self.modification_type=modification_type
         self.comment_content = comment_content
-        self.block_associated = block_associated
+        self.block_associated = compact_block(block_associated)
         self.line_number = line_number
         self.ref_id=ref_id
 
@@ -59,5 +60,23 @@ class SatdComment:
         return self.block_associated
     
     def set_bock_associated(self, block_associated):
-        self.block_associated = block_associated
+        self.block_associated = compact_block(block_associated)
 
+
+# The parts of a TerraMetrics block element read by the tracker, its metrics are left out
+block_keys = ('block', 'start_block', 'end_block', 'block_identifiers')
+
+
+def compact_block(block_associated):
+    """
+    Keeps the line range, type and identifiers of a TerraMetrics block element.
+
+    Args:
+        block_associated: A TerraMetrics block element, or a placeholder such as -1 or ''.
+
+    Returns:
+        A dict with the kept keys of the element, or the placeholder unchanged.
+    """
+    if not isinstance(block_associated, dict):
+        return block_associated
+    return {key: block_associated[key] for key in block_keys if key in block_associated}
@@ -2,23 +2,67 @@ from RQ1_Taxonomy_Construction.SATD_collector.CommentsMining.SatdKeyWordLists im
 from RQ1_Taxonomy_Construction.SATD_collector.Model.SatdComment import SatdComment
 
 
+class CommentIndex:
+    """
+    Insertion-ordered SATD comments indexed by content, with multiplicity.
+
+    Adding, removing and finding the first comment with a given content are O(1), and the
+    comments are iterated in the order a list appended to would hold them.
+    """
+
+    def __init__(self, satd_comments=()):
+        # comment -> content it was indexed under
+        self.comments = {}
+        # content -> {comment: None}, in insertion order
+        self.comments_by_content = {}
+        for satd_comment in satd_comments:
+            self.add(satd_comment)
+
+    def __iter__(self):
+        return iter(list(self.comments))
+
+    def __len__(self):
+        return len(self.comments)
+
+    def __contains__(self, satd_comment):
+        return satd_comment in self.comments
+
+    def add(self, satd_comment):
+        content = satd_comment.get_comment_content()
+        self.comments[satd_comment] = content
+        self.comments_by_content.setdefault(content, {})[satd_comment] = None
+
+    def remove(self, satd_comment):
+        content = self.comments.pop(satd_comment)
+        same_content = self.comments_by_content[content]
+        del same_content[satd_comment]
+        if not same_content:
+            del self.comments_by_content[content]
+
+    def first_with_content(self, content):
+        same_content = self.comments_by_content.get(content)
+        if not same_content:
+            return None
+        return next(iter(same_content))
+
+
 class SatdCommentList:
 
     def __init__(self):
         self.satd_comments_map = {}
-        self.satd_comment_list = []
+        self.satd_comment_list = CommentIndex()
 
     def get_satd_comments_map(self):
-        return self.satd_comments_map
+        return {file: list(satd_comments) for file, satd_comments in self.satd_comments_map.items()}
 
     def set_satd_comments_map(self, satd_comments_map):
-        self.satd_comments_map = satd_comments_map
+        self.satd_comments_map = {file: CommentIndex(satd_comments) for file, satd_comments in satd_comments_map.items()}
 
     def get_satd_comments_map_file(self,file):
-        return self.satd_comments_map.get(file, [])
+        return list(self.satd_comments_map.get(file, ()))
     
     def set_satd_comments_map_file(self,file, satd_comments):
-        self.satd_comments_map[file]=list(satd_comments)
+        self.satd_comments_map[file]=CommentIndex(satd_comments)
     '''
     def set_satd_comments_map_file_dp_cp(self, satd_comments):
         for elt in satd_comments:
@@ -26,10 +70,10 @@ class SatdCommentList:
             self.add_comment_to_list(satd_comment_iter)'''
 
     def get_satd_comment_list(self):
-        return self.satd_comment_list
+        return list(self.satd_comment_list)
 
     def set_satd_comment_list(self, satd_comment_list):
-        self.satd_comment_list = satd_comment_list
+        self.satd_comment_list = CommentIndex(satd_comment_list)
 
     def set_satd_comment_list_dep_cp(self, satd_comment_list):
         #self.satd_comment_list = copy.deepcopy(satd_comment_list)
@@ -39,7 +83,7 @@ class SatdCommentList:
 
     def add_comment_to_map(self, file, satd_comment):
         if file in self.satd_comments_map:
-            self.satd_comments_map[file].append(satd_comment)
+            self.satd_comments_map[file].add(satd_comment)
 
     def remove_comment_from_map(self, file, satd_comment):
         if file in self.satd_comments_map:
@@ -47,18 +91,20 @@ class SatdCommentList:
                 self.satd_comments_map[file].remove(satd_comment)
 
     def add_comment_to_list(self, satdComment):
-        self.satd_comment_list.append(satdComment)
+        self.satd_comment_list.add(satdComment)
 
     def remove_comment_from_list(self, satdComment):
         #if satdComment in self.satd_comment_list:
+        if satdComment not in self.satd_comment_list:
+            raise ValueError("SATD comment not in list")
         self.satd_comment_list.remove(satdComment)
     
     def empty_satd_comment_list(self):
-        self.satd_comment_list = []
+        self.satd_comment_list = CommentIndex()
 
     def add_file(self, file):
         if file not in self.satd_comments_map:
-            self.satd_comments_map[file] = []
+            self.satd_comments_map[file] = CommentIndex()
     
     def remove_file(self, file):
         if file in self.satd_comments_map.keys():
@@ -67,19 +113,18 @@ class SatdCommentList:
     def filter_comments(self, commentList):
         # Filter comments that contain at least one word from the word list
         filtered_comments = [comment for comment in commentList.get_comment_list() if any(word in comment for word in keywordList1)]
-        self.satd_comment_list = filtered_comments
+        self.set_satd_comment_list(filtered_comments)
 
     def check_satd_comment_in_file(self,file, satdComment):
-        for satdComment1 in self.get_satd_comments_map_file(file):
-            if satdComment1.get_comment_content()==satdComment.get_comment_content():
-                return satdComment1
-        return None
+        if file not in self.satd_comments_map:
+            return None
+        return self.satd_comments_map[file].first_with_content(satdComment.get_comment_content())
     
     def check_satd_comment_in_list(self, satdComment):
-        for satdCommentItr in self.get_satd_comment_list():
-            if satdCommentItr.get_comment_content()==satdComment.get_comment_content():
-                return satdCommentItr
-        return 0
+        satdCommentItr = self.satd_comment_list.first_with_content(satdComment.get_comment_content())
+        if satdCommentItr is None:
+            return 0
+        return satdCommentItr
     
     def create_satd_comments_from_list(self, satd_comment_list, file):
         for comment_content, line_number in satd_comment_list:
@@ -1,38 +1,31 @@
-from RQ1_Taxonomy_Construction.SATD_collector.CommentsMining.CommentExtractor import extract_comment_block
-from RQ1_Taxonomy_Construction.SATD_collector.DataManagment.AddLineCsv import add_line_to_csv
+from RQ1_Taxonomy_Construction.SATD_collector.CommentsMining.CommentExtractor import CommentBlockIndex
 from RQ1_Taxonomy_Construction.SATD_collector.DataManagment.Utils import get_first_line
 from RQ1_Taxonomy_Construction.SATD_collector.SatdTracking.LogicExecutor import LogicExecutor
-from RQ1_Taxonomy_Construction.SATD_collector.terrametrics_dependency.terrametrics_loader import TerraMetricsLoader
-from RQ1_Taxonomy_Construction.SATD_collector.terrametrics_dependency.utils import extract_associated_block, \
-    extract_code, write_to_file
+from RQ1_Taxonomy_Construction.SATD_collector.terrametrics_dependency.block_analysis import BlockAnalysis
 
 
 class AddExecutor(LogicExecutor):
-    def executeModification(self, file, satdCommentList, satd_comments, csv_tracked_satd_file_path, csv_comments_file_path):
+    def executeModification(self, file, satdCommentList, satd_comments, tracked_satd_writer, comments_writer, block_analysis=None):
         satdCommentList.add_file(file)
 
+        #blocks of the revision, analyzed once for all its satd comments
+        if block_analysis is None:
+            block_analysis = BlockAnalysis(file.get_source_code())
+
+        #comment blocks of the revision, indexed once for all its satd comments
+        comment_blocks = CommentBlockIndex(file.get_source_code())
+
         for satdComment in satd_comments.get_satd_comment_list():
 
            #add satd comment to the map
            satdCommentList.add_comment_to_map(file,satdComment)
 
-           #terrametrics integration
-           write_to_file(file.get_source_code())
-
-           #path to the tmp file
-           tmp_path="terrametrics_dependency/tmp.tf"
-           #print(tmp_path)
-
-           #terrametrics integration
-           terrametrics_instance = TerraMetricsLoader(pathToLocalEmp=tmp_path)
-           terrametrics_instance.call_service_locator()
-
-           #return the pair
-           block_extracted=extract_associated_block(satdComment.get_line_number())
+           #return the block associated to the comment line
+           block_extracted=block_analysis.find_block(satdComment.get_line_number())
 
            if(block_extracted!=-1):
                 #find the ranges
-                bloc=extract_code(block_extracted['start_block'],block_extracted['end_block'])
+                bloc=block_analysis.extract_code(block_extracted['start_block'],block_extracted['end_block'])
                 bloc_type=block_extracted['block']
            else:
                 bloc=''
@@ -42,9 +35,9 @@ class AddExecutor(LogicExecutor):
            satdComment.set_bock_associated(block_extracted)
 
            #output to the csv of satd
-           row = [satdComment.get_file().get_commit().get_project().get_project_url(),satdComment.get_satd_comment_id(), satdComment.get_file().get_old_file_path(), satdComment.get_file().get_new_file_path(), satdComment.get_comment_content() ,extract_comment_block(file.get_source_code(),satdComment.get_line_number()) ,bloc , bloc_type ,satdComment.get_line_number() ,satdComment.get_file().get_num_lines() , satdComment.get_file().get_commit().get_commit_hash(), satdComment.get_file().get_commit().get_commit_msg(), satdComment.get_file().get_commit().get_developer_email(), satdComment.get_file().get_commit().get_committer_date(), satdComment.get_modification_type()]
-           add_line_to_csv(row, csv_tracked_satd_file_path)
+           row = [satdComment.get_file().get_commit().get_project().get_project_url(),satdComment.get_satd_comment_id(), satdComment.get_file().get_old_file_path(), satdComment.get_file().get_new_file_path(), satdComment.get_comment_content() ,comment_blocks.extract(satdComment.get_line_number()) ,bloc , bloc_type ,satdComment.get_line_number() ,satdComment.get_file().get_num_lines() , satdComment.get_file().get_commit().get_commit_hash(), satdComment.get_file().get_commit().get_commit_msg(), satdComment.get_file().get_commit().get_developer_email(), satdComment.get_file().get_commit().get_committer_date(), satdComment.get_modification_type()]
+           tracked_satd_writer.add_line(row)
 
            #output to the csv of the file
            row_1 = [satdComment.get_file().get_commit().get_project().get_project_url(), satdComment.get_file().get_old_file_path(), satdComment.get_file().get_new_file_path(), satdComment.get_comment_content(), satdComment.get_line_number(), satdComment.get_file().get_num_lines(), satdComment.get_file().get_commit().get_commit_hash(), get_first_line(satdComment.get_file().get_commit().get_commit_msg()), satdComment.get_file().get_commit().get_developer_email(), satdComment.get_file().get_commit().get_committer_date(),1]
-           add_line_to_csv(row_1, csv_comments_file_path)
\ No newline at end of file
+           comments_writer.add_line(row_1)
\ No newline at end of file
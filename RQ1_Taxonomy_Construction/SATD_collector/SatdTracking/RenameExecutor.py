@@ -3,7 +3,7 @@ from RQ1_Taxonomy_Construction.SATD_collector.SatdTracking.LogicExecutor import
 
 class RenameExecutor(LogicExecutor):
 
-    def executeModification(self , file_instance, satd_comment_list, csv_tracked_satd_file_path):
+    def executeModification(self , file_instance, satd_comment_list, tracked_satd_writer):
         #automatically delete the old file from the fileslist
         pass
 
@@ -0,0 +1,77 @@
+import argparse
+import re
+import time
+from pathlib import Path
+
+from RQ1_Taxonomy_Construction.SATD_collector.CommentsMining.CommentExtractor import CommentBlockIndex, extract_comment_block, extract_comments, remove_n
+
+
+def regex_extract_comments(text):
+    # Former two-pass extraction, counting the lines before every match from the start of the file
+    comments = []
+    for match in re.finditer(r'(?<!:)(//|#)(.*?)(?=\n|$)', text):
+        comments.append((match.group(1) + match.group(2), text.count('\n', 0, match.start()) + 1))
+    for match in re.finditer(r'/\*([\s\S]*?)\*/', text):
+        comments.append((remove_n("/*" + match.group(1).strip() + "*/"), text.count('\n', 0, match.start()) + 1))
+    return comments
+
+
+def time_extractor(extractor, sources, repeat):
+    start = time.perf_counter()
+    found = 0
+    for _ in range(repeat):
+        for source in sources:
+            found = len(extractor(source))
+    return (time.perf_counter() - start) / repeat
+
+
+def time_context_extraction(sources, repeat):
+    # Context of every comment of each file: one block rebuild per comment vs one index per file
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for source in sources:
+            for _, line_number in extract_comments(source):
+                extract_comment_block(source, line_number)
+    per_call_time = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for source in sources:
+            comment_blocks = CommentBlockIndex(source)
+            for _, line_number in extract_comments(source):
+                comment_blocks.extract(line_number)
+    indexed_time = (time.perf_counter() - start) / repeat
+    return per_call_time, indexed_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the regex and single-pass comment extractors on the largest .tf files of a corpus.')
+    parser.add_argument('corpus', type=str, help='Directory holding the mined Terraform files (e.g. cloned repositories)')
+    parser.add_argument('--largest', type=int, default=20, help='Number of largest .tf files to benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions')
+    args = parser.parse_args()
+
+    paths = sorted(Path(args.corpus).rglob('*.tf'), key=lambda path: path.stat().st_size, reverse=True)[:args.largest]
+    sources = [path.read_text(encoding='utf-8', errors='replace') for path in paths]
+    if not sources:
+        print("No .tf file found in", args.corpus)
+        return
+
+    regex_time = time_extractor(regex_extract_comments, sources, args.repeat)
+    lexer_time = time_extractor(extract_comments, sources, args.repeat)
+
+    print(f"{len(sources)} files, {sum(len(source) for source in sources) / 1024:.0f} KiB, largest {paths[0]} ({len(sources[0]) / 1024:.0f} KiB)")
+    print(f"regex extractor:  {regex_time * 1000:.1f} ms")
+    print(f"single-pass lexer: {lexer_time * 1000:.1f} ms ({regex_time / lexer_time:.1f}x)")
+
+    per_call_time, indexed_time = time_context_extraction(sources, args.repeat)
+    print(f"comment contexts, rebuilt per comment: {per_call_time * 1000:.1f} ms")
+    print(f"comment contexts, indexed per file:    {indexed_time * 1000:.1f} ms ({per_call_time / indexed_time:.1f}x)")
+
+    # Comments reported by the regexes only are markers inside strings, heredocs or block comments
+    differing = sum(1 for source in sources if sorted(regex_extract_comments(source), key=lambda x: x[1]) != extract_comments(source))
+    print(f"files where the extracted comments differ: {differing}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import time
+
+from pydriller import Repository
+
+from RQ1_Taxonomy_Construction.SATD_collector.DataManagment.RepositoryCommits import list_terraform_commits
+
+
+def collect_terraform_revisions(repository):
+    # What the collector reads from each .tf modification: its diff and its source code
+    revisions = []
+    for commit in repository.traverse_commits():
+        for modified_file in commit.modified_files:
+            if modified_file.filename.endswith('.tf'):
+                revisions.append((commit.hash, modified_file.new_path or modified_file.old_path, len(modified_file.diff_parsed['added']), len(modified_file.source_code or '')))
+    return revisions
+
+
+def time_traversal(make_repository):
+    start = time.perf_counter()
+    revisions = collect_terraform_revisions(make_repository())
+    return time.perf_counter() - start, revisions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare traversing every commit with traversing the commits touching .tf files only.')
+    parser.add_argument('repo_path', type=str, help='Local clone of a (preferably large, mixed-language) repository')
+    args = parser.parse_args()
+
+    full_time, full_revisions = time_traversal(lambda: Repository(args.repo_path))
+    file_types_time, file_types_revisions = time_traversal(lambda: Repository(args.repo_path, only_modifications_with_file_types=['.tf']))
+
+    start = time.perf_counter()
+    terraform_commits = list_terraform_commits(args.repo_path)
+    list_time = time.perf_counter() - start
+    prefiltered_time, prefiltered_revisions = time_traversal(lambda: Repository(args.repo_path, only_commits=terraform_commits))
+    prefiltered_time += list_time
+
+    print(f"{len(terraform_commits)} commits touching .tf files, {len(full_revisions)} .tf revisions")
+    print(f"all commits:                         {full_time:.2f} s")
+    print(f"only_modifications_with_file_types:  {file_types_time:.2f} s ({full_time / file_types_time:.1f}x)")
+    print(f"git rev-list prefilter:              {prefiltered_time:.2f} s ({full_time / prefiltered_time:.1f}x, listing {list_time:.2f} s)")
+    print(f"same .tf revisions: {prefiltered_revisions == full_revisions and file_types_revisions == full_revisions}")
+
+
+if __name__ == '__main__':
+    main()
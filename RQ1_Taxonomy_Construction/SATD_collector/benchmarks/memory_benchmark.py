@@ -0,0 +1,88 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+COLLECTOR_DIR = Path(__file__).resolve().parent.parent
+MAIN_PATH = COLLECTOR_DIR / "main.py"
+
+
+def make_monorepo(repo_path, num_files, file_lines, num_commits, files_per_commit=100):
+    """
+    Creates a git repository with many large .tf files holding SATD comments, added `files_per_commit`
+    at a time so the tracked files accumulate, then modifies a tenth of them in each of the
+    following commits.
+    """
+    os.makedirs(repo_path)
+    subprocess.run(["git", "init", "--quiet", repo_path], check=True)
+
+    def write_file(index, revision):
+        module_dir = os.path.join(repo_path, f"module_{index}")
+        os.makedirs(module_dir, exist_ok=True)
+        with open(os.path.join(module_dir, "main.tf"), "w") as tf_file:
+            tf_file.write(f"# TODO split module {index}\n")
+            for line in range(0, file_lines, 5):
+                tf_file.write(f'resource "null_resource" "r_{line}" {{\n  # revision {revision}\n  triggers = {{ value = "{index}-{line}" }}\n}}\n\n')
+
+    def commit(message):
+        subprocess.run(["git", "-C", repo_path, "add", "-A"], check=True)
+        subprocess.run(["git", "-C", repo_path, "-c", "user.name=bench", "-c", "user.email=bench@example.com", "commit", "--quiet", "-m", message], check=True)
+
+    for first_index in range(0, num_files, files_per_commit):
+        for index in range(first_index, min(first_index + files_per_commit, num_files)):
+            write_file(index, 0)
+        commit(f"add modules from {first_index}")
+    for revision in range(1, num_commits):
+        for index in range(revision % 10, num_files, 10):
+            write_file(index, revision)
+        commit(f"revision {revision}")
+
+
+def run_collector(repo_path, detect_type, extra_args):
+    """
+    Runs the collector on a repository in a child process.
+
+    Returns:
+        The wall time in seconds and the peak resident set size of the child in MiB.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(COLLECTOR_DIR), str(COLLECTOR_DIR.parent.parent), env.get("PYTHONPATH", "")])
+    with tempfile.TemporaryDirectory(prefix="memory_benchmark_") as work_dir:
+        os.makedirs(os.path.join(work_dir, "Data"))
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, str(MAIN_PATH), repo_path, str(detect_type), "--block-cache", "", *extra_args],
+                                   cwd=work_dir, env=env, stdout=subprocess.DEVNULL)
+        _, status, rusage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - start
+    if status != 0:
+        raise RuntimeError(f"collector exited with status {status}")
+    # ru_maxrss is in KiB on Linux
+    return elapsed, rusage.ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the peak resident memory of the collector on a repository with many tracked .tf files.')
+    parser.add_argument('repo_path', type=str, nargs='?', default=None, help='Local clone to mine (default: a generated monorepo)')
+    parser.add_argument('--detect-type', dest='detect_type', type=int, default=3, help='Detection method of the run')
+    parser.add_argument('--files', type=int, default=2000, help='Number of .tf files of the generated monorepo')
+    parser.add_argument('--file-lines', dest='file_lines', type=int, default=1000, help='Number of lines of each generated .tf file')
+    parser.add_argument('--commits', type=int, default=5, help='The generated monorepo gets commits - 1 modifying commits after the ones adding its files')
+    args, extra_args = parser.parse_known_args()
+
+    with tempfile.TemporaryDirectory(prefix="memory_benchmark_repo_") as repo_dir:
+        repo_path = args.repo_path
+        if repo_path is None:
+            repo_path = os.path.join(repo_dir, "monorepo")
+            make_monorepo(repo_path, args.files, args.file_lines, args.commits)
+            print(f"generated {args.files} files of {args.file_lines} lines, then {args.commits - 1} modifying commits")
+
+        elapsed, peak_rss = run_collector(repo_path, args.detect_type, extra_args)
+
+    print(f"collector run: {elapsed:.1f} s, peak RSS {peak_rss:.0f} MiB")
+
+
+if __name__ == '__main__':
+    main()
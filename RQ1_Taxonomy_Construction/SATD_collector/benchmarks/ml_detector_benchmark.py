@@ -0,0 +1,43 @@
+import argparse
+import csv
+import time
+from pathlib import Path
+
+from RQ1_Taxonomy_Construction.SATD_collector.CommentsMining.SatdDetector import MLModelDetector, BatchMLModelDetector
+
+# Comments mined from Terraform projects, shipped with the data statistics of RQ1
+DEFAULT_SAMPLE = Path(__file__).resolve().parents[2] / "data_statistics" / "384_non_SATD_sample.csv"
+
+
+def load_comments(csv_path, limit):
+    with open(csv_path, newline='', encoding='utf-8') as csvfile:
+        comments = [(row['comment'], line_id) for line_id, row in enumerate(csv.DictReader(csvfile), start=1)]
+    return comments[:limit]
+
+
+def time_detector(detector, comments, batch_size):
+    start = time.perf_counter()
+    detected = 0
+    for i in range(0, len(comments), batch_size):
+        # detect() removes the SATD comments from its input, hand it a copy
+        detected += len(detector.detect(list(comments[i:i + batch_size])))
+    detector.close()
+    return time.perf_counter() - start, detected
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the SATD detector model throughput with one JVM per comment and with one persistent JVM.')
+    parser.add_argument('--comments', type=str, default=str(DEFAULT_SAMPLE), help='CSV file with a "comment" column')
+    parser.add_argument('--limit', type=int, default=200, help='Number of comments to classify')
+    parser.add_argument('--batch-size', dest='batch_size', type=int, default=20, help='Comments per detect() call, as for one file revision')
+    args = parser.parse_args()
+
+    comments = load_comments(args.comments, args.limit)
+
+    for name, detector in (("per-comment", MLModelDetector()), ("persistent", BatchMLModelDetector())):
+        elapsed, detected = time_detector(detector, comments, args.batch_size)
+        print(f"{name:>12}: {len(comments)} comments in {elapsed:.2f} s ({len(comments) / elapsed:.1f} comments/s), {detected} SATD")
+
+
+if __name__ == '__main__':
+    main()
@@ -50,8 +50,7 @@ def add_row_to_projects_details(row_data):
         print("An error occurred:", e)
 
 
-def add_row_to_satd_data_all_projects(satd_csv_file, satd_id):
-        
+def create_satd_data_all_projects():
     # Define the path to the CSV file
     data_folder = "Data"
     csv_file_name = "satd_data_all_projects.csv"
@@ -64,94 +63,162 @@ def add_row_to_satd_data_all_projects(satd_csv_file, satd_id):
             #writer.writerow(['Repo URL', 'Satd Comment Id', 'File Path Of First Occurence', 'File Path Of Last Occurence', 'SATD Comment', 'context', 'bloc', 'bloc type', 'SATD Comment Line Of First Occurence', 'SATD Comment Line Of Last Occurence', 'first Commit Hash', 'last Commit Hash','Link To The File Of First Occurence', 'Link To The File Of Last Occurence/When Adressed', 'Introduction Time', 'Last Occurence (even solved or not)', 'number of commits' , 'adressed ?'])
             writer.writerow(['Repo URL', 'Satd Comment Id', 'File Path Of First Occurence', 'File Path Of Last Occurence', 'SATD Comment', 'context', 'bloc of first occurence', 'bloc type of first occurence', 'bloc of last occurence', 'bloc type of last occurence', 'SATD Comment Line Of First Occurence', 'SATD Comment Line Of Last Occurence', 'first Commit Hash', 'last Commit Hash','Link To The File Of First Occurence', 'Link To The File Of Last Occurence/When Adressed', 'Introduction Time', 'Last Occurence (even solved or not)', 'number of commits' , 'adressed ?'])
 
-
-    # Initialize variables
-    row_data = []
-    count = 0
-
-    #satd_type
-    satd_type=0
-
-    # Read the CSV file
+    return csv_file_path
+
+
+def start_satd_data(row):
+    # Fields of the first occurence of a satd comment in the tracked satd csv
+    satd_data = {
+        'repo_URL': row[0],
+        'comment_id': row[1],
+        'comment_Line_Id_first': row[8],
+        'comment_msg': row[4],
+        'comment_context': row[5],
+        'bloc_first_occurence': row[6],
+        'bloc_type_first_occurence': row[7],
+        'time_intro': row[12],
+        'first_commit_hash': row[10],
+        'file_path_first_occurence': row[2] if row[2] else row[3],
+        'count': 0,
+        'satd_type': 0,
+    }
+    satd_data['file_path_last_occurence'] = satd_data['file_path_first_occurence']
+
+    satd_data['link_first_occurence'] = f"{satd_data['repo_URL']}/blob/{satd_data['first_commit_hash']}/{satd_data['file_path_first_occurence']}"
+    if satd_data['comment_Line_Id_first']:
+        satd_data['link_first_occurence'] += f"#L{satd_data['comment_Line_Id_first']}"
+    return satd_data
+
+
+def update_satd_data(satd_data, row):
+    # Fields of the last occurence, updated with every row of the satd comment in commit order
+    if satd_data['count'] > 0:
+        if(row[3]):
+            satd_data['file_path_last_occurence'] = row[3]
+        else:
+            satd_data['file_path_last_occurence'] = row[2]
+
+    satd_data['bloc_last_occurence'] = row[6]
+    satd_data['bloc_type_last_occurence'] = row[7]
+    satd_data['last_time'] = row[12]
+    satd_data['last_commit_hash'] = row[10]
+
+    link_last_occurence = f"{satd_data['repo_URL']}/blob/{satd_data['last_commit_hash']}/{satd_data['file_path_last_occurence']}"
+    if(row[14] == "0"):
+        #adressed, the comment has no line anymore
+        satd_data['comment_Line_Id_last'] = ""
+    else:
+        satd_data['comment_Line_Id_last'] = row[8]
+        link_last_occurence += f"#L{row[8]}"
+    satd_data['link_last_occurence'] = link_last_occurence
+    satd_data['count'] += 1
+
+    #check the type of the satd comment
+    if(row[14]=="3"):
+        satd_data['satd_type']=2
+    elif(row[14]=="2"):
+        satd_data['satd_type']=0
+    elif(row[14]=="0"):
+        satd_data['satd_type']=1
+
+
+def satd_data_row(satd_data):
+    #check if the file got renamed
+    renamed = 0 if satd_data['file_path_first_occurence'] == satd_data['file_path_last_occurence'] else 1
+
+    return [satd_data['repo_URL'], satd_data['comment_id'], satd_data['file_path_first_occurence'], satd_data['file_path_last_occurence'], renamed, satd_data['comment_msg'], satd_data['comment_context'], satd_data['bloc_first_occurence'], satd_data['bloc_type_first_occurence'], satd_data['bloc_last_occurence'], satd_data['bloc_type_last_occurence'], satd_data['comment_Line_Id_first'], satd_data['comment_Line_Id_last'], satd_data['first_commit_hash'], satd_data['last_commit_hash'], satd_data['link_first_occurence'], satd_data['link_last_occurence'], satd_data['time_intro'], satd_data['last_time'], satd_data['count'], satd_data['satd_type']]
+
+
+def aggregate_satd_comments(satd_csv_file, satd_id=None):
+    """
+    Aggregates the rows of the tracked satd csv per satd comment in a single read.
+
+    Args:
+        satd_csv_file (str): The path to the tracked satd csv.
+        satd_id (str): Only aggregate the rows of this satd comment, all satd comments if None.
+
+    Returns:
+        A dict mapping each satd comment id to its aggregated data, in order of first occurence.
+    """
+    satd_data_by_id = {}
     with open(satd_csv_file, newline='') as csvfile:
         reader = csv.reader(csvfile)
         for row in reader:
-            if len(row) > 1 and row[1] == satd_id:
-                # Process the row
-                if count == 0:
-                    repo_URL = row[0]
-                    comment_id = row[1]
-                    comment_Line_Id_first = row[8]
-                    comment_Line_Id_last = row[8]
-                    comment_msg = row[4]
-                    comment_context = row[5]
-                    bloc_first_occurence = row[6]
-                    bloc_type_first_occurence = row[7]
-                    bloc_last_occurence = row[6]
-                    bloc_type_last_occurence = row[7]
-                    time_intro = row[12]
-                    last_time = row[12]
-                    first_commit_hash = row[10]
-                    last_commit_hash = row[10]
-                    is_adressed = 0
-                    if(row[2]):
-                        file_path_first_occurence = row[2]
-                        file_path_last_occurence = row[2]
-                    else:
-                        file_path_first_occurence = row[3]
-                        file_path_last_occurence = row[3]
-
-                    link_first_occurence = f"{repo_URL}/blob/{first_commit_hash}/{file_path_first_occurence}"
-                    link_last_occurence = f"{repo_URL}/blob/{last_commit_hash}/{file_path_last_occurence}"
-                    if comment_Line_Id_first:
-                        link_first_occurence += f"#L{comment_Line_Id_first}"
-                    if comment_Line_Id_last:
-                        link_last_occurence += f"#L{comment_Line_Id_last}"
-
-                else:
-                    bloc_last_occurence = row[6]
-                    bloc_type_last_occurence = row[7]
-                    last_time = row[12]
-                    last_commit_hash = row[10]
-                    if(row[3]):
-                        file_path_last_occurence = row[3]
-                    else:
-                        file_path_last_occurence = row[2]
-
-                is_adressed = 1 if row[14] == "0" else 0
-                if(is_adressed == 1):
-                    comment_Line_Id_last=""
-                    link_last_occurence = f"{repo_URL}/blob/{last_commit_hash}/{file_path_last_occurence}"
-                else:
-                    comment_Line_Id_last=row[8]
-                    link_last_occurence = f"{repo_URL}/blob/{last_commit_hash}/{file_path_last_occurence}"
-                    link_last_occurence += f"#L{comment_Line_Id_last}"
-                count += 1
-
-                #check the type of the satd comment
-                if(row[14]=="3"):
-                    satd_type=2
-                elif(row[14]=="2"):
-                    satd_type=0
-                elif(row[14]=="0"):
-                    satd_type=1
-
-                renamed=0
-                #check if the file got renamed
-                if(file_path_first_occurence==file_path_last_occurence):
-                    renamed=0
-                else:
-                    renamed=1
-
-
-    # Form the row_data
-    row_data = [repo_URL, comment_id, file_path_first_occurence, file_path_last_occurence, renamed, comment_msg, comment_context, bloc_first_occurence, bloc_type_first_occurence, bloc_last_occurence, bloc_type_last_occurence, comment_Line_Id_first, comment_Line_Id_last, first_commit_hash, last_commit_hash, link_first_occurence, link_last_occurence, time_intro, last_time, count, satd_type]
-    
+            if len(row) <= 1 or row[1] == "Satd Comment Id":
+                continue
+            if satd_id is not None and row[1] != satd_id:
+                continue
+
+            satd_data = satd_data_by_id.get(row[1])
+            if satd_data is None:
+                satd_data = satd_data_by_id[row[1]] = start_satd_data(row)
+            update_satd_data(satd_data, row)
+    return satd_data_by_id
+
+
+def add_rows_to_satd_data_all_projects(satd_csv_file):
+    """
+    Inserts the data of every satd comment of a tracked satd csv in the satd data of all projects.
+
+    Returns:
+        A dict mapping each satd comment id to its type: 0 not yet adressed, 1 adressed, 2 deleted with its file.
+    """
+    satd_data_by_id = aggregate_satd_comments(satd_csv_file)
+    append_rows_to_satd_data_all_projects(satd_data_row(satd_data) for satd_data in satd_data_by_id.values())
+    return {satd_id: satd_data['satd_type'] for satd_id, satd_data in satd_data_by_id.items()}
+
+
+def append_rows_to_satd_data_all_projects(rows):
+    csv_file_path = create_satd_data_all_projects()
+
+    # Append the new rows to the CSV file
+    with open(csv_file_path, 'a', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerows(rows)
+
+
+def add_row_to_satd_data_all_projects(satd_csv_file, satd_id):
+    csv_file_path = create_satd_data_all_projects()
+    satd_data = aggregate_satd_comments(satd_csv_file, satd_id)[satd_id]
+
     # Append the new row to the CSV file
     with open(csv_file_path, 'a', newline='') as file:
         writer = csv.writer(file)
-        writer.writerow(row_data)
+        writer.writerow(satd_data_row(satd_data))
+
+    return satd_data['satd_type']
 
-    
-    return satd_type
 
+def remove_rows_of_repository(csv_file_path, repo_url):
+    """
+    Removes the rows of a repository from a csv of all projects, whose first column is the repo URL.
+
+    The csv is rewritten to a temporary file then renamed over it, so a crash keeps either version.
+
+    Returns:
+        The number of rows removed.
+    """
+    if not os.path.exists(csv_file_path):
+        return 0
+
+    tmp_path = csv_file_path + '.tmp'
+    removed = 0
+    with open(csv_file_path, newline='') as src, open(tmp_path, 'w', newline='') as dst:
+        writer = csv.writer(dst)
+        for row in csv.reader(src):
+            if row and row[0] == repo_url:
+                removed += 1
+                continue
+            writer.writerow(row)
+
+    if removed:
+        os.replace(tmp_path, csv_file_path)
+    else:
+        os.remove(tmp_path)
+    return removed
+
+
+def remove_repository_from_all_projects(repo_url):
+    # Drop what an interrupted merge of the repository appended, so merging it again adds no duplicates
+    for csv_file_name in ("satd_data_all_projects.csv", "projects_details.csv"):
+        remove_rows_of_repository(os.path.join("Data", csv_file_name), repo_url)
@@ -11,4 +11,49 @@ def parse_arguments():
                         help='GitHub repository URL')
     parser.add_argument('detect_type', metavar='detect_type', type=int,
                         help='Detection type (1 for KeywordList1, 2 for KeywordList2, 3 for SatdDetectorModel)')
+    add_mining_arguments(parser)
     return parser.parse_args()
+
+
+# Function to parse the command-line arguments of a batch of repositories
+def parse_batch_arguments():
+    parser = argparse.ArgumentParser(description='Mine a list of GitHub repos in parallel.')
+    parser.add_argument('repos_csv', metavar='repos_csv', type=str, nargs='?',
+                        default=str(project_path.parent / 'data_statistics' / 'terraform_based_repos.csv'),
+                        help='CSV listing the repos in a repo_full_name (owner/name) or repo_url column')
+    parser.add_argument('detect_type', metavar='detect_type', type=int, nargs='?', default=1,
+                        help='Detection type (1 for KeywordList1, 2 for KeywordList2, 3 for SatdDetectorModel)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of repos mined in parallel (default: number of CPUs)')
+    parser.add_argument('--ledger', type=str, default='Data/mining_ledger.csv',
+                        help='CSV recording the status of each repo, used to resume an interrupted batch')
+    add_mining_arguments(parser)
+    return parser.parse_args()
+
+
+# Options shared by the single and batch mining entry points
+def add_mining_arguments(parser):
+    parser.add_argument('--reuse-verdicts', dest='reuse_verdicts', action='store_true',
+                        help='With the ML detector, reuse on modifications the verdicts of the comments outside the diff hunks')
+    parser.add_argument('--block-cache', dest='block_cache', type=str, default='terrametrics_dependency/block_cache.sqlite',
+                        help='SQLite file caching TerraMetrics block analyses by file content (empty string to disable)')
+    parser.add_argument('--block-cache-size', dest='block_cache_size', type=int, default=512,
+                        help='Maximum size of the block cache in MB, least recently used entries are evicted beyond it')
+    parser.add_argument('--csv-batch-size', dest='csv_batch_size', type=int, default=1000,
+                        help='Number of complete rows buffered before they are written to the output csv files')
+    parser.add_argument('--satd-store', dest='satd_store', type=str, default=None,
+                        help='SQLite database receiving the mined repos, from which the satd data and projects details are computed')
+    parser.add_argument('--parquet-dir', dest='parquet_dir', type=str, default=None,
+                        help='Also write the comments and tracked satd rows to Parquet datasets in this directory, partitioned by repo (requires pyarrow)')
+    parser.add_argument('--scratch-dir', dest='scratch_dir', type=str, default=None,
+                        help='Directory receiving the per-run TerraMetrics scratch directories (default: system temporary directory)')
+    parser.add_argument('--tmpfs', action='store_true',
+                        help='Keep the TerraMetrics scratch directory on tmpfs (/dev/shm) when available')
+    parser.add_argument('--analysis-workers', dest='analysis_workers', type=int, default=0,
+                        help='Threads extracting comments and analyzing TerraMetrics blocks ahead of the tracking (default: 0, no pipeline)')
+    parser.add_argument('--pipeline-depth', dest='pipeline_depth', type=int, default=64,
+                        help='Maximum number of commits and revisions queued between the pipeline stages')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume an interrupted run of the repo from its last checkpoint, appending to the same csv files')
+    parser.add_argument('--checkpoint-every', dest='checkpoint_every', type=int, default=100,
+                        help='Number of commits between two checkpoints of the tracker state (0 to disable)')
@@ -1,6 +1,8 @@
 
 import os
+import shutil
 import sys
+import tempfile
 from imports import parse_arguments
 from imports import project_path
 from pydriller import Repository
@@ -14,60 +16,168 @@ from SatdTracking.ModifyExecutor import ModifyExecutor
 from SatdTracking.RenameExecutor import RenameExecutor
 from SatdTracking.DeleteExecutor import DeleteExecutor
 from CommentsMining.CommentExtractor import extract_comments, trier_par_numero_ligne, fusionner_commentaires_en_bloc
-from CommentsMining.SatdDetector import KeywordList1Detector, KeywordList2Detector, KeywordListsDetector, MLModelDetector
+from CommentsMining.SatdDetector import KeywordDetector, KeywordList1Detector, KeywordList2Detector, KeywordListsDetector, BatchMLModelDetector, MemoizedDetector
 from DataManagment.CreateCsvfile import create_csv_1_from_repo, create_csv_2_from_repo
-from DataManagment.Utils import count_lines
-from DataManagment.AddLineCsv import add_line_to_csv
-from extract_satd_dataset.extract_conc_data import extract_IDs_Satd_Comments, count_csv_rows, add_row_to_satd_data_all_projects, add_row_to_projects_details
-
-# Main function
-def main():
-
-    args = parse_arguments()
-    repo_url = args.repo_url
-
-    #create Project instance
-    Project_inst = Project(repo_url)
-
-    #define extract type method 1 <-> keywordList1, 2 <-> keywordList2, 3 <-> SatdDetectorModel
-    detect_type = args.detect_type
-
-    # Create CSV files from GitHub repo
-    csv_comments_file_path = create_csv_1_from_repo(repo_url, detect_type)
-    csv_tracked_satd_file_path = create_csv_2_from_repo(repo_url, detect_type)
-
-    # Create empty SatdCommentList and FilesList objects
-    satd_comment_list = SatdCommentList()
-    file_list = FilesList()
-
-    # Iterate through commits and modified files
-    for commit in Repository(repo_url).traverse_commits():
-        commit_inst=Commit(commit.hash,Project_inst, commit.msg, commit.committer.email, commit.committer_date)
-        for modified_file in commit.modified_files:
-            if modified_file.filename.endswith('.tf'):
-                #extract all comments
-                extracted_comments=[]
-                if not(modified_file.source_code=='' or modified_file.source_code is None):
-                    extracted_comments= extract_comments(modified_file.source_code)
-
-                if(modified_file.source_code=='' or modified_file.source_code is None):
-                    number_lines = 0
-                else:
-                    number_lines = count_lines(modified_file.source_code)
+from DataManagment.AddLineCsv import BufferedCsvWriter
+from DataManagment.ParquetWriter import ParquetDatasetWriter, COMMENTS_COLUMNS, TRACKED_SATD_COLUMNS
+from DataManagment.RepositoryCommits import clone_repository, list_terraform_commits, commits_after
+from DataManagment.Checkpoint import TraversalCheckpoint, truncate_csv_files
+from terrametrics_dependency.terrametrics_worker import TerraMetricsWorker
+from terrametrics_dependency.block_cache import BlockCache
+from terrametrics_dependency.scratch_space import ScratchSpace
+from revision_pipeline import RevisionPipeline
+from DataManagment.SatdStore import SatdStore
+from extract_satd_dataset.extract_conc_data import count_csv_rows, add_rows_to_satd_data_all_projects, append_rows_to_satd_data_all_projects, add_row_to_projects_details
+
+def save_checkpoint(checkpoint, project, last_commit_hash, file_list, satd_comment_list, comments_writer, tracked_satd_writer):
+    """
+    Saves the tracker state after a commit, with the size of the csv files once flushed up to that commit.
+    """
+    checkpoint.save({
+        'project': project,
+        'last_commit_hash': last_commit_hash,
+        'csv_comments_file_path': comments_writer.get_csv_file_path(),
+        'csv_tracked_satd_file_path': tracked_satd_writer.get_csv_file_path(),
+        'csv_sizes': {
+            comments_writer.get_csv_file_path(): comments_writer.get_size(),
+            tracked_satd_writer.get_csv_file_path(): tracked_satd_writer.get_size(),
+        },
+        # After the sizes, which flush the Parquet parts of the checkpointed commits
+        'parquet_parts': {
+            writer.get_csv_file_path(): writer.columnar_writer.get_parts()
+            for writer in (comments_writer, tracked_satd_writer) if writer.columnar_writer is not None
+        },
+        'file_list': file_list,
+        'satd_comment_list': satd_comment_list,
+    })
+
+
+def mine_repository(repo_url, detect_type, args):
+    """
+    Mines the comments and tracks the SATD comments of one repository.
+
+    Args:
+        repo_url (str): The URL of the repository to mine.
+        detect_type (int): The detection method, 1 <-> keywordList1, 2 <-> keywordList2, 3 <-> keywordLists, 4 <-> SatdDetectorModel.
+        args (argparse.Namespace): The mining options parsed by `parse_arguments`.
+
+    Returns:
+        A tuple with the paths of the comments csv and of the tracked satd csv.
+    """
+
+    # Resume the traversal from the last checkpoint of the repo, or start a new one
+    checkpoint = TraversalCheckpoint(repo_url, detect_type)
+    state = checkpoint.load() if args.resume else None
+
+    if state is None:
+        #create Project instance
+        Project_inst = Project(repo_url)
+
+        # Create CSV files from GitHub repo
+        csv_comments_file_path = create_csv_1_from_repo(repo_url, detect_type)
+        csv_tracked_satd_file_path = create_csv_2_from_repo(repo_url, detect_type)
+
+        # Create empty SatdCommentList and FilesList objects
+        satd_comment_list = SatdCommentList()
+        file_list = FilesList()
+        last_commit_hash = None
+        parquet_parts = {}
+    else:
+        Project_inst = state['project']
+        csv_comments_file_path = state['csv_comments_file_path']
+        csv_tracked_satd_file_path = state['csv_tracked_satd_file_path']
+        satd_comment_list = state['satd_comment_list']
+        file_list = state['file_list']
+        last_commit_hash = state['last_commit_hash']
+        parquet_parts = state.get('parquet_parts', {})
+        truncate_csv_files(state['csv_sizes'])
+        print(f"Resuming {repo_url} after commit {last_commit_hash}")
+
+    #choose detection type, a single detector serves the whole run
+    if(detect_type==1):
+        detector=KeywordList1Detector()
+    elif(detect_type==2):
+        detector=KeywordList2Detector()
+    elif(detect_type==3):
+        detector=KeywordListsDetector()
+    elif(detect_type==4):
+        detector=BatchMLModelDetector()
+    else:
+        raise ValueError("Invalid detector type")
+
+    #on modifications, reuse the model verdicts of the comments the diff left untouched
+    if args.reuse_verdicts:
+        if detect_type==4:
+            detector=MemoizedDetector(detector)
+        else:
+            print("--reuse-verdicts only applies to the ML detector (--detect_type 4), ignored")
+
+    # Everything started from here is stopped in the finally block, whether the traversal completes or fails
+    terrametrics_worker = None
+    block_cache = None
+    comments_writer = None
+    tracked_satd_writer = None
+    clone_dir = None
+    scratch_space = None
+    pipeline = None
+    commits_since_checkpoint = 0
+
+    try:
+        # Start a single TerraMetrics JVM shared by every block analysis of the run
+        terrametrics_worker = TerraMetricsWorker()
+
+        # Reuse the block analyses of file contents already seen in this or previous runs
+        if args.block_cache:
+            block_cache = BlockCache(args.block_cache, args.block_cache_size * 1024 * 1024)
+
+        # Mirror the csv rows to the Parquet datasets of the run, one partition per repo
+        comments_parquet = None
+        tracked_satd_parquet = None
+        if args.parquet_dir:
+            # Parts missing from the checkpoint (all of them for a new run) are dropped from the partition
+            comments_parquet = ParquetDatasetWriter(os.path.join(args.parquet_dir, 'extracted_comments'), repo_url, COMMENTS_COLUMNS,
+                                                    parquet_parts.get(csv_comments_file_path, []))
+            tracked_satd_parquet = ParquetDatasetWriter(os.path.join(args.parquet_dir, 'tracked_satd_comments'), repo_url, TRACKED_SATD_COLUMNS,
+                                                        parquet_parts.get(csv_tracked_satd_file_path, []))
+
+        # Keep both csv files open for the run and write their rows in batches
+        comments_writer = BufferedCsvWriter(csv_comments_file_path, args.csv_batch_size, comments_parquet)
+        tracked_satd_writer = BufferedCsvWriter(csv_tracked_satd_file_path, args.csv_batch_size, tracked_satd_parquet)
+
+        # Each analysis thread of the pipeline opens its own connection to the block cache
+        make_block_cache = None
+        if args.block_cache:
+            make_block_cache = lambda: BlockCache(args.block_cache, args.block_cache_size * 1024 * 1024)
+
+        # TerraMetrics temporary files of this run, isolated from the other runs of the host
+        scratch_space = ScratchSpace(args.scratch_dir, args.tmpfs)
+
+        # Clone the repo once, so the commits touching .tf files are listed before PyDriller computes any diff
+        if os.path.isdir(repo_url):
+            repo_path = repo_url
+        else:
+            clone_dir = tempfile.mkdtemp(prefix='satd_repo_')
+            repo_path = clone_repository(repo_url, clone_dir)
+        terraform_commits = list_terraform_commits(repo_path)
+
+        # On resume, only the commits after the checkpointed one in the traversal order are left
+        if last_commit_hash is not None:
+            terraform_commits = commits_after(terraform_commits, last_commit_hash)
+        repository = Repository(repo_path, only_commits=terraform_commits)
+
+        # Read the commits ahead and prepare their .tf revisions in parallel, while the tracking below follows the commit order
+        pipeline = RevisionPipeline(repository, detector, (terrametrics_worker, block_cache, scratch_space.get_path()), args.analysis_workers, args.pipeline_depth, make_block_cache, isinstance(detector, MemoizedDetector))
+
+        # Iterate through commits and modified files
+        for commit in pipeline:
+            commit_inst=Commit(commit.hash,Project_inst, commit.msg, commit.committer_email, commit.committer_date)
+            for modified_file in commit.modified_files:
+                #comments and blocks prepared by the pipeline
+                extracted_comments = modified_file.extracted_comments
+                number_lines = modified_file.number_lines
+                block_analysis = modified_file.block_analysis
+                file_instance = None
 
-    
-                #choose detection type
-                if(detect_type==1):
-                    detector=KeywordList1Detector()
-                elif(detect_type==2):
-                    detector=KeywordList2Detector()
-                elif(detect_type==3):
-                    detector=KeywordListsDetector()
-                elif(detect_type==4):
-                    detector=MLModelDetector()
-                else:
-                    raise ValueError("Invalid detector type")
-                
                 if modified_file.change_type.name == 'ADD':
 
                     # Modify the file instance in the satdCommentList
@@ -82,11 +192,11 @@ def main():
                         # Call the detect method of the selected detector
                         satd_comments = SatdCommentList()
 
-                        satd_comments.create_satd_comments_from_list(detector.detect(extracted_comments), file_instance)
+                        satd_comments.create_satd_comments_from_list(detector.detect_revision(extracted_comments, file_instance), file_instance)
 
                         # Create instance of AddExecutor class and execute its method
                         add_executor = AddExecutor()
-                        add_executor.executeModification(file_instance, satd_comment_list, satd_comments, csv_tracked_satd_file_path, csv_comments_file_path)
+                        add_executor.executeModification(file_instance, satd_comment_list, satd_comments, tracked_satd_writer, comments_writer, block_analysis)
                     else:
                         # Modify the file instance in the satdCommentList
                         file_instance = file_list.get_file_by_new_path(modified_file.new_path)
@@ -97,11 +207,11 @@ def main():
 
                         # Call the detect method of the selected detector
                         satd_comments = SatdCommentList()
-                        satd_comments.create_satd_comments_from_list(detector.detect(extracted_comments), file_instance)
-        
+                        satd_comments.create_satd_comments_from_list(detector.detect_revision(extracted_comments, file_instance, modified_file), file_instance)
+    
                         # Create instance of ModifyExecutor class and execute its method
                         modify_executor = ModifyExecutor()
-                        modify_executor.executeModification(file_instance, satd_comment_list, satd_comments, csv_tracked_satd_file_path,file_list, csv_comments_file_path)
+                        modify_executor.executeModification(file_instance, satd_comment_list, satd_comments, tracked_satd_writer,file_list, comments_writer, block_analysis)
 
 
                 elif modified_file.change_type.name == 'MODIFY':
@@ -112,12 +222,12 @@ def main():
 
                         # Call the detect method of the selected detector
                         satd_comments = SatdCommentList()
-                        satd_comments.create_satd_comments_from_list(detector.detect(extracted_comments), file_instance)
-            
+                        satd_comments.create_satd_comments_from_list(detector.detect_revision(extracted_comments, file_instance, modified_file), file_instance)
+        
                         # Create instance of ModifyExecutor class and execute its method
                         modify_executor = ModifyExecutor()
-                        modify_executor.executeModification(file_instance, satd_comment_list, satd_comments, csv_tracked_satd_file_path,file_list, csv_comments_file_path)
-                    
+                        modify_executor.executeModification(file_instance, satd_comment_list, satd_comments, tracked_satd_writer,file_list, comments_writer, block_analysis)
+                
                     else:
                         file_instance = file_list.get_file_by_old_path(modified_file.new_path)
                         if(file_instance is not None):
@@ -126,11 +236,11 @@ def main():
 
                             # Call the detect method of the selected detector
                             satd_comments = SatdCommentList()
-                            satd_comments.create_satd_comments_from_list(detector.detect(extracted_comments), file_instance)
-                
+                            satd_comments.create_satd_comments_from_list(detector.detect_revision(extracted_comments, file_instance, modified_file), file_instance)
+            
                             # Create instance of ModifyExecutor class and execute its method
                             modify_executor = ModifyExecutor()
-                            modify_executor.executeModification(file_instance, satd_comment_list, satd_comments, csv_tracked_satd_file_path,file_list, csv_comments_file_path)
+                            modify_executor.executeModification(file_instance, satd_comment_list, satd_comments, tracked_satd_writer,file_list, comments_writer, block_analysis)
 
 
                 elif modified_file.change_type.name == 'RENAME':
@@ -141,7 +251,7 @@ def main():
                     if(file_instance is not None):
 
                         file_instance.modify_attributes(filename=modified_file.filename, source_code=modified_file.source_code, old_file_path=modified_file.old_path, new_file_path=modified_file.new_path,num_lines=number_lines,modification_type='RENAME', commit=commit_inst)
-                    
+                
                     else:
                         file_instance = File(filename=modified_file.filename, source_code=modified_file.source_code, old_file_path='', new_file_path=modified_file.new_path,num_lines=number_lines,modification_type='ADD', commit=commit_inst)
                         file_list.add_file(file_instance)
@@ -149,11 +259,11 @@ def main():
                         # Call the detect method of the selected detector
                         satd_comments = SatdCommentList()
 
-                        satd_comments.create_satd_comments_from_list(detector.detect(extracted_comments), file_instance)
+                        satd_comments.create_satd_comments_from_list(detector.detect_revision(extracted_comments, file_instance), file_instance)
 
                         # Create instance of AddExecutor class and execute its method
                         add_executor = AddExecutor()
-                        add_executor.executeModification(file_instance, satd_comment_list, satd_comments, csv_tracked_satd_file_path, csv_comments_file_path)
+                        add_executor.executeModification(file_instance, satd_comment_list, satd_comments, tracked_satd_writer, comments_writer, block_analysis)
 
 
                 elif modified_file.change_type.name == 'DELETE':
@@ -162,9 +272,12 @@ def main():
                     if(file_instance is not None):
                         file_instance.modify_attributes(filename=modified_file.filename, source_code=modified_file.source_code, old_file_path=modified_file.old_path, new_file_path=modified_file.new_path,num_lines=number_lines,modification_type='DELETE', commit=commit_inst)
 
+                    #the file has no next revision to compare with
+                    detector.forget_revision(file_instance)
+
                     # Create instance of DeleteExecutor class and execute its method
                     delete_executor = DeleteExecutor()
-                    delete_executor.executeModification(file_instance, satd_comment_list, csv_tracked_satd_file_path)
+                    delete_executor.executeModification(file_instance, satd_comment_list, tracked_satd_writer)
 
                     #delete the file from the file_list
                     file_list.remove_file_from_list(file_instance)
@@ -173,8 +286,74 @@ def main():
                 #print comments which are not satd
                 for elt in extracted_comments:
                     row = [repo_url, modified_file.old_path, modified_file.new_path,elt[0] ,elt[1],number_lines, commit_inst.get_commit_hash(), commit_inst.get_commit_msg(), commit_inst.get_developer_email(), commit_inst.get_committer_date(),0]
-                    add_line_to_csv(row, csv_comments_file_path)
-
+                    comments_writer.add_line(row)
+
+                #the revision is processed, the tracked file does not need its source code anymore
+                if file_instance is not None:
+                    file_instance.release_source()
+
+            #the rows of this commit are complete, they may now reach the csv files
+            comments_writer.checkpoint()
+            tracked_satd_writer.checkpoint()
+
+            #periodically save the tracker state with the last processed commit
+            last_commit_hash = commit.hash
+            commits_since_checkpoint += 1
+            if args.checkpoint_every and commits_since_checkpoint >= args.checkpoint_every:
+                save_checkpoint(checkpoint, Project_inst, last_commit_hash, file_list, satd_comment_list, comments_writer, tracked_satd_writer)
+                commits_since_checkpoint = 0
+    finally:
+        if pipeline is not None:
+            pipeline.stop()
+        #on a crash, only the rows of fully processed commits are written
+        if comments_writer is not None:
+            comments_writer.close()
+        if tracked_satd_writer is not None:
+            tracked_satd_writer.close()
+        if scratch_space is not None:
+            scratch_space.close()
+        if clone_dir is not None:
+            shutil.rmtree(clone_dir, ignore_errors=True)
+        #stop the JVMs and the cache connection, so a failed repository leaves nothing running in a reused pool worker
+        detector.close()
+        if terrametrics_worker is not None:
+            terrametrics_worker.close()
+        if block_cache is not None:
+            block_cache.close()
+
+    #the traversal completed, there is nothing left to resume
+    checkpoint.remove()
+
+    #report the statistics of the detector, the terrametrics worker and the block cache, kept after they are closed
+    if isinstance(detector, MemoizedDetector):
+        print("Memoized detection: {reused} comment verdicts reused, {detected} comments detected".format(**detector.get_stats()))
+    if isinstance(detector, KeywordDetector):
+        print("Matched keywords: " + ", ".join(f"{keyword} ({count})" for keyword, count in detector.get_keyword_counts().most_common(10)))
+    print("TerraMetrics requests: {requests} (failures: {failures}), latency mean {mean_ms:.1f} ms, median {median_ms:.1f} ms, max {max_ms:.1f} ms".format(**terrametrics_worker.latency_summary()))
+    if args.analysis_workers > 0:
+        print("TerraMetrics requests of the analysis threads: {requests} (failures: {failures}), latency mean {mean_ms:.1f} ms, median {median_ms:.1f} ms, max {max_ms:.1f} ms".format(**pipeline.latency_summary()))
+    if block_cache is not None:
+        print("TerraMetrics block cache: {hits} hits, {misses} misses, {evictions} evictions".format(**block_cache.get_stats()))
+        if args.analysis_workers > 0:
+            print("TerraMetrics block cache of the analysis threads: {hits} hits, {misses} misses, {evictions} evictions".format(**pipeline.get_cache_stats()))
+
+    return csv_comments_file_path, csv_tracked_satd_file_path
+
+
+def record_repository_results(repo_url, csv_comments_file_path, csv_tracked_satd_file_path, satd_store=None):
+    """
+    Inserts the results of a mined repository in the satd data and the details of all projects.
+
+    With a SatdStore, the csv files are loaded in it and the satd data and projects details are
+    computed by its queries instead of reading the csv files.
+    """
+    if satd_store is not None:
+        satd_store.load_repository(repo_url, csv_comments_file_path, csv_tracked_satd_file_path)
+        append_rows_to_satd_data_all_projects(satd_store.get_satd_lifecycles(repo_url))
+        counters = satd_store.get_project_counters(repo_url)
+        add_row_to_projects_details(projects_details_row(repo_url, counters['num_comments'], counters['num_satd_comments'], counters['num_diff_satd'],
+                                                         counters['adressed'], counters['not_yet_adressed'], counters['file_deleted']))
+        return
 
     #count the number of comments
     num_comments = count_csv_rows(csv_comments_file_path)-1
@@ -182,16 +361,9 @@ def main():
     #count the number of satd comments
     num_satd_comments = count_csv_rows(csv_tracked_satd_file_path)-1
 
-    #count the percentage
-    if(num_comments!=0):
-        percentage=num_satd_comments/num_comments*100
-    else:
-        percentage=0
-
-    #extract and count the different satd comments in the file
-    diff_Satd_IDs=extract_IDs_Satd_Comments(csv_tracked_satd_file_path)
-    num_diff_Satd=len(diff_Satd_IDs)
-
+    #aggregate every satd comment of the file in one read and insert its data
+    satd_types=add_rows_to_satd_data_all_projects(csv_tracked_satd_file_path)
+    num_diff_Satd=len(satd_types)
 
     #count the adressed satd comments
     adressed_satd_counter=0
@@ -200,9 +372,7 @@ def main():
     #count the satd where its satd get removed
     satd_file_deleted=0
 
-    #for each ID insert its data in the file
-    for elt in diff_Satd_IDs:
-        satd_type=add_row_to_satd_data_all_projects(csv_tracked_satd_file_path, elt)
+    for satd_type in satd_types.values():
 
         #handle
         if(satd_type==0):
@@ -214,9 +384,33 @@ def main():
 
 
     #insert into the projects details 
-    row=[repo_url, num_comments, num_satd_comments, '{:.3f} %'.format(percentage), num_diff_Satd, adressed_satd_counter, not_yet_adressed_satd_counter, satd_file_deleted]
-    add_row_to_projects_details(row)
+    add_row_to_projects_details(projects_details_row(repo_url, num_comments, num_satd_comments, num_diff_Satd, adressed_satd_counter, not_yet_adressed_satd_counter, satd_file_deleted))
+
+
+def projects_details_row(repo_url, num_comments, num_satd_comments, num_diff_Satd, adressed_satd_counter, not_yet_adressed_satd_counter, satd_file_deleted):
+    #count the percentage
+    if(num_comments!=0):
+        percentage=num_satd_comments/num_comments*100
+    else:
+        percentage=0
+
+    return [repo_url, num_comments, num_satd_comments, '{:.3f} %'.format(percentage), num_diff_Satd, adressed_satd_counter, not_yet_adressed_satd_counter, satd_file_deleted]
+
+
+# Main function
+def main():
+
+    args = parse_arguments()
+    repo_url = args.repo_url
+
+    csv_comments_file_path, csv_tracked_satd_file_path = mine_repository(repo_url, args.detect_type, args)
 
+    satd_store = SatdStore(args.satd_store) if args.satd_store else None
+    try:
+        record_repository_results(repo_url, csv_comments_file_path, csv_tracked_satd_file_path, satd_store)
+    finally:
+        if satd_store is not None:
+            satd_store.close()
 
     print("whole process ended with success state")
 
@@ -0,0 +1,85 @@
+
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from imports import parse_batch_arguments
+from main import mine_repository, record_repository_results
+from DataManagment.MiningLedger import MiningLedger
+from DataManagment.SatdStore import SatdStore
+from extract_satd_dataset.extract_conc_data import remove_repository_from_all_projects
+
+
+def read_repo_urls(repos_csv):
+    """
+    Reads the URLs of the repositories to mine, in file order and without duplicates.
+
+    The CSV gives either a 'repo_url' column or, like data_statistics/terraform_based_repos.csv,
+    a 'repo_full_name' column holding the owner/name of a GitHub repository.
+    """
+    repo_urls = {}
+    with open(repos_csv, newline='') as csvfile:
+        for row in csv.DictReader(csvfile):
+            if row.get('repo_url'):
+                repo_urls[row['repo_url']] = None
+            elif row.get('repo_full_name'):
+                repo_urls[f"https://github.com/{row['repo_full_name']}"] = None
+    return list(repo_urls)
+
+
+def merge_results(ledger, repo_url, csv_comments_file_path, csv_tracked_satd_file_path, satd_store=None, resumed=False):
+    # Only the parent process writes the data of all projects, one repository at a time
+    if resumed:
+        # The merge may have been interrupted after appending some of the rows of the repository
+        remove_repository_from_all_projects(repo_url)
+    record_repository_results(repo_url, csv_comments_file_path, csv_tracked_satd_file_path, satd_store)
+    ledger.record(repo_url, MiningLedger.DONE, csv_comments_file_path, csv_tracked_satd_file_path)
+    print(f"{repo_url} merged")
+
+
+# Main function
+def main():
+
+    args = parse_batch_arguments()
+
+    os.makedirs('Data', exist_ok=True)
+    ledger = MiningLedger(args.ledger)
+    satd_store = SatdStore(args.satd_store) if args.satd_store else None
+
+    #resume: skip the merged repos and merge the ones mined before the interruption
+    repo_urls_to_mine = []
+    for repo_url in read_repo_urls(args.repos_csv):
+        status = ledger.get_status(repo_url)
+        if status == MiningLedger.DONE:
+            continue
+        if status == MiningLedger.MINED:
+            entry = ledger.get_entry(repo_url)
+            merge_results(ledger, repo_url, entry['Comments Csv'], entry['Tracked Satd Csv'], satd_store, resumed=True)
+            continue
+        repo_urls_to_mine.append(repo_url)
+
+    print(f"{len(repo_urls_to_mine)} repos to mine")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        #each run writes its TerraMetrics temporary files in its own scratch directory
+        futures = {executor.submit(mine_repository, repo_url, args.detect_type, args): repo_url for repo_url in repo_urls_to_mine}
+
+        for future in as_completed(futures):
+            repo_url = futures[future]
+            try:
+                csv_comments_file_path, csv_tracked_satd_file_path = future.result()
+            except Exception as e:
+                print(f"{repo_url} failed: {e}")
+                ledger.record(repo_url, MiningLedger.FAILED, message=str(e))
+                continue
+
+            ledger.record(repo_url, MiningLedger.MINED, csv_comments_file_path, csv_tracked_satd_file_path)
+            merge_results(ledger, repo_url, csv_comments_file_path, csv_tracked_satd_file_path, satd_store)
+
+    if satd_store is not None:
+        satd_store.close()
+
+    print("whole batch ended")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import os
+import queue
+import threading
+from CommentsMining.CommentExtractor import extract_comments
+from DataManagment.Utils import count_lines
+from terrametrics_dependency.block_analysis import BlockAnalysis
+from terrametrics_dependency.terrametrics_worker import TerraMetricsWorker, summarize_latencies
+
+
+class RevisionSnapshot:
+    """
+    A .tf modification of a commit, detached from PyDriller and prepared for the tracker.
+
+    It holds the ModifiedFile attributes read by the tracker and the detectors, together with the
+    parts of the analysis that do not depend on the tracking state: the extracted comments, the
+    number of lines and the TerraMetrics block analysis.
+    """
+
+    def __init__(self, modified_file, with_diff=False):
+        self.filename = modified_file.filename
+        self.old_path = modified_file.old_path
+        self.new_path = modified_file.new_path
+        self.change_type = modified_file.change_type
+        self.source_code = modified_file.source_code
+        # Only the memoized detector reads the diff, skip parsing it otherwise
+        self.diff_parsed = modified_file.diff_parsed if with_diff else None
+        self.extracted_comments = []
+        self.number_lines = 0
+        self.block_analysis = None
+        self.error = None
+        self.ready = threading.Event()
+
+    def prepare(self, detector, tracker_context, analysis_context=None):
+        """
+        Extracts the comments of the revision and sets up its block analysis.
+
+        Args:
+            detector (SATDDetector): The detector of the run, only asked whether it may find SATD comments.
+            tracker_context (tuple): The (worker, cache, scratch_dir) used by the tracker thread for lazy block analyses.
+            analysis_context (tuple): The (worker, cache, scratch_dir) of the calling analysis thread, if any.
+        """
+        #extract all comments
+        if not(self.source_code=='' or self.source_code is None):
+            self.extracted_comments = extract_comments(self.source_code)
+            self.number_lines = count_lines(self.source_code)
+
+        if analysis_context is not None and detector.may_detect(self.extracted_comments):
+            # Analyze ahead the revisions likely to hold satd comments
+            self.block_analysis = BlockAnalysis(self.source_code, *analysis_context)
+            self.block_analysis.analyze()
+        else:
+            #blocks of this revision, analyzed by the tracker only if one of its satd comments needs them
+            self.block_analysis = BlockAnalysis(self.source_code, *tracker_context)
+
+
+class CommitSnapshot:
+    """
+    A commit with its .tf modifications, detached from PyDriller.
+    """
+
+    def __init__(self, commit, modified_files):
+        self.hash = commit.hash
+        self.msg = commit.msg
+        self.committer_email = commit.committer.email
+        self.committer_date = commit.committer_date
+        self.modified_files = modified_files
+
+
+class RevisionPipeline:
+    """
+    Traverses a repository and prepares its .tf revisions ahead of the SATD tracker.
+
+    The pipeline has three stages: a reader thread traversing the commits with PyDriller, a pool of
+    analysis threads extracting the comments and running the TerraMetrics block analysis of each
+    revision, and the tracker iterating over the pipeline. The tracker receives the commits in
+    traversal order, once all their revisions are prepared, so only the preparation runs out of
+    order. Each analysis thread owns its TerraMetrics worker, block cache connection and scratch
+    directory. The queues between the stages hold at most `queue_size` commits and revisions.
+
+    Without analysis threads, the revisions of each commit are prepared by the tracker when it
+    reaches the commit, as a plain traversal would.
+
+    Attributes:
+        repository (Repository): The PyDriller repository to traverse.
+        detector (SATDDetector): The detector of the run.
+        tracker_context (tuple): The (worker, cache, scratch_dir) of the tracker thread.
+        num_workers (int): The number of analysis threads.
+        queue_size (int): The capacity of the queues between the stages.
+        make_block_cache (callable): Opens a block cache connection for an analysis thread, or None without cache.
+        with_diff (bool): Keep the parsed diff of the revisions, needed by the memoized detector.
+    """
+
+    def __init__(self, repository, detector, tracker_context, num_workers=0, queue_size=64, make_block_cache=None, with_diff=False):
+        self.repository = repository
+        self.detector = detector
+        self.tracker_context = tracker_context
+        self.num_workers = num_workers
+        self.queue_size = queue_size
+        self.make_block_cache = make_block_cache
+        self.with_diff = with_diff
+        self.commits = queue.Queue(maxsize=queue_size)
+        self.revisions = queue.Queue(maxsize=queue_size)
+        self.stopped = threading.Event()
+        self.threads = []
+        self.latencies = []
+        self.failures = 0
+        self.cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self.stats_lock = threading.Lock()
+
+    def read_commits(self):
+        for commit in self.repository.traverse_commits():
+            modified_files = [RevisionSnapshot(modified_file, self.with_diff) for modified_file in commit.modified_files if modified_file.filename.endswith('.tf')]
+            yield CommitSnapshot(commit, modified_files)
+
+    def __iter__(self):
+        if self.num_workers <= 0:
+            for commit in self.read_commits():
+                for revision in commit.modified_files:
+                    revision.prepare(self.detector, self.tracker_context)
+                yield commit
+            return
+
+        self.start()
+        try:
+            while True:
+                commit = self.commits.get()
+                if commit is None:
+                    break
+                if isinstance(commit, BaseException):
+                    raise commit
+                for revision in commit.modified_files:
+                    revision.ready.wait()
+                    if revision.error is not None:
+                        raise revision.error
+                yield commit
+        finally:
+            self.stop()
+
+    def start(self):
+        self.threads = [threading.Thread(target=self.read, name="revision-reader", daemon=True)]
+        for index in range(self.num_workers):
+            self.threads.append(threading.Thread(target=self.analyze, args=(index,), name=f"revision-analysis-{index}", daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        """
+        Stops the reader and analysis threads, e.g. when the tracker fails, and waits for them.
+        """
+        self.stopped.set()
+        for thread in self.threads:
+            thread.join()
+
+    def put(self, items, item):
+        # Wait for room in the queue, unless the tracker stopped the pipeline
+        while not self.stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def get(self, items):
+        while not self.stopped.is_set():
+            try:
+                return items.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+
+    def read(self):
+        try:
+            for commit in self.read_commits():
+                # The revisions are queued for analysis before their commit reaches the tracker
+                for revision in commit.modified_files:
+                    if not self.put(self.revisions, revision):
+                        return
+                if not self.put(self.commits, commit):
+                    return
+        except Exception as e:
+            self.put(self.commits, e)
+        else:
+            self.put(self.commits, None)
+        finally:
+            for _ in range(self.num_workers):
+                self.put(self.revisions, None)
+
+    def analyze(self, index):
+        worker = TerraMetricsWorker()
+        cache = None
+        setup_error = None
+        try:
+            if self.make_block_cache is not None:
+                cache = self.make_block_cache()
+            scratch_dir = os.path.join(self.tracker_context[2], f"analysis_{index}")
+            os.makedirs(scratch_dir, exist_ok=True)
+        except Exception as e:
+            # Keep serving the queue, so the tracker gets the error instead of waiting forever
+            setup_error = e
+
+        try:
+            while True:
+                revision = self.get(self.revisions)
+                if revision is None:
+                    break
+                try:
+                    if setup_error is not None:
+                        raise setup_error
+                    revision.prepare(self.detector, self.tracker_context, (worker, cache, scratch_dir))
+                except Exception as e:
+                    revision.error = e
+                revision.ready.set()
+        finally:
+            worker.close()
+            with self.stats_lock:
+                self.latencies.extend(worker.get_latencies())
+                self.failures += worker.failures
+                if cache is not None:
+                    for key, value in cache.get_stats().items():
+                        self.cache_stats[key] += value
+            if cache is not None:
+                cache.close()
+
+    def latency_summary(self):
+        """
+        Summarizes the latencies of the TerraMetrics requests sent by the analysis threads.
+        """
+        return summarize_latencies(self.latencies, self.failures)
+
+    def get_cache_stats(self):
+        return self.cache_stats
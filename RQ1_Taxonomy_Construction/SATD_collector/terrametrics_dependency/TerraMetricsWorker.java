@@ -0,0 +1,51 @@
+import java.io.BufferedReader;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.nio.charset.StandardCharsets;
+import java.util.jar.Attributes;
+import java.util.jar.JarFile;
+
+/**
+ * Long-lived TerraMetrics worker.
+ *
+ * Launched once per mining run with the TerraMetrics jar on the class path
+ * (java -cp terrametrics_2.0.2.jar TerraMetricsWorker.java terrametrics_2.0.2.jar).
+ * Each line read on stdin holds the tab-separated arguments of one TerraMetrics
+ * invocation (e.g. "--file\ttmp.tf\t--target\tresults.json\t-b"); the worker
+ * answers with a single "OK <millis>" or "ERR <message>" line. "/exit" stops it.
+ */
+public class TerraMetricsWorker {
+
+    public static void main(String[] args) throws Exception {
+        String mainClassName;
+        try (JarFile jar = new JarFile(args[0])) {
+            mainClassName = jar.getManifest().getMainAttributes().getValue(Attributes.Name.MAIN_CLASS);
+        }
+        Method entryPoint = Class.forName(mainClassName).getMethod("main", String[].class);
+
+        // Keep the tool's own prints out of the protocol channel
+        PrintStream protocol = new PrintStream(System.out, true, "UTF-8");
+        System.setOut(System.err);
+
+        BufferedReader requests = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        protocol.println("READY");
+
+        String line;
+        while ((line = requests.readLine()) != null) {
+            if (line.equals("/exit")) {
+                break;
+            }
+            long start = System.nanoTime();
+            try {
+                entryPoint.invoke(null, (Object) line.split("\t"));
+                protocol.println("OK " + (System.nanoTime() - start) / 1_000_000);
+            } catch (InvocationTargetException e) {
+                protocol.println("ERR " + String.valueOf(e.getCause()).replace('\n', ' '));
+            } catch (Exception e) {
+                protocol.println("ERR " + String.valueOf(e).replace('\n', ' '));
+            }
+        }
+    }
+}
@@ -0,0 +1,131 @@
+import bisect
+import io
+import json
+
+from RQ1_Taxonomy_Construction.SATD_collector.terrametrics_dependency.block_cache import blob_hash
+from RQ1_Taxonomy_Construction.SATD_collector.terrametrics_dependency.terrametrics_loader import TerraMetricsLoader
+from RQ1_Taxonomy_Construction.SATD_collector.terrametrics_dependency.utils import tmp_file_path, write_to_file
+
+
+class BlockAnalysis:
+    """
+    TerraMetrics block positions of one file revision, shared by all of its SATD comments.
+
+    The revision is written to the temporary file and analyzed by TerraMetrics at most once,
+    on the first lookup, so revisions without SATD comments never reach TerraMetrics.
+
+    Attributes:
+        source_code (str): The source code of the analyzed revision, released once analyzed.
+        worker (TerraMetricsWorker): The shared TerraMetrics worker, or None to launch one JVM per analysis.
+        cache (BlockCache): The content-addressed cache consulted before running TerraMetrics, if any.
+        scratch_dir (str): The directory of the temporary file and TerraMetrics results, the shared default paths if None.
+        blocks (list): The TerraMetrics block elements holding 'start_block', 'end_block' and 'block', in report order.
+        max_end_blocks (list): The running maximum of 'end_block' over `blocks`, used as the interval index.
+        blocks_by_identifiers (dict): The first block element reported for each 'block_identifiers' value.
+    """
+
+    def __init__(self, source_code, worker=None, cache=None, scratch_dir=None):
+        self.source_code = source_code
+        self.worker = worker
+        self.cache = cache
+        self.scratch_dir = scratch_dir
+        self.blocks = None
+        self.max_end_blocks = []
+        self.blocks_by_identifiers = {}
+        self.lines = None
+
+    def analyze(self):
+        """
+        Runs TerraMetrics on the revision and indexes its blocks, unless already done.
+        """
+        if self.blocks is not None:
+            return
+
+        self.blocks = []
+        self.lines = io.StringIO(self.source_code or '', newline=None).readlines()
+
+        results = None
+        if self.cache is not None:
+            content_hash = blob_hash(self.source_code)
+            results = self.cache.get(content_hash)
+
+        if results is None:
+            #terrametrics integration
+            write_to_file(self.source_code or '', self.scratch_dir)
+            terrametrics_instance = TerraMetricsLoader(pathToLocalEmp=tmp_file_path(self.scratch_dir), worker=self.worker, scratch_dir=self.scratch_dir)
+            results = terrametrics_instance.call_service_locator()
+
+            if self.cache is not None and isinstance(results, dict):
+                self.cache.put(content_hash, results)
+
+        # The lines of the revision are kept for extract_code, its source code is no longer needed
+        self.source_code = None
+
+        if not isinstance(results, dict) or not isinstance(results.get('data'), list):
+            print("'data' key not found in the JSON object or it's not a list")
+            return
+
+        self.index_blocks(results['data'])
+
+    def index_blocks(self, elements):
+        """
+        Builds the lookup structures over the TerraMetrics block elements.
+
+        Args:
+            elements (list): The 'data' list of the TerraMetrics results.
+        """
+        max_end_block = None
+        for element in elements:
+            if 'block_identifiers' in element:
+                self.blocks_by_identifiers.setdefault(identifiers_key(element['block_identifiers']), element)
+
+            if 'end_block' in element and 'start_block' in element and 'block' in element:
+                if max_end_block is None or element['end_block'] > max_end_block:
+                    max_end_block = element['end_block']
+                self.blocks.append(element)
+                self.max_end_blocks.append(max_end_block)
+
+    def find_block(self, comment_line):
+        """
+        Returns the block associated to a comment line.
+
+        Like a scan of the TerraMetrics report, the associated block is the first reported block
+        ending at or after the comment line. The running maximum of the end lines is sorted, so the
+        first position where it reaches the comment line is that block, found by bisection.
+
+        Args:
+            comment_line (int): The line of the comment in the revision.
+
+        Returns:
+            The TerraMetrics block element, or -1 if no block follows the comment.
+        """
+        self.analyze()
+        position = bisect.bisect_left(self.max_end_blocks, comment_line)
+        if position < len(self.blocks):
+            return self.blocks[position]
+        return -1
+
+    def find_block_by_identifiers(self, block_identifiers):
+        """
+        Returns the block of the revision having the given identifiers.
+
+        Args:
+            block_identifiers: The 'block_identifiers' value of a previously associated block.
+
+        Returns:
+            The TerraMetrics block element, or -1 if the block no longer exists.
+        """
+        self.analyze()
+        return self.blocks_by_identifiers.get(identifiers_key(block_identifiers), -1)
+
+    def extract_code(self, start_line, end_line):
+        """
+        Returns the source lines of the revision between two lines, both included.
+        """
+        self.analyze()
+        return ''.join(self.lines[start_line - 1:end_line])
+
+
+def identifiers_key(block_identifiers):
+    # block identifiers are lists or dicts in the TerraMetrics report, hence not hashable
+    return json.dumps(block_identifiers, sort_keys=True)
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import sqlite3
+import time
+
+
+class BlockCache:
+    """
+    On-disk cache of TerraMetrics results keyed by the content of the analyzed file.
+
+    The key is the git blob SHA-1 of the source code, so a revision that reappears in another
+    commit, branch, revert or fork is analyzed only once. Entries live in a SQLite database and
+    the least recently used ones are evicted once the cache grows beyond `max_size_bytes`.
+
+    Every process and analysis thread of a run opens its own connection to the same database, so
+    it runs in WAL mode, a hit only writes its access time with the next batch of hits, and the
+    total size is kept in a single row updated by each write instead of being summed.
+
+    Attributes:
+        db_path (str): The path to the SQLite database holding the cache.
+        max_size_bytes (int): The maximum total size of the cached results, or None for no bound.
+        access_batch_size (int): The number of hits whose access times are written together.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that required a TerraMetrics analysis.
+        evictions (int): The number of entries removed to respect the size bound.
+    """
+
+    def __init__(self, db_path="terrametrics_dependency/block_cache.sqlite", max_size_bytes=512 * 1024 * 1024, access_batch_size=256):
+        self.db_path = db_path
+        self.max_size_bytes = max_size_bytes
+        self.access_batch_size = access_batch_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Last access time of the entries read since the last write, written in one transaction
+        self.pending_accesses = {}
+        # Transactions are opened explicitly, so each write holds the database lock once
+        self.connection = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        # Readers of every process and thread keep going while one of them writes
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("BEGIN IMMEDIATE")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS blocks ("
+            "blob_hash TEXT PRIMARY KEY, results TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS blocks_last_access ON blocks (last_access)")
+        # Total size of the entries, kept up to date by every write instead of summed on each put
+        self.connection.execute("CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), total_size INTEGER NOT NULL)")
+        self.connection.execute("INSERT OR IGNORE INTO cache_size (id, total_size) SELECT 0, COALESCE(SUM(size), 0) FROM blocks")
+        self.connection.execute("COMMIT")
+
+    def get(self, blob_hash):
+        """
+        Returns the cached TerraMetrics results of a file content.
+
+        The access time of a hit is only written with the next `access_batch_size` hits or put.
+
+        Args:
+            blob_hash (str): The blob hash of the file content, see `blob_hash`.
+
+        Returns:
+            The parsed TerraMetrics results, or None on a cache miss.
+        """
+        row = self.connection.execute("SELECT results FROM blocks WHERE blob_hash = ?", (blob_hash,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.pending_accesses[blob_hash] = time.time()
+        if len(self.pending_accesses) >= self.access_batch_size:
+            self.flush_accesses()
+        return json.loads(row[0])
+
+    def put(self, blob_hash, results):
+        """
+        Stores the TerraMetrics results of a file content, then evicts entries over the size bound.
+
+        Args:
+            blob_hash (str): The blob hash of the file content, see `blob_hash`.
+            results (dict): The parsed TerraMetrics results.
+        """
+        serialized = json.dumps(results)
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.write_accesses()
+            replaced = self.connection.execute("SELECT size FROM blocks WHERE blob_hash = ?", (blob_hash,)).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO blocks (blob_hash, results, size, last_access) VALUES (?, ?, ?, ?)",
+                (blob_hash, serialized, len(serialized), time.time())
+            )
+            self.add_size(len(serialized) - (replaced[0] if replaced else 0))
+            self.evict()
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+
+    def flush_accesses(self):
+        if not self.pending_accesses:
+            return
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.write_accesses()
+            self.connection.execute("COMMIT")
+        except Exception:
+            self.connection.execute("ROLLBACK")
+            raise
+
+    def write_accesses(self):
+        # Within a transaction: write the access times of the hits since the last write
+        if not self.pending_accesses:
+            return
+        self.connection.executemany("UPDATE blocks SET last_access = ? WHERE blob_hash = ?",
+                                    [(access, blob_hash) for blob_hash, access in self.pending_accesses.items()])
+        self.pending_accesses = {}
+
+    def add_size(self, delta):
+        self.connection.execute("UPDATE cache_size SET total_size = total_size + ? WHERE id = 0", (delta,))
+
+    def evict(self):
+        # Within a transaction: drop the least recently used entries until the cache fits in its size bound
+        if self.max_size_bytes is None:
+            return
+        total_size = self.connection.execute("SELECT total_size FROM cache_size WHERE id = 0").fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return
+
+        for stored_hash, size in self.connection.execute("SELECT blob_hash, size FROM blocks ORDER BY last_access").fetchall():
+            self.connection.execute("DELETE FROM blocks WHERE blob_hash = ?", (stored_hash,))
+            self.add_size(-size)
+            self.evictions += 1
+            total_size -= size
+            if total_size <= self.max_size_bytes:
+                break
+
+    def get_stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def close(self):
+        self.flush_accesses()
+        self.connection.close()
+
+
+def blob_hash(source_code):
+    """
+    Computes the git blob SHA-1 of a source code, the identifier git gives to the same content.
+    """
+    content = (source_code or '').encode('utf-8')
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+
+
+class ScratchSpace:
+    """
+    Private directory holding the TerraMetrics temporary files of one mining run or worker.
+
+    Every run writes the analyzed revision and reads the TerraMetrics results in its own
+    directory, so several collectors can share a host without overwriting each other's files.
+    On tmpfs (`/dev/shm`) these short-lived files never reach the disk.
+
+    Attributes:
+        path (str): The absolute path to the scratch directory.
+    """
+
+    tmpfs_dir = "/dev/shm"
+
+    def __init__(self, base_dir=None, tmpfs=False):
+        """
+        Creates a new empty scratch directory.
+
+        Args:
+            base_dir (str): The directory to create the scratch directory in, the system temporary directory if None.
+            tmpfs (bool): Create it on tmpfs instead of `base_dir` when the host provides one.
+        """
+        if tmpfs:
+            if os.path.isdir(self.tmpfs_dir):
+                base_dir = self.tmpfs_dir
+            else:
+                print(f"{self.tmpfs_dir} not found, the scratch directory stays on disk")
+        if base_dir is not None:
+            os.makedirs(base_dir, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix="terrametrics_", dir=base_dir)
+
+    def get_path(self):
+        return self.path
+
+    def close(self):
+        """
+        Removes the scratch directory and its files.
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
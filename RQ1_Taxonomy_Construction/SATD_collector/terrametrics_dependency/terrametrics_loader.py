@@ -2,6 +2,7 @@ import json
 import os
 import subprocess
 from pydriller import ModifiedFile
+from RQ1_Taxonomy_Construction.SATD_collector.terrametrics_dependency.utils import results_file_path
 #from tmp_file_code import tmp,terrametrics
 
 
@@ -17,21 +18,30 @@ class TerraMetricsLoader:
         service_locator_jar_path (str): The path to the Java JAR file that performs the analysis.
         tmp_blob_path_before_change (str): The path to a temporary file containing the code before changes.
         tmp_blob_path_after_change (str): The path to a temporary file containing the code after changes.
+        worker (TerraMetricsWorker): An optional long-lived TerraMetrics process used instead of one JVM per call.
+        scratch_dir (str): An optional directory receiving the results instead of the resource folder.
     """
 
     # def __init__(self, mod: ModifiedFile, pathToLocalEmp=None):
-    def __init__(self, pathToLocalEmp=None):
+    def __init__(self, pathToLocalEmp=None, worker=None, scratch_dir=None):
         """
         Initializes the TerraMetricsLoader with a modified file.
 
         Args: mod (ModifiedFile): The modified file to be analyzed.
+              worker (TerraMetricsWorker): The shared worker to send the analysis to, if any.
+              scratch_dir (str): The directory to write the results to, so concurrent runs do not share them.
         """
         #print(pathToLocalEmp)
         self.positions = {}
         self.resourceFolder = "./"
-        self.target = self.resourceFolder + "terrametrics_results.json"
+        self.scratch_dir = scratch_dir
+        if scratch_dir is None:
+            self.target = self.resourceFolder + "terrametrics_results.json"
+        else:
+            self.target = results_file_path(scratch_dir)
         self.service_locator_jar_path = self.resourceFolder + "/terrametrics_2.0.2.jar"
         self.pathToLocalEmp = pathToLocalEmp
+        self.worker = worker
         #self.modelName = modelName
         #self.commit_hash = commit_hash
 
@@ -48,6 +58,12 @@ class TerraMetricsLoader:
         if self.pathToLocalEmp is None:
             return None
 
+        if self.worker is not None:
+            tool_args, args = self.prepareArguments()
+            if not self.worker.run(tool_args):
+                return None
+            return self.getJsonObjects(args["target"])
+
         command, args = self.prepareCommand()
 
         try:
@@ -90,6 +106,26 @@ class TerraMetricsLoader:
             print("Error decoding JSON:", e)
             return None
 
+    def prepareArguments(self):
+        """
+        Prepares the arguments passed to the Java service, without the java launcher itself.
+
+        Returns:
+            A tuple containing the argument list and the arguments dictionary.
+        """
+
+        args = { "file": self.pathToLocalEmp, "target": self.target}
+
+        tool_args = []
+        for arg, value in args.items():
+            tool_args.append(f"--{arg}")
+            tool_args.append(value)
+
+        # Include block positions in the analysis
+        tool_args.append("-b")
+
+        return tool_args, args
+
     def prepareCommand(self):
         """
         Prepares the command to invoke the Java service with the necessary arguments.
@@ -101,16 +137,9 @@ class TerraMetricsLoader:
             A tuple containing the command list to be executed and the arguments dictionary.
         """
 
-        args = { "file": self.pathToLocalEmp, "target": self.target}
+        tool_args, args = self.prepareArguments()
 
-        command = ['java', '-jar', self.service_locator_jar_path]
-
-        for arg, value in args.items():
-            command.append(f"--{arg}")
-            command.append(value)
-
-        # Include block positions in the analysis
-        command.append("-b")
+        command = ['java', '-jar', self.service_locator_jar_path] + tool_args
 
         return command, args
 
@@ -0,0 +1,145 @@
+import subprocess
+import time
+from pathlib import Path
+
+
+class TerraMetricsWorker:
+    """
+    Client for a long-lived TerraMetrics JVM shared by a whole mining run.
+
+    Instead of paying the JVM start-up for every analyzed file, the worker keeps one
+    `TerraMetricsWorker.java` process alive and sends it one request per line on stdin.
+
+    Attributes:
+        service_locator_jar_path (str): The path to the TerraMetrics JAR file.
+        worker_source_path (str): The path to the Java worker launched in source-file mode.
+        process (subprocess.Popen): The running JVM, or None when the worker is not started.
+        latencies (list): Wall-clock duration in seconds of every request sent to the worker.
+        failures (int): The number of requests that did not produce results.
+    """
+
+    def __init__(self, service_locator_jar_path="./terrametrics_2.0.2.jar", java_command="java"):
+        """
+        Initializes the worker client without starting the JVM.
+
+        Args:
+            service_locator_jar_path (str): The path to the TerraMetrics JAR file.
+            java_command (str): The java executable to launch.
+        """
+        self.service_locator_jar_path = service_locator_jar_path
+        self.java_command = java_command
+        self.worker_source_path = str(Path(__file__).resolve().parent / "TerraMetricsWorker.java")
+        self.process = None
+        self.latencies = []
+        self.failures = 0
+
+    def start(self):
+        """
+        Launches the JVM and waits until the worker announces it is ready.
+
+        Returns:
+            True if the worker is ready to accept requests, False otherwise.
+        """
+        command = [self.java_command, "-cp", self.service_locator_jar_path, self.worker_source_path, self.service_locator_jar_path]
+        try:
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1)
+        except OSError as e:
+            print("Error starting TerraMetrics worker:", e)
+            self.process = None
+            return False
+
+        if self.process.stdout.readline().strip() != "READY":
+            self.close()
+            return False
+        return True
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def run(self, tool_args):
+        """
+        Runs one TerraMetrics analysis inside the worker.
+
+        The worker is (re)started on demand, so a JVM that exited during a previous
+        request is transparently replaced and the request is tried once more.
+
+        Args:
+            tool_args (list): The command-line arguments TerraMetrics would receive.
+
+        Returns:
+            True if TerraMetrics completed the analysis, False otherwise.
+        """
+        start = time.perf_counter()
+        for _ in range(2):
+            if not self.is_alive() and not self.start():
+                break
+            try:
+                self.process.stdin.write("\t".join(tool_args) + "\n")
+                self.process.stdin.flush()
+                response = self.process.stdout.readline()
+            except (BrokenPipeError, OSError):
+                response = ""
+
+            if response.startswith("OK"):
+                self.latencies.append(time.perf_counter() - start)
+                return True
+            if response.startswith("ERR"):
+                print("TerraMetrics error:", response[4:].strip())
+                break
+            # Empty response: the JVM died mid-request, restart it and retry
+            self.close()
+
+        self.latencies.append(time.perf_counter() - start)
+        self.failures += 1
+        return False
+
+    def close(self):
+        """
+        Stops the worker JVM if it is running.
+        """
+        if self.process is None:
+            return
+        try:
+            if self.process.poll() is None:
+                self.process.stdin.write("/exit\n")
+                self.process.stdin.flush()
+            self.process.wait(timeout=10)
+        except (BrokenPipeError, OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+        self.process = None
+
+    def get_latencies(self):
+        return self.latencies
+
+    def latency_summary(self):
+        """
+        Summarizes the per-request latencies observed so far.
+
+        Returns:
+            A dictionary with the number of requests, failures and the mean/median/max latency in milliseconds.
+        """
+        return summarize_latencies(self.latencies, self.failures)
+
+
+def summarize_latencies(latencies, failures=0):
+    """
+    Summarizes TerraMetrics request latencies, possibly pooled from several workers.
+
+    Args:
+        latencies (list): Durations of the requests in seconds.
+        failures (int): The number of requests that did not produce results.
+
+    Returns:
+        A dictionary with the number of requests, failures and the mean/median/max latency in milliseconds.
+    """
+    if not latencies:
+        return {"requests": 0, "failures": failures, "mean_ms": 0.0, "median_ms": 0.0, "max_ms": 0.0}
+
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "failures": failures,
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "median_ms": ordered[len(ordered) // 2] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
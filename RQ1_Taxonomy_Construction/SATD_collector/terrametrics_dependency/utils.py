@@ -1,8 +1,24 @@
 import json
+import os
 from pathlib import Path
 
-def write_to_file(new_content):
-    file_path = 'terrametrics_dependency/tmp.tf'
+
+def tmp_file_path(scratch_dir=None):
+    # The revision analyzed by TerraMetrics, in the scratch directory of the run if any
+    if scratch_dir is None:
+        return 'terrametrics_dependency/tmp.tf'
+    return os.path.join(scratch_dir, 'tmp.tf')
+
+
+def results_file_path(scratch_dir=None):
+    # The TerraMetrics results, in the scratch directory of the run if any
+    if scratch_dir is None:
+        return Path(__file__).resolve().parent / "terrametrics_results.json"
+    return os.path.join(scratch_dir, 'terrametrics_results.json')
+
+
+def write_to_file(new_content, scratch_dir=None):
+    file_path = tmp_file_path(scratch_dir)
     # Open the file in write mode, which clears the existing content
     with open(file_path, 'w') as file:
         # Write the new content to the file
@@ -31,13 +47,9 @@ def return_pair(comment_line):
         print("'data' key not found in the JSON object or it's not a list")'''
 
 
-def extract_associated_block(comment_line):
+def extract_associated_block(comment_line, scratch_dir=None):
     # Read the JSON file
-    # Get the project root (2 levels up from utils.py)
-    PROJECT_ROOT = Path(__file__).resolve().parent
-
-    # Build the absolute path to the JSON
-    json_path = PROJECT_ROOT / "terrametrics_results.json"
+    json_path = results_file_path(scratch_dir)
 
     with open(json_path, 'r') as file:
         data = json.load(file)
@@ -62,13 +74,9 @@ def extract_associated_block(comment_line):
 
 
 
-def extract_associated_block_from_name(block_identifiers):
+def extract_associated_block_from_name(block_identifiers, scratch_dir=None):
     # Read the JSON file
-    # Get the project root (2 levels up from utils.py)
-    PROJECT_ROOT = Path(__file__).resolve().parent
-
-    # Build the absolute path to the JSON
-    json_path = PROJECT_ROOT / "terrametrics_results.json"
+    json_path = results_file_path(scratch_dir)
 
     with open(json_path, 'r') as file:
         data = json.load(file)
@@ -96,8 +104,8 @@ def extract_associated_block_from_name(block_identifiers):
 
 
 
-def extract_code(start_line, end_line):
-    file_name = 'terrametrics_dependency/tmp.tf'
+def extract_code(start_line, end_line, scratch_dir=None):
+    file_name = tmp_file_path(scratch_dir)
     try:
         with open(file_name, 'r') as file:
             lines = file.readlines()
@@ -0,0 +1,268 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+import pandas as pd
+
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.rate_limiter import RateLimiter
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.utils import save_row_to_csv, save_row_prompt, is_retryable_error
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.prompts.prompt_zero_shot import PROMPT_COT_improved
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.prompts.prompt_few_shots import PROMPT_COT_RAG_improved
+
+# ✅ Define project root path relative to this script
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+
+MAX_RETRIES = 5
+MAX_OUTPUT_TOKENS = 80
+
+
+class ProviderBudget:
+    """
+    Concurrency cap and tokens-per-minute budget of a provider.
+
+    A budget is shared by every run of the provider (e.g. all the temperatures of a sweep), so the
+    limits hold for the provider as a whole. The blocking model calls run in a thread pool of
+    `max_concurrency` workers.
+
+    Attributes:
+        max_concurrency (int): The maximum number of requests in flight.
+        tokens_per_minute (int): The number of tokens sent per minute, None for no limit.
+    """
+
+    def __init__(self, max_concurrency=4, tokens_per_minute=None):
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        # Created in the event loop of the runs, see slot()
+        self._semaphore = None
+        self._semaphore_loop = None
+        self._token_limiter = RateLimiter(["provider"], tokens_per_window=tokens_per_minute, time_window=60)
+
+    @asynccontextmanager
+    async def slot(self, tokens=0):
+        """
+        Waits for a free request slot and for `tokens` tokens of the budget.
+        """
+        # Before Python 3.10 a semaphore is bound to the event loop current at its creation, and
+        # the budgets are built before asyncio.run starts the loop of the runs
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        async with self._semaphore:
+            await self._token_limiter.acquire_async(tokens)
+            yield
+
+    async def call(self, function, *args, tokens=0, **kwargs):
+        """
+        Runs the blocking `function` in the thread pool of the provider once a slot is free.
+        """
+        async with self.slot(tokens):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, lambda: function(*args, **kwargs))
+
+
+# 🔁 Change as needed to the limits of your accounts 🔁
+PROVIDER_BUDGETS = {
+    "chatgpt": {"max_concurrency": 16, "tokens_per_minute": 200_000},
+    "claude": {"max_concurrency": 8, "tokens_per_minute": 50_000},
+    "gemini": {"max_concurrency": 4, "tokens_per_minute": 1_000_000},
+    "deepseek": {"max_concurrency": 16, "tokens_per_minute": None},
+    "qwen": {"max_concurrency": 32, "tokens_per_minute": None},
+    "gemma": {"max_concurrency": 32, "tokens_per_minute": None},
+}
+
+
+def get_provider_budget(model_key):
+    return ProviderBudget(**PROVIDER_BUDGETS.get(model_key, {}))
+
+
+def estimate_request_tokens(row, template, num_examples=0):
+    # Rough count of ~4 characters per token, the retrieved examples being about the size of the instance
+    instance_chars = sum(len(str(row[column])) for column in ["SATD Comment", "context", "bloc of first occurrence"])
+    return (len(template) + instance_chars * (1 + num_examples)) // 4 + MAX_OUTPUT_TOKENS
+
+
+def load_completed_rows(output_path):
+    if not os.path.exists(output_path):
+        return set()
+    df_done = pd.read_csv(output_path)
+    return set(zip(df_done['Fold'], df_done['Index']))
+
+
+def sort_output(output_path):
+    """
+    Rewrites the results ordered by (Fold, Index), the rows being appended in completion order.
+    """
+    if not os.path.exists(output_path):
+        return
+    df = pd.read_csv(output_path)
+    df.sort_values(['Fold', 'Index'], kind='stable').to_csv(output_path, index=False)
+
+
+def save_prediction(output_path, fold, i, row, response, prompt, labels):
+    label_flags = [1 if f"CAT{j + 1}" in response else 0 for j in range(len(labels))]
+    predicted = [labels[j] for j, val in enumerate(label_flags) if val == 1]
+    save_row_to_csv(output_path, fold, i, row, response, prompt, label_flags, predicted, labels)
+
+
+async def _call_with_retries(budget, fold, i, function, tokens=0, **kwargs):
+    """
+    `budget.call` retried on the retryable errors with exponential backoff.
+
+    Returns:
+        The result of `function`, or None once the row is given up on and logged to failed_requests.csv.
+    """
+    for attempt in range(MAX_RETRIES):
+        try:
+            return await budget.call(function, tokens=tokens, **kwargs)
+
+        except Exception as e:
+            print(f"⚠️ Fold {fold} Row {i} Attempt {attempt + 1} Error: {e}")
+
+            if attempt == MAX_RETRIES - 1 or not is_retryable_error(e):
+                print(f"❌ Giving up on Fold {fold} Row {i}.")
+                with open("failed_requests.csv", "a") as f:
+                    error_msg = str(e).replace('"', "'")
+                    f.write(f"{fold},{i},\"{error_msg}\"\n")
+                return None
+
+            wait_time = min(2 ** attempt + 1, 60)
+            print(f"⏳ Retrying in {wait_time} seconds...")
+            await asyncio.sleep(wait_time)
+
+
+async def _classify_row(model, budget, fold, i, row, output_path, labels):
+    tokens = estimate_request_tokens(row, PROMPT_COT_improved)
+
+    response = await _call_with_retries(budget, fold, i, model.generate, comment=row["SATD Comment"], context=row["context"],
+                                        code_block=row["bloc of first occurrence"], tokens=tokens)
+    if response is None:
+        return
+
+    # Rows are written from the event loop thread only, as they complete
+    save_prediction(output_path, fold, i, row, response, "--hidden--", labels)
+    print(f"✅ Fold {fold} Row {i} processed successfully.")
+
+
+async def run_crossval_async(model, budget: ProviderBudget, folds_dir: str, output_path: str, labels: list, num_folds: int = 5):
+    """
+    Zero-shot cross-validation keeping up to `budget.max_concurrency` requests in flight.
+
+    Same outputs and resume semantics as `run_crossval_from_files`: the (Fold, Index) rows already
+    in `output_path` are skipped and the rows given up on are logged to failed_requests.csv.
+    """
+    folds_dir = os.path.join(PROJECT_ROOT, folds_dir)
+    completed = load_completed_rows(output_path)
+
+    tasks = []
+    for fold in range(num_folds):
+        test_file_path = os.path.join(folds_dir, f"stratified_cleaned_test_fold_{fold}.csv")
+        test_data = pd.read_csv(test_file_path)
+
+        print(f"\n🔁 Fold {fold} — Loaded {len(test_data)} examples from {test_file_path}")
+
+        for i, row in test_data.iterrows():
+            if (fold, i) in completed:
+                print(f"⏭️  Fold {fold} Row {i} already completed. Skipping.")
+                continue
+            tasks.append(_classify_row(model, budget, fold, i, row, output_path, labels))
+
+    await asyncio.gather(*tasks)
+    sort_output(output_path)
+
+
+async def run_rag_async(
+        model,
+        budget: ProviderBudget,
+        folds_dir: str,
+        output_path: str,
+        labels: list,
+        num_folds: int = 5,
+        default_retrieval_mode: str = "dpr",
+        only_indices=None,
+        is_prompt_generation_only=False
+):
+    """
+    Asynchronous `run_rag_from_files_new_runners`: the folds still run one after the other, as each
+    one builds its own retrieval index, but the rows of a fold are sent concurrently. The retryable
+    errors the models re-raise (rate limits, timeouts, connection errors) are retried like those of
+    `run_crossval_async` and the rows given up on are logged to failed_requests.csv; the models
+    still answer the other errors with an ERROR prediction.
+    """
+    # Imported here so the zero-shot runner does not need the retrieval dependencies
+    from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.retriever.new_rag_runner import (
+        PROJECT_ROOT as RAG_PROJECT_ROOT, _maybe_openai_kwargs, _maybe_query_vec,
+    )
+    from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.retriever.retriever_strategies.builder import make_retrieval, free_retrieval_bundle
+    from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.retriever.retrieval_engine import RetrievalEngine
+
+    folds_dir = os.path.join(RAG_PROJECT_ROOT, folds_dir)
+    retrieval_mode = getattr(model, "retrieval_mode", default_retrieval_mode)
+
+    async def process_row(train_df, engine, fold, i, row):
+        query_vec = _maybe_query_vec(engine, i, retrieval_mode)
+        tokens = 0 if is_prompt_generation_only else estimate_request_tokens(row, PROMPT_COT_RAG_improved, num_examples=2)
+
+        outcome = await _call_with_retries(
+            budget, fold, i,
+            model.rag_implementation_for_single_prompts,
+            train_data=train_df,
+            comment=row["SATD Comment"],
+            context=row["context"],
+            code_block=row["bloc of first occurrence"],
+            labels=labels,
+            retrieval_engine=engine,
+            query_vec=query_vec,
+            generate_prompt_only=is_prompt_generation_only,
+            tokens=tokens,
+        )
+        if outcome is None:
+            return
+        result, response, prompt = outcome
+
+        if is_prompt_generation_only:
+            save_row_prompt(output_path, fold, i, row, labels, prompt)
+        else:
+            save_prediction(output_path, fold, i, row, response, prompt, labels)
+        print(f"✅ Fold {fold} Row {i} processed successfully.")
+
+    for fold in range(num_folds):
+
+        # Skip folds not in the failed set
+        if only_indices and not any(f == fold for f, _ in only_indices):
+            continue
+
+        train_df = pd.read_csv(os.path.join(folds_dir, f"stratified_cleaned_train_fold_{fold}.csv"))
+        test_df = pd.read_csv(os.path.join(folds_dir, f"stratified_cleaned_test_fold_{fold}.csv"))
+
+        print('starting making retrieval')
+        retrieval = make_retrieval(retrieval_mode, train_df, **_maybe_openai_kwargs(retrieval_mode, fold))
+        engine = RetrievalEngine.from_bundle(retrieval)
+
+        await asyncio.gather(*[
+            process_row(train_df, engine, fold, i, row)
+            for i, row in test_df.iterrows()
+            if not (only_indices and (fold, i) not in only_indices)
+        ])
+
+        engine.free()
+        free_retrieval_bundle(retrieval)
+
+    sort_output(output_path)
+
+
+def run_all(*coroutines, sequential=False):
+    """
+    Runs the given runs concurrently, e.g. one per temperature of a sweep sharing a provider budget,
+    or one after the other if `sequential`, all in the same event loop.
+    """
+    async def gather():
+        if sequential:
+            for coroutine in coroutines:
+                await coroutine
+        else:
+            await asyncio.gather(*coroutines)
+
+    asyncio.run(gather())
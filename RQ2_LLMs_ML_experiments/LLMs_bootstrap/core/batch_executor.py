@@ -0,0 +1,228 @@
+import json
+import os
+import time
+
+import pandas as pd
+
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.async_executor import load_completed_rows, save_prediction, sort_output
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.response_cache import CacheMiss
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.prompts.prompt_zero_shot import PROMPT_COT_improved
+
+# ✅ Define project root path relative to this script
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+# Root the RAG runner resolves its folds against (PROJECT_ROOT of retriever/new_rag_runner.py)
+RAG_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def batch_custom_id(fold, index):
+    return f"fold{fold}-row{index}"
+
+
+def batches_path(output_path):
+    # Batch jobs submitted for the output and not collected yet, so a restarted run polls them instead of resubmitting
+    return output_path.replace(".csv", "__batches.json")
+
+
+def load_batches(output_path):
+    """
+    Returns:
+        The {"batch_id", "prompts"} of each fold's submitted job, keyed by str(fold), with the prompt of each submitted row index.
+    """
+    path = batches_path(output_path)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_batches(output_path, batches):
+    path = batches_path(output_path)
+    if not batches:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path, "w") as f:
+        json.dump(batches, f, indent=2)
+
+
+def submitted_rows(batch, test_df, completed, fold, rag=False):
+    """
+    The pending rows of a submitted job, read back by index with the prompts saved at submission,
+    so collecting the job needs neither the retrieval index nor the prompt templates.
+    """
+    rows = {}
+    for i, prompt in batch["prompts"].items():
+        i = int(i)
+        if (fold, i) in completed:
+            continue
+        rows[i] = (test_df.loc[i], prompt, prompt if rag else "--hidden--")
+    return rows
+
+
+def log_failed_request(fold, i, error):
+    print(f"❌ Giving up on Fold {fold} Row {i}: {error}")
+    with open("failed_requests.csv", "a") as f:
+        error_msg = str(error).replace('"', "'")
+        f.write(f"{fold},{i},\"{error_msg}\"\n")
+
+
+def run_batches(model, pending, output_path, labels, rag=False, wait=True, poll_interval=60):
+    """
+    Submits one batch job per fold for the pending rows, then polls the jobs and writes each fold's
+    results as its job ends, in the schema of `save_row_to_csv`. The rows answered by the response
+    cache of the model are written right away and left out of the jobs.
+
+    Args:
+        pending (dict): The {index: (row, prompt, saved prompt)} of the rows left to classify, per fold,
+            those of the folds already submitted coming from `submitted_rows()`.
+        wait (bool): False to return once the jobs are submitted; calling again later collects them.
+    """
+    batches = load_batches(output_path)
+
+    for fold in list(batches):
+        if int(fold) not in pending:
+            # Every row of the fold completed meanwhile
+            del batches[fold]
+
+    for fold in list(pending):
+        if str(fold) in batches:
+            # Already submitted, its rows are answered by the job
+            continue
+        for i, (row, prompt, saved_prompt) in list(pending[fold].items()):
+            try:
+                response = model.cache_lookup(prompt)
+            except CacheMiss as e:
+                log_failed_request(fold, i, e)
+                del pending[fold][i]
+                continue
+            if response is not None:
+                save_prediction(output_path, fold, i, row, response, saved_prompt, labels)
+                del pending[fold][i]
+        if not pending[fold]:
+            del pending[fold]
+
+    for fold, rows in pending.items():
+        if str(fold) in batches:
+            print(f"📦 Fold {fold} — Batch {batches[str(fold)]['batch_id']} already submitted.")
+            continue
+        requests = [model.batch_request(batch_custom_id(fold, i), prompt, rag=rag) for i, (row, prompt, _) in rows.items()]
+        batch_id = model.batch_client.submit(requests)
+        batches[str(fold)] = {"batch_id": batch_id, "prompts": {str(i): prompt for i, (row, prompt, _) in rows.items()}}
+        save_batches(output_path, batches)
+        print(f"📦 Fold {fold} — Submitted batch {batch_id} with {len(requests)} requests.")
+
+    save_batches(output_path, batches)
+    if not wait:
+        return
+
+    while pending:
+        for fold in list(pending):
+            batch_id = batches[str(fold)]["batch_id"]
+            if not model.batch_client.is_ended(batch_id):
+                continue
+
+            results = model.batch_client.results(batch_id)
+            for i, (row, prompt, saved_prompt) in pending[fold].items():
+                response, error = results.get(batch_custom_id(fold, i), (None, "missing from the batch results"))
+                if error is not None:
+                    log_failed_request(fold, i, error)
+                    continue
+                model.cache_store(prompt, response)
+                save_prediction(output_path, fold, i, row, response, saved_prompt, labels)
+            print(f"✅ Fold {fold} — Batch {batch_id} collected.")
+
+            del pending[fold]
+            del batches[str(fold)]
+            save_batches(output_path, batches)
+
+        if pending:
+            print(f"⏳ Waiting for {len(pending)} batches, polling again in {poll_interval} seconds...")
+            time.sleep(poll_interval)
+
+    sort_output(output_path)
+
+
+def run_crossval_batch(model, folds_dir: str, output_path: str, labels: list, num_folds: int = 5,
+                       wait: bool = True, poll_interval: int = 60):
+    """
+    Zero-shot cross-validation through the batch API of the model (ChatGPTModel, ClaudeModel,
+    OpenRouterModel), with the outputs and resume semantics of `run_crossval_from_files`.
+    """
+    folds_dir = os.path.join(PROJECT_ROOT, folds_dir)
+    completed = load_completed_rows(output_path)
+    batches = load_batches(output_path)
+
+    pending = {}
+    for fold in range(num_folds):
+        test_data = pd.read_csv(os.path.join(folds_dir, f"stratified_cleaned_test_fold_{fold}.csv"))
+        if str(fold) in batches:
+            rows = submitted_rows(batches[str(fold)], test_data, completed, fold)
+            if rows:
+                pending[fold] = rows
+            continue
+        rows = {}
+        for i, row in test_data.iterrows():
+            if (fold, i) in completed:
+                continue
+            prompt = PROMPT_COT_improved.format(comment=row["SATD Comment"], context=row["context"],
+                                                code_block=row["bloc of first occurrence"])
+            rows[i] = (row, prompt, "--hidden--")
+        if rows:
+            pending[fold] = rows
+
+    run_batches(model, pending, output_path, labels, wait=wait, poll_interval=poll_interval)
+
+
+def run_rag_batch(model, folds_dir: str, output_path: str, labels: list, num_folds: int = 5,
+                  default_retrieval_mode: str = "dpr", wait: bool = True, poll_interval: int = 60):
+    """
+    Few-shot (RAG) cross-validation through the batch API of the model. The prompts of each fold are
+    built with its retrieval index, the index being freed before the next fold. The folds whose job
+    is already submitted are collected without building their index again.
+    """
+    folds_dir = os.path.join(RAG_PROJECT_ROOT, folds_dir)
+    retrieval_mode = getattr(model, "retrieval_mode", default_retrieval_mode)
+    completed = load_completed_rows(output_path)
+    batches = load_batches(output_path)
+
+    pending = {}
+    for fold in range(num_folds):
+        test_df = pd.read_csv(os.path.join(folds_dir, f"stratified_cleaned_test_fold_{fold}.csv"))
+        if str(fold) in batches:
+            rows = submitted_rows(batches[str(fold)], test_df, completed, fold, rag=True)
+            if rows:
+                pending[fold] = rows
+            continue
+        if all((fold, i) in completed for i in test_df.index):
+            continue
+        train_df = pd.read_csv(os.path.join(folds_dir, f"stratified_cleaned_train_fold_{fold}.csv"))
+
+        # Imported here so the zero-shot runner and the collection of submitted jobs do not need the retrieval dependencies
+        from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.retriever.new_rag_runner import _maybe_openai_kwargs, _maybe_query_vec
+        from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.retriever.retriever_strategies.builder import make_retrieval, free_retrieval_bundle
+        from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.retriever.retrieval_engine import RetrievalEngine
+
+        retrieval = make_retrieval(retrieval_mode, train_df, **_maybe_openai_kwargs(retrieval_mode, fold))
+        engine = RetrievalEngine.from_bundle(retrieval)
+
+        rows = {}
+        for i, row in test_df.iterrows():
+            if (fold, i) in completed:
+                continue
+            _, _, prompt = model.rag_implementation_for_single_prompts(
+                train_data=train_df,
+                comment=row["SATD Comment"],
+                context=row["context"],
+                code_block=row["bloc of first occurrence"],
+                labels=labels,
+                retrieval_engine=engine,
+                query_vec=_maybe_query_vec(engine, i, retrieval_mode),
+                generate_prompt_only=True
+            )
+            rows[i] = (row, prompt, prompt)
+        pending[fold] = rows
+
+        engine.free()
+        free_retrieval_bundle(retrieval)
+
+    run_batches(model, pending, output_path, labels, rag=True, wait=wait, poll_interval=poll_interval)
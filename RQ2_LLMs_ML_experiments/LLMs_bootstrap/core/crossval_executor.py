@@ -16,7 +16,7 @@ def load_completed_rows(output_path):
     if not os.path.exists(output_path):
         return set()
     df_done = pd.read_csv(output_path)
-    return set(zip(df_done['fold'], df_done['row']))
+    return set(zip(df_done['Fold'], df_done['Index']))
 
 def run_crossval_from_files(model, folds_dir: str, output_path: str, labels: list, num_folds: int = 5, is_alaa_exec: bool = False):
     MAX_RETRIES = 5
@@ -47,7 +47,6 @@ def run_crossval_from_files(model, folds_dir: str, output_path: str, labels: lis
 
                     save_row_to_csv(output_path, fold, i, row, response, label_flags, predicted, labels)
                     print(f"✅ Fold {fold} Row {i} processed successfully.")
-                    time.sleep(2)
                     break
 
                 except Exception as e:
@@ -6,7 +6,10 @@ from models.gemma_model import GemmaModel
 from models.qween import QwenModel
 from models.deepseek_model import DeepseekModel
 from models.gemini_model import GeminiModel
+from models.response_cache import ResponseCache
 from crossval_executor import run_crossval_from_files
+from async_executor import get_provider_budget, run_crossval_async, run_all
+from batch_executor import run_crossval_batch
 
 LABELS = [
     "Computing Management Debt",
@@ -19,19 +22,19 @@ LABELS = [
     "Test Debt"
 ]
 
-def get_model(model_key, temperature):
+def get_model(model_key, temperature, response_cache=None):
     if model_key == "gemini":
-        return GeminiModel(api_key="XXXXXXXXXX", temperature=temperature)
+        return GeminiModel(api_key="XXXXXXXXXX", temperature=temperature, response_cache=response_cache)
     elif model_key == "deepseek":
-        return DeepseekModel(api_key="XXXXXXXXXX", temperature=temperature)
+        return DeepseekModel(api_key="XXXXXXXXXX", temperature=temperature, response_cache=response_cache)
     elif model_key == "claude":
-        return ClaudeModel(api_key="XXXXXXXXXX", temperature=temperature)
+        return ClaudeModel(api_key="XXXXXXXXXX", temperature=temperature, response_cache=response_cache)
     elif model_key == "chatgpt":
-        return ChatGPTModel(api_key="XXXXXXXXXX", temperature=temperature)
+        return ChatGPTModel(api_key="XXXXXXXXXX", temperature=temperature, response_cache=response_cache)
     elif model_key == "qwen":
-        return QwenModel(temperature=temperature)
+        return QwenModel(temperature=temperature, response_cache=response_cache)
     elif model_key == "gemma":
-        return GemmaModel(temperature=temperature)
+        return GemmaModel(temperature=temperature, response_cache=response_cache)
     else:
         raise ValueError(f"Model {model_key} not found.")
 
@@ -45,23 +48,65 @@ if __name__ == '__main__':
     PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
     folds_dir = os.path.join(PROJECT_ROOT, "RQ2_LLMs_ML_experiments", "Data_Splitting", "stratified_cleaned_folds")
 
-    for temp in [ 0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6]:
-        print(f"🔁 Running with temperature = {temp}")
-        model = get_model(selected_model_key, temperature=temp)
+    temperatures = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6]
+    use_async = True                 # 🔁 False for the sequential runner 🔁
+    use_batch = False                # 🔁 True for the provider batch API (chatgpt, claude) 🔁
 
-        output_path = os.path.join(
+    # Responses already obtained are not requested again; replay_only=True re-runs a sweep offline
+    response_cache = ResponseCache(
+        os.path.join(PROJECT_ROOT, "llm_crossval_runner", "results", "llm_response_cache.sqlite"),
+        replay_only=False,           # 🔁 Switch True/False 🔁
+        stats_every=100
+    )
+
+    def output_path_for(temp):
+        return os.path.join(
             PROJECT_ROOT,
             "llm_crossval_runner",
             "results",
             f"{selected_model_key}_eval_single_prompt_improved_v11_tmp_{temp}_v2.csv"
         )
 
-        run_crossval_from_files(
-            model=model,
-            folds_dir=folds_dir,
-            output_path=output_path,
-            labels=LABELS,
-            num_folds=5,
-            multi_prompt=multi_prompt,
-            is_alaa_exec=is_alaa_exec
-        )
+    if use_batch:
+        # Submit the batches of every temperature first, then collect them
+        for wait in (False, True):
+            for temp in temperatures:
+                run_crossval_batch(
+                    model=get_model(selected_model_key, temperature=temp, response_cache=response_cache),
+                    folds_dir=folds_dir,
+                    output_path=output_path_for(temp),
+                    labels=LABELS,
+                    num_folds=5,
+                    wait=wait
+                )
+    elif use_async:
+        # All temperatures run at once, within the concurrency and token budget of the provider
+        budget = get_provider_budget(selected_model_key)
+        run_all(*[
+            run_crossval_async(
+                model=get_model(selected_model_key, temperature=temp, response_cache=response_cache),
+                budget=budget,
+                folds_dir=folds_dir,
+                output_path=output_path_for(temp),
+                labels=LABELS,
+                num_folds=5
+            )
+            for temp in temperatures
+        ])
+    else:
+        for temp in temperatures:
+            print(f"🔁 Running with temperature = {temp}")
+            model = get_model(selected_model_key, temperature=temp, response_cache=response_cache)
+
+            run_crossval_from_files(
+                model=model,
+                folds_dir=folds_dir,
+                output_path=output_path_for(temp),
+                labels=LABELS,
+                num_folds=5,
+                multi_prompt=multi_prompt,
+                is_alaa_exec=is_alaa_exec
+            )
+
+    response_cache.print_stats()
+    response_cache.close()
@@ -3,9 +3,29 @@ from abc import ABC, abstractmethod
 
 class BaseLLM(ABC):
 
+    system_prompt = ""
+    max_tokens = None
+    response_cache = None
+
     @abstractmethod
     def generate(self, comment: str, context: str, code_block: str) -> str:
         pass
 
+    def cached_completion(self, prompt: str, request) -> str:
+        # Response from the cache of the model if any, otherwise from request()
+        if self.response_cache is None:
+            return request()
+        return self.response_cache.get_or_call(self.model_name, self.temperature, self.system_prompt, prompt,
+                                               self.max_tokens, request)
+
+    def cache_lookup(self, prompt: str):
+        if self.response_cache is None:
+            return None
+        return self.response_cache.get(self.model_name, self.temperature, self.system_prompt, prompt, self.max_tokens)
+
+    def cache_store(self, prompt: str, response: str):
+        if self.response_cache is not None:
+            self.response_cache.put(self.model_name, self.temperature, self.system_prompt, prompt, self.max_tokens, response)
+
 
 
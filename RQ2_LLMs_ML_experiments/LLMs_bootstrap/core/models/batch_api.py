@@ -0,0 +1,88 @@
+import json
+
+
+class OpenAIBatchClient:
+    """
+    Batch API of OpenAI and of the OpenAI-compatible endpoints implementing it.
+
+    The requests are uploaded as one JSONL file and run as a /v1/chat/completions batch job.
+    """
+
+    ENDED_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+    def __init__(self, client):
+        self.client = client
+
+    def submit(self, requests) -> str:
+        """
+        Submits the {"custom_id", "body"} requests built by `batch_request()` of the model.
+
+        Returns:
+            The id of the batch job.
+        """
+        jsonl = "\n".join(
+            json.dumps({"custom_id": request["custom_id"], "method": "POST", "url": "/v1/chat/completions", "body": request["body"]})
+            for request in requests
+        )
+        input_file = self.client.files.create(file=("batch_requests.jsonl", jsonl.encode("utf-8")), purpose="batch")
+        batch = self.client.batches.create(input_file_id=input_file.id, endpoint="/v1/chat/completions", completion_window="24h")
+        return batch.id
+
+    def is_ended(self, batch_id) -> bool:
+        return self.client.batches.retrieve(batch_id).status in self.ENDED_STATUSES
+
+    def results(self, batch_id) -> dict:
+        """
+        Returns:
+            The (response text, error) of each custom id, the error being None on success.
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                response = entry.get("response") or {}
+                if entry.get("error") or response.get("status_code") != 200:
+                    results[entry["custom_id"]] = (None, str(entry.get("error") or response.get("body")))
+                else:
+                    results[entry["custom_id"]] = (response["body"]["choices"][0]["message"]["content"].strip(), None)
+        return results
+
+
+class AnthropicBatchClient:
+    """
+    Message Batches API of Anthropic, taking the requests as one JSON list.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def submit(self, requests) -> str:
+        """
+        Submits the {"custom_id", "params"} requests built by `batch_request()` of the model.
+
+        Returns:
+            The id of the batch job.
+        """
+        return self.client.messages.batches.create(requests=requests).id
+
+    def is_ended(self, batch_id) -> bool:
+        return self.client.messages.batches.retrieve(batch_id).processing_status == "ended"
+
+    def results(self, batch_id) -> dict:
+        """
+        Returns:
+            The (response text, error) of each custom id, the error being None on success.
+        """
+        results = {}
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                results[entry.custom_id] = (entry.result.message.content[0].text.strip(), None)
+            else:
+                error = getattr(entry.result, "error", None)
+                results[entry.custom_id] = (None, f"{entry.result.type}: {error}" if error else entry.result.type)
+        return results
@@ -2,6 +2,11 @@ import re
 from openai import OpenAI
 
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.base_model import BaseLLM
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.http_transport import get_client, get_latency_log
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.batch_api import OpenAIBatchClient
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.rate_limiter import RateLimiter, estimate_tokens
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.response_cache import CacheMiss, ResponseCache
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.utils import is_retryable_error
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.prompts.prompt_zero_shot import PROMPT_COT_improved
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.prompts.prompt_few_shots import PROMPT_COT_RAG_improved
 
@@ -10,23 +15,46 @@ class ChatGPTModel(BaseLLM):
 
     # gpt-4.1-2025-04-14
 
-    def __init__(self, api_key: str, model_name="gpt-4.1-2025-04-14", temperature=0.0):
-        self.client = OpenAI(api_key=api_key)
+    system_prompt = "You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. Follow the requirements provided in the user prompt. Do not explain or reason."
+
+    def __init__(self, api_key: str, model_name="gpt-4.1-2025-04-14", temperature=0.0, rate_limiter: RateLimiter = None,
+                 base_url: str = None, response_cache: ResponseCache = None):
+        self.client = get_client(("openai", api_key, base_url), lambda: OpenAI(api_key=api_key, base_url=base_url))
+        self.batch_client = OpenAIBatchClient(self.client)
+        self.rate_limiter = rate_limiter or RateLimiter([api_key])
         self.model_name = model_name
         self.category_labels = ['CAT1', 'CAT2', 'CAT3', 'CAT4', 'CAT5', 'CAT6', 'CAT7', 'CAT8']
         self.temperature = temperature
+        self.response_cache = response_cache
+        self.latency_log = get_latency_log(model_name)
+
+    def _chat(self, prompt: str) -> str:
+        with self.rate_limiter.limit(estimate_tokens(prompt, max_tokens=80)), self.latency_log.timed():
+            response = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": prompt}],
+                temperature=self.temperature
+            )
+        return response.choices[0].message.content.strip()
 
     def generate(self, comment: str, context: str, code_block: str) -> str:
         prompt = PROMPT_COT_improved.format(comment=comment, context=context, code_block=code_block)
-        response = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=[
-                {"role": "system",
-                 "content": "You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. Follow the requirements provided in the user prompt. Do not explain or reason."},
-                {"role": "user", "content": prompt}],
-            temperature=self.temperature
-        )
-        return response.choices[0].message.content.strip()
+        return self.cached_completion(prompt, lambda: self._chat(prompt))
+
+    def batch_request(self, custom_id: str, prompt: str, rag: bool = False) -> dict:
+        # Same request as generate() and rag_implementation_for_single_prompts(), both sending the prompt alone
+        return {
+            "custom_id": custom_id,
+            "body": {
+                "model": self.model_name,
+                "messages": [
+                    {"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": prompt}],
+                "temperature": self.temperature
+            }
+        }
 
     def rag_implementation_for_single_prompts(
             self,
@@ -63,17 +91,16 @@ class ChatGPTModel(BaseLLM):
             return None, None, prompt
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system",
-                     "content": "You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. Follow the requirements provided in the user prompt. Do not explain or reason."},
-                    {"role": "user", "content": prompt}],
-                temperature=self.temperature
-            )
-            label, raw_text = self._parse_llm_response(response.choices[0].message.content.strip())
+            response_text = self.cached_completion(prompt, lambda: self._chat(prompt))
+            label, raw_text = self._parse_llm_response(response_text)
             return label, raw_text, prompt
+        except CacheMiss:
+            # Replay only: a missing response is a failure of the row, not an ERROR prediction
+            raise
         except Exception as e:
+            if is_retryable_error(e):
+                # Left to the runner, which retries the row or logs it to failed_requests.csv
+                raise
             print(f"❌ RAG single prompt failed: {e}")
             return 0, "ERROR", "ERROR"
 
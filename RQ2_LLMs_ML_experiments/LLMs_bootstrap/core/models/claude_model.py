@@ -4,32 +4,66 @@ from typing import Tuple, Optional
 import anthropic
 
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.base_model import BaseLLM
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.http_transport import get_client, get_latency_log
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.batch_api import AnthropicBatchClient
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.rate_limiter import RateLimiter, estimate_tokens
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.response_cache import CacheMiss, ResponseCache
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.utils import is_retryable_error
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.prompts.prompt_zero_shot import PROMPT_COT_improved
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.prompts.prompt_few_shots import PROMPT_COT_RAG_improved
 
+RAG_STOP_SEQUENCES = ["Reasoning", "Explanation", "Rationale", "Because"]
+
 
 class ClaudeModel(BaseLLM):
 
-    #
-    def __init__(self, api_key: str, model_name="claude-3-5-haiku-20241022", temperature=0.0):
+    system_prompt = "You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. Follow the requirements provided in the user prompt. DO NOT EXPLAIN OR REASON."
+    max_tokens = 80
+
+    def __init__(self, api_key: str, model_name="claude-3-5-haiku-20241022", temperature=0.0, rate_limiter: RateLimiter = None,
+                 base_url: str = None, response_cache: ResponseCache = None):
         self.model_name = model_name
         self.category_labels = ['CAT1', 'CAT2', 'CAT3', 'CAT4', 'CAT5', 'CAT6', 'CAT7', 'CAT8']
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.client = get_client(("anthropic", api_key, base_url),
+                                 lambda: anthropic.Anthropic(api_key=api_key, base_url=base_url))
+        self.batch_client = AnthropicBatchClient(self.client)
+        self.rate_limiter = rate_limiter or RateLimiter([api_key])
         self.temperature = temperature
+        self.response_cache = response_cache
+        self.latency_log = get_latency_log(model_name)
+
+    def _chat(self, prompt: str, stop_sequences=None) -> str:
+        extra = {"stop_sequences": stop_sequences} if stop_sequences else {}
+        with self.rate_limiter.limit(estimate_tokens(prompt, max_tokens=self.max_tokens)), self.latency_log.timed():
+            response = self.client.messages.create(
+                model=self.model_name,
+                system=self.system_prompt,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                thinking={"type": "disabled"},
+                **extra
+                # , top_k=10, top_p=0.95
+            )
+        return response.content[0].text.strip()
 
     def generate(self, comment: str, context: str, code_block: str) -> str:
         prompt = PROMPT_COT_improved.format(comment=comment, context=context, code_block=code_block)
+        return self.cached_completion(prompt, lambda: self._chat(prompt))
 
-        response = self.client.messages.create(
-            model=self.model_name,
-            system="You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. Follow the requirements provided in the user prompt. DO NOT EXPLAIN OR REASON.",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=80,
-            temperature=self.temperature,
-            thinking={"type": "disabled"},
-            # , top_k=10, top_p=0.95
-        )
-        return response.content[0].text.strip()
+    def batch_request(self, custom_id: str, prompt: str, rag: bool = False) -> dict:
+        # Same request as generate(), or rag_implementation_for_single_prompts() with its stop sequences if rag
+        params = {
+            "model": self.model_name,
+            "system": self.system_prompt,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "thinking": {"type": "disabled"},
+        }
+        if rag:
+            params["stop_sequences"] = RAG_STOP_SEQUENCES
+        return {"custom_id": custom_id, "params": params}
 
     def rag_implementation_for_single_prompts(
             self,
@@ -66,20 +100,17 @@ class ClaudeModel(BaseLLM):
             return None, None, prompt
 
         try:
-            response = self.client.messages.create(
-                model=self.model_name,
-                system="You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. Follow the requirements provided in the user prompt. DO NOT EXPLAIN OR REASON.",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=80,
-                temperature=self.temperature,
-                thinking={"type": "disabled"},
-                stop_sequences=["Reasoning", "Explanation", "Rationale" ,"Because"]
-                # , top_k=10, top_p=0.95
-            )
-            label, raw_text = self._parse_llm_response(response.content[0].text.strip())
+            response_text = self.cached_completion(prompt, lambda: self._chat(prompt, stop_sequences=RAG_STOP_SEQUENCES))
+            label, raw_text = self._parse_llm_response(response_text)
             return label, raw_text, prompt
 
+        except CacheMiss:
+            # Replay only: a missing response is a failure of the row, not an ERROR prediction
+            raise
         except Exception as e:
+            if is_retryable_error(e):
+                # Left to the runner, which retries the row or logs it to failed_requests.csv
+                raise
             print(f"❌ RAG single prompt failed: {e}")
             return 0, "ERROR", "ERROR"
 
@@ -4,35 +4,47 @@ from typing import Optional, Tuple
 from openai import OpenAI
 
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.base_model import BaseLLM
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.http_transport import get_client, get_latency_log
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.rate_limiter import RateLimiter, estimate_tokens
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.response_cache import CacheMiss, ResponseCache
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.utils import is_retryable_error
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.prompts.prompt_zero_shot import PROMPT_COT_improved
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.prompts.prompt_few_shots import PROMPT_COT_RAG_improved
 
 
 class DeepseekModel(BaseLLM):
 
-    def __init__(self, api_key: str, model_name="deepseek-chat", temperature=0.0):
+    system_prompt = "You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. Follow the requirements provided in the user prompt. Do not explain or reason."
+
+    def __init__(self, api_key: str, model_name="deepseek-chat", temperature=0.0, rate_limiter: RateLimiter = None,
+                 response_cache: ResponseCache = None):
         self.model_name = model_name
         self.category_labels = ['CAT1', 'CAT2', 'CAT3', 'CAT4', 'CAT5', 'CAT6', 'CAT7', 'CAT8']
         self.temperature = temperature
 
-        self.client = OpenAI(
+        self.client = get_client(("openai", api_key, "https://api.deepseek.com"), lambda: OpenAI(
             api_key=api_key,
             base_url="https://api.deepseek.com"
-        )
+        ))
+        self.rate_limiter = rate_limiter or RateLimiter([api_key])
+        self.response_cache = response_cache
+        self.latency_log = get_latency_log(model_name)
+
+    def _chat(self, prompt: str) -> str:
+        with self.rate_limiter.limit(estimate_tokens(prompt, max_tokens=80)), self.latency_log.timed():
+            response = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": prompt},
+                ], temperature=self.temperature
+                # , top_k=10, top_p=0.95
+            )
+        return response.choices[0].message.content.strip()
 
     def generate(self, comment: str, context: str, code_block: str) -> str:
         prompt = PROMPT_COT_improved.format(comment=comment, context=context, code_block=code_block)
-
-        response = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=[
-                {"role": "system",
-                 "content": "You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. Follow the requirements provided in the user prompt. Do not explain or reason."},
-                {"role": "user", "content": prompt},
-            ], temperature=self.temperature
-            # , top_k=10, top_p=0.95
-        )
-        return response.choices[0].message.content.strip()
+        return self.cached_completion(prompt, lambda: self._chat(prompt))
 
     def rag_implementation_for_single_prompts(
             self,
@@ -70,18 +82,16 @@ class DeepseekModel(BaseLLM):
             return None, None, prompt
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system",
-                     "content": "You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. Follow the requirements provided in the user prompt. Do not explain or reason."},
-                    {"role": "user", "content": prompt}]
-                , temperature=self.temperature
-                # , top_k=10, top_p=0.95
-            )
-            label, raw_text = self._parse_llm_response(response.choices[0].message.content)
+            response_text = self.cached_completion(prompt, lambda: self._chat(prompt))
+            label, raw_text = self._parse_llm_response(response_text)
             return label, raw_text, prompt
+        except CacheMiss:
+            # Replay only: a missing response is a failure of the row, not an ERROR prediction
+            raise
         except Exception as e:
+            if is_retryable_error(e):
+                # Left to the runner, which retries the row or logs it to failed_requests.csv
+                raise
             print(f"❌ RAG single prompt failed: {e}")
             return 0, "ERROR", "ERROR"
 
@@ -2,40 +2,59 @@ import re
 from typing import Optional, Tuple
 
 import google.generativeai as genai
+from google.ai import generativelanguage as glm
 
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.api_key_management import APIKeyManager
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.base_model import BaseLLM
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.http_transport import get_client, get_latency_log
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.rate_limiter import estimate_tokens
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.response_cache import CacheMiss, ResponseCache
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.utils import is_retryable_error
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.prompts.prompt_zero_shot import PROMPT_COT_improved
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.prompts.prompt_few_shots import PROMPT_COT_RAG_improved
 
 
+def _gemini_client(api_key):
+    # genai.configure is process-wide, so each key gets its own client of the generativelanguage API
+    # (google-ai-generativelanguage, pinned by google-generativeai in requirements.txt) instead
+    return glm.GenerativeServiceClient(client_options={"api_key": api_key})
+
+
 class GeminiModel(BaseLLM):
 
-    def __init__(self, api_key_manager: APIKeyManager, model_name="gemini-2.0-flash", temperature=0.0):
+    def __init__(self, api_key_manager: APIKeyManager, model_name="gemini-2.0-flash", temperature=0.0,
+                 response_cache: ResponseCache = None):
         self.api_key_manager = api_key_manager
         self.model_name = model_name
-        self.model = None  # will initialize per request
         self.category_labels = ['CAT1', 'CAT2', 'CAT3', 'CAT4', 'CAT5', 'CAT6', 'CAT7', 'CAT8']
         self.temperature = temperature
-
-    def _ensure_model_with_key(self):
-        # Pick next available key
-        api_key = self.api_key_manager.get_available_key()
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(self.model_name)
+        self.response_cache = response_cache
+        self.latency_log = get_latency_log(model_name)
+
+    def _client_with_key(self, api_key):
+        # Built once per key and reused by every request and every GeminiModel on the key
+        return get_client(("gemini", api_key), lambda: _gemini_client(api_key))
+
+    def _chat(self, prompt: str) -> str:
+        # Rotate key for every request, waiting until the next key frees up
+        with self.api_key_manager.limit(estimate_tokens(prompt, max_tokens=80)) as api_key:
+            client = self._client_with_key(api_key)
+            with self.latency_log.timed():
+                response = client.generate_content(
+                    model=f"models/{self.model_name}",
+                    # system_instruction="You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. Follow the requirements provided in the user prompt. Do not explain or reason.",
+                    contents=[glm.Content(role="user", parts=[glm.Part(text=prompt)])],
+                    generation_config=glm.GenerationConfig(
+                        temperature=self.temperature
+                        # top_p=0.95
+                        #     , top_k=10
+                    ))
+        # Same text, and same errors on blocked responses, as GenerativeModel.generate_content
+        return genai.types.GenerateContentResponse.from_response(response).text.strip()
 
     def generate(self, comment: str, context: str, code_block: str) -> str:
-        self._ensure_model_with_key()   # Rotate key for every request
-
         prompt = PROMPT_COT_improved.format(comment=comment, context=context, code_block=code_block)
-        response = self.model.generate_content(
-            # system_instruction="You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. Follow the requirements provided in the user prompt. Do not explain or reason.",
-            contents=prompt, generation_config={
-                'temperature': self.temperature
-                # 'top_p' : 0.95
-                #     , 'top_k' : 10
-            })
-        return response.text.strip()
+        return self.cached_completion(prompt, lambda: self._chat(prompt))
 
     def rag_implementation_for_single_prompts(
             self,
@@ -49,8 +68,6 @@ class GeminiModel(BaseLLM):
             generate_prompt_only=False  # ✅ NEW FLAG
     ) -> Tuple[Optional[int], Optional[str], str]:
 
-        self._ensure_model_with_key()  # Rotate key for every request
-
         # 1) Retrieve
         query_triplet = (str(comment), str(context), str(code_block))
 
@@ -74,14 +91,16 @@ class GeminiModel(BaseLLM):
             return None, None, prompt
 
         try:
-            response = self.model.generate_content(
-                contents=prompt,
-                generation_config={
-                    'temperature': self.temperature,
-                })
-            label, raw_text = self._parse_llm_response(response.text)
+            response_text = self.cached_completion(prompt, lambda: self._chat(prompt))
+            label, raw_text = self._parse_llm_response(response_text)
             return label, raw_text, prompt
+        except CacheMiss:
+            # Replay only: a missing response is a failure of the row, not an ERROR prediction
+            raise
         except Exception as e:
+            if is_retryable_error(e):
+                # Left to the runner, which retries the row or logs it to failed_requests.csv
+                raise
             print(f"❌ RAG single prompt failed: {e}")
             return 0, "ERROR", "ERROR"
 
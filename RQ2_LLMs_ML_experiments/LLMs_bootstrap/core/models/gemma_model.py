@@ -1,34 +1,48 @@
 import re
 from typing import Tuple, Optional
 
-import requests
-
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.base_model import BaseLLM
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.http_transport import HTTPTransport, get_latency_log, get_transport
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.rate_limiter import RateLimiter, estimate_tokens
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.response_cache import CacheMiss, ResponseCache
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.utils import is_retryable_error
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.prompts.prompt_zero_shot import PROMPT_COT_improved
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.prompts.prompt_few_shots import PROMPT_COT_RAG_improved
 
 
 class GemmaModel(BaseLLM):
 
-    def __init__(self, api_url="http://localhost:8015/v1/chat/completions", model_name="google/gemma-3-27b-it", temperature=0.0):
+    system_prompt = "You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. Follow the requirements provided in the user prompt. Do not explain or reason."
+    max_tokens = 80
+
+    def __init__(self, api_url="http://localhost:8015/v1/chat/completions", model_name="google/gemma-3-27b-it", temperature=0.0,
+                 rate_limiter: RateLimiter = None, response_cache: ResponseCache = None,
+                 transport: HTTPTransport = None):
         self.api_url = api_url
+        self.rate_limiter = rate_limiter or RateLimiter([api_url])
         self.model_name = model_name
         self.category_labels = ['CAT1', 'CAT2', 'CAT3', 'CAT4', 'CAT5', 'CAT6', 'CAT7', 'CAT8']
         self.temperature = temperature
+        self.response_cache = response_cache
+        self.transport = transport or get_transport()
+        self.latency_log = get_latency_log(model_name)
+
+    def _chat(self, prompt: str) -> str:
+        with self.rate_limiter.limit(estimate_tokens(prompt, max_tokens=self.max_tokens)):
+            response = self.transport.post_json(self.api_url, {
+                "model": self.model_name,
+                "messages": [
+                    {"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": self.temperature,
+                "max_tokens": self.max_tokens,
+            }, latency_log=self.latency_log)
+        return response["choices"][0]["message"]["content"].strip()
 
     def generate(self, comment: str, context: str, code_block: str) -> str:
         user_prompt = PROMPT_COT_improved.format(comment=comment, context=context, code_block=code_block)
-        response = requests.post(self.api_url, json={
-            "model": self.model_name,
-            "messages": [
-                {"role": "system", "content": "You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. Follow the requirements provided in the user prompt. Do not explain or reason."},
-                {"role": "user", "content": user_prompt}
-            ],
-            "temperature": self.temperature,
-            "max_tokens": 80,
-        })
-        response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"].strip()
+        return self.cached_completion(user_prompt, lambda: self._chat(user_prompt))
 
     def rag_implementation_for_single_prompts(
             self,
@@ -65,20 +79,16 @@ class GemmaModel(BaseLLM):
             return None, None, prompt
 
         try:
-            response = requests.post(self.api_url, json={
-                "model": self.model_name,
-                "messages": [
-                    {"role": "system", "content": "You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. Follow the requirements provided in the user prompt. Do not explain or reason."},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": self.temperature,
-                "max_tokens": 80
-            })
-            response.raise_for_status()
-            response_text = response.json()["choices"][0]["message"]["content"].strip()
+            response_text = self.cached_completion(prompt, lambda: self._chat(prompt))
             label, parsed_text = self._parse_llm_response(response_text)
             return label, parsed_text, prompt
+        except CacheMiss:
+            # Replay only: a missing response is a failure of the row, not an ERROR prediction
+            raise
         except Exception as e:
+            if is_retryable_error(e):
+                # Left to the runner, which retries the row or logs it to failed_requests.csv
+                raise
             print(f"❌ RAG single prompt failed: {e}")
             return 0, "ERROR", "ERROR"
 
@@ -0,0 +1,147 @@
+import importlib.util
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# HTTP/2 needs the optional h2 package, and is only negotiated over https
+HTTP2_AVAILABLE = httpx is not None and importlib.util.find_spec("h2") is not None
+
+
+class LatencyLog:
+    """
+    Latency of the requests sent to one model, so the connection overhead shows up next to the
+    processing time: every request is printed if `log_requests` is set, and a summary every
+    `stats_every` requests (None to never print it).
+    """
+
+    log_requests = True
+    stats_every = 100
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timed(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(time.perf_counter() - start)
+
+    def record(self, seconds):
+        with self._lock:
+            self.latencies.append(seconds)
+            count = len(self.latencies)
+        if self.log_requests:
+            print(f"⏱️ {self.name}: request {count} took {seconds * 1000:.0f} ms")
+        if self.stats_every and count % self.stats_every == 0:
+            self.print_stats()
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return {"requests": 0}
+        return {
+            "requests": len(latencies),
+            "mean": sum(latencies) / len(latencies),
+            "p50": latencies[len(latencies) // 2],
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            "max": latencies[-1],
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        if not stats["requests"]:
+            return
+        print(f"⏱️ {self.name}: {stats['requests']} requests, mean {stats['mean'] * 1000:.0f} ms, "
+              f"p50 {stats['p50'] * 1000:.0f} ms, p95 {stats['p95'] * 1000:.0f} ms, max {stats['max'] * 1000:.0f} ms")
+
+
+class HTTPTransport:
+    """
+    Keep-alive connection pool for the JSON APIs called over plain HTTP (the vLLM server of
+    GemmaModel and QwenModel). Uses an httpx client, with HTTP/2 when h2 is installed, and a
+    requests Session otherwise.
+
+    Args:
+        pool_maxsize (int): The connections kept open per host, at least the concurrency of the runner.
+        timeout (float): Seconds to wait for a response.
+    """
+
+    def __init__(self, pool_maxsize=16, timeout=300.0, http2=True):
+        self.timeout = timeout
+        if httpx is not None:
+            self.http2 = http2 and HTTP2_AVAILABLE
+            self.client = httpx.Client(
+                http2=self.http2,
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+            )
+        else:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self.http2 = False
+            self.client = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+            self.client.mount("http://", adapter)
+            self.client.mount("https://", adapter)
+
+    def post_json(self, url, payload, latency_log: LatencyLog = None):
+        """
+        Returns:
+            The decoded JSON body of the response.
+
+        Raises:
+            httpx.HTTPStatusError or requests.HTTPError: For an error status, so the rate limiter sees 429s.
+        """
+        start = time.perf_counter()
+        response = self.client.post(url, json=payload, timeout=self.timeout)
+        if latency_log is not None:
+            latency_log.record(time.perf_counter() - start)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self.client.close()
+
+
+_shared_lock = threading.Lock()
+_transport = None
+_latency_logs = {}
+_clients = {}
+
+
+def get_transport() -> HTTPTransport:
+    # One pool for the process, so every model instance (one per temperature) reuses the same connections
+    global _transport
+    with _shared_lock:
+        if _transport is None:
+            _transport = HTTPTransport()
+        return _transport
+
+
+def get_latency_log(name) -> LatencyLog:
+    with _shared_lock:
+        if name not in _latency_logs:
+            _latency_logs[name] = LatencyLog(name)
+        return _latency_logs[name]
+
+
+def get_client(key, factory):
+    """
+    Returns the client cached under `key`, creating it with `factory()` the first time, so the SDK
+    clients and their connection pools are built once per API key instead of once per model or request.
+    """
+    with _shared_lock:
+        if key not in _clients:
+            _clients[key] = factory()
+        return _clients[key]
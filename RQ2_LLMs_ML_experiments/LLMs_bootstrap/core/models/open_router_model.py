@@ -3,6 +3,11 @@ from typing import List, Tuple, Optional
 from openai import OpenAI
 
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.base_model import BaseLLM
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.http_transport import get_client, get_latency_log
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.batch_api import OpenAIBatchClient
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.rate_limiter import RateLimiter, estimate_tokens
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.response_cache import CacheMiss, ResponseCache
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.utils import is_retryable_error
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.prompts.prompt_zero_shot import PROMPT_COT_improved
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.prompts.prompt_few_shots import PROMPT_COT_RAG_improved
 
@@ -17,33 +22,58 @@ class OpenRouterModel(BaseLLM):
       - "anthropic/claude-3-5-sonnet"
     """
 
-    def __init__(self, api_key: str, model_name: str = "deepseek/deepseek-chat-v3-0324", temperature: float = 0.0):
+    system_prompt = ("You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. "
+                     "Follow the requirements provided in the user prompt. Do not explain or reason.")
+
+    def __init__(self, api_key: str, model_name: str = "deepseek/deepseek-chat-v3-0324", temperature: float = 0.0,
+                 rate_limiter: RateLimiter = None, base_url: str = "https://openrouter.ai/api/v1",
+                 response_cache: ResponseCache = None):
         self.model_name = model_name
         self.category_labels = ['CAT1', 'CAT2', 'CAT3', 'CAT4', 'CAT5', 'CAT6', 'CAT7', 'CAT8']
         self.temperature = temperature
 
         # OpenAI-compatible client pointed at OpenRouter
-        self.client = OpenAI(
+        self.client = get_client(("openai", api_key, base_url), lambda: OpenAI(
             api_key=api_key,
-            base_url="https://openrouter.ai/api/v1",
+            base_url=base_url,
             # Optional but recommended by OpenRouter for attribution/analytics:
             # default_headers={"HTTP-Referer": "http://your-app-url", "X-Title": "YourAppName"}
-        )
+        ))
+        self.rate_limiter = rate_limiter or RateLimiter([api_key])
+        # Only for the OpenAI-compatible endpoints implementing the Batch API
+        self.batch_client = OpenAIBatchClient(self.client)
+        self.response_cache = response_cache
+        self.latency_log = get_latency_log(model_name)
+
+    def _chat(self, prompt: str) -> str:
+        with self.rate_limiter.limit(estimate_tokens(prompt, max_tokens=80)), self.latency_log.timed():
+            response = self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=self.temperature,
+            )
+        return (response.choices[0].message.content or "").strip()
 
     def generate(self, comment: str, context: str, code_block: str) -> str:
         prompt = PROMPT_COT_improved.format(comment=comment, context=context, code_block=code_block)
-
-        response = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=[
-                {"role": "system",
-                 "content": "You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. "
-                            "Follow the requirements provided in the user prompt. Do not explain or reason."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=self.temperature,
-        )
-        return response.choices[0].message.content.strip()
+        return self.cached_completion(prompt, lambda: self._chat(prompt))
+
+    def batch_request(self, custom_id: str, prompt: str, rag: bool = False) -> dict:
+        # Same request as generate() and rag_implementation_for_single_prompts(), both sending the prompt alone
+        return {
+            "custom_id": custom_id,
+            "body": {
+                "model": self.model_name,
+                "messages": [
+                    {"role": "system", "content": self.system_prompt},
+                    {"role": "user", "content": prompt},
+                ],
+                "temperature": self.temperature,
+            }
+        }
 
     def rag_implementation_for_single_prompts(
         self,
@@ -79,20 +109,16 @@ class OpenRouterModel(BaseLLM):
             return None, None, prompt
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system",
-                     "content": "You are a senior Infrastructure-as-Code (IaC) engineer with deep expertise in Terraform. "
-                                "Follow the requirements provided in the user prompt. Do not explain or reason."},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=self.temperature,
-            )
-            raw_text = response.choices[0].message.content
+            raw_text = self.cached_completion(prompt, lambda: self._chat(prompt))
             label, parsed_text = self._parse_llm_response(raw_text)
             return label, parsed_text, prompt
+        except CacheMiss:
+            # Replay only: a missing response is a failure of the row, not an ERROR prediction
+            raise
         except Exception as e:
+            if is_retryable_error(e):
+                # Left to the runner, which retries the row or logs it to failed_requests.csv
+                raise
             print(f"❌ RAG single prompt failed: {e}")
             return 0, "ERROR", "ERROR"
 
@@ -0,0 +1,196 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+MIN_RATE_SCALE = 0.1
+MAX_BACKOFF = 60
+
+
+class TokenBucket:
+    """
+    Request and token budget of one API key, refilled continuously.
+
+    The bucket allows `requests_per_window` requests and `tokens_per_window` tokens over `time_window`
+    seconds (None for no limit). A 429 halves the refill rate and blocks the key for the Retry-After
+    delay of the response, or an exponential backoff without one; each success then restores 5% of
+    the rate. Not thread-safe on its own, see RateLimiter.
+    """
+
+    def __init__(self, requests_per_window=None, tokens_per_window=None, time_window=60):
+        self.requests_per_window = requests_per_window
+        self.tokens_per_window = tokens_per_window
+        self.time_window = time_window
+        self.rate_scale = 1.0
+        self.backoff = 0
+        self.blocked_until = 0.0
+        self.requests = float(requests_per_window or 0)
+        self.tokens = float(tokens_per_window or 0)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.updated = now
+        if self.requests_per_window:
+            self.requests = min(self.requests_per_window, self.requests + elapsed * self.rate_scale * self.requests_per_window / self.time_window)
+        if self.tokens_per_window:
+            self.tokens = min(self.tokens_per_window, self.tokens + elapsed * self.rate_scale * self.tokens_per_window / self.time_window)
+
+    def _wait_for(self, level, needed, per_window):
+        if level >= needed:
+            return 0.0
+        return (needed - level) * self.time_window / (per_window * self.rate_scale)
+
+    def reserve(self, tokens, now):
+        """
+        Takes a request and `tokens` tokens from the bucket if it holds them.
+
+        Returns:
+            0 once taken, otherwise the number of seconds until the bucket holds them.
+        """
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.requests_per_window:
+            wait = max(wait, self._wait_for(self.requests, 1, self.requests_per_window))
+        if self.tokens_per_window:
+            # A request larger than the whole budget waits for a full bucket
+            needed = min(tokens, self.tokens_per_window)
+            wait = max(wait, self._wait_for(self.tokens, needed, self.tokens_per_window))
+        if wait > 0:
+            return wait
+
+        if self.requests_per_window:
+            self.requests -= 1
+        if self.tokens_per_window:
+            self.tokens -= min(tokens, self.tokens_per_window)
+        return 0.0
+
+    def rate_limited(self, retry_after, now):
+        self.rate_scale = max(self.rate_scale / 2, MIN_RATE_SCALE)
+        self.backoff = min(self.backoff * 2 or 1, MAX_BACKOFF)
+        delay = retry_after if retry_after is not None else self.backoff
+        self.blocked_until = max(self.blocked_until, now + delay)
+        # The provider counts our usage as exhausted, whatever the bucket thought
+        self.requests = 0.0
+        self.tokens = 0.0
+
+    def succeeded(self):
+        self.rate_scale = min(1.0, self.rate_scale + 0.05)
+        self.backoff = 0
+
+
+class RateLimiter:
+    """
+    Hands out API keys within the request and token budget of each key, in a round-robin manner.
+
+    Each key gets its own TokenBucket. `acquire()` blocks the thread and `acquire_async()` the
+    coroutine exactly until the next key frees up; the buckets are guarded by a lock held only
+    while picking a key, so one limiter is safe to share between threads and event loops.
+    """
+
+    def __init__(self, keys, requests_per_window=None, tokens_per_window=None, time_window=60):
+        self.keys = list(keys)
+        self.buckets = {key: TokenBucket(requests_per_window, tokens_per_window, time_window) for key in self.keys}
+        self._lock = threading.Lock()
+        self._next = 0
+
+    def _try_acquire(self, tokens):
+        with self._lock:
+            now = time.monotonic()
+            waits = []
+            for offset in range(len(self.keys)):
+                position = (self._next + offset) % len(self.keys)
+                key = self.keys[position]
+                wait = self.buckets[key].reserve(tokens, now)
+                if wait == 0:
+                    self._next = position + 1
+                    return key, 0.0
+                waits.append(wait)
+            return None, min(waits)
+
+    def acquire(self, tokens=0):
+        while True:
+            key, wait = self._try_acquire(tokens)
+            if key is not None:
+                return key
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens=0):
+        while True:
+            key, wait = self._try_acquire(tokens)
+            if key is not None:
+                return key
+            await asyncio.sleep(wait)
+
+    def report_rate_limited(self, key, retry_after=None):
+        with self._lock:
+            self.buckets[key].rate_limited(retry_after, time.monotonic())
+
+    def report_success(self, key):
+        with self._lock:
+            self.buckets[key].succeeded()
+
+    @contextmanager
+    def limit(self, tokens=0):
+        """
+        Acquires a key for one request, reporting a 429 raised by the request back to its bucket.
+        """
+        key = self.acquire(tokens)
+        try:
+            yield key
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self.report_rate_limited(key, retry_after_seconds(e))
+            raise
+        self.report_success(key)
+
+
+def estimate_tokens(text, max_tokens=0):
+    # ~4 characters per token, plus the completion
+    return len(text) // 4 + max_tokens
+
+
+def _status_code(e):
+    status = getattr(e, "status_code", None) or getattr(e, "code", None)
+    response = getattr(e, "response", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_rate_limit_error(e: Exception) -> bool:
+    if _status_code(e) == 429:
+        return True
+    msg = str(e).lower()
+    return any(keyword in msg for keyword in ["429", "too many requests", "rate limit", "resource exhausted", "resource_exhausted"])
+
+
+def retry_after_seconds(e: Exception):
+    """
+    Delay asked by the Retry-After (or retry-after-ms) header of the response of `e`, None without one.
+    """
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after is None:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        # HTTP-date form
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class CacheMiss(Exception):
+    """
+    Raised by a replay-only ResponseCache for a prompt it holds no response to.
+    """
+
+
+class ResponseCache:
+    """
+    On-disk cache of the LLM responses, keyed by a hash of the model name, temperature, system
+    prompt, user prompt and max tokens of the request.
+
+    Re-running a sweep, or retrying its failed rows, only sends the requests never answered
+    before. In replay-only mode the cache never lets a request through and raises CacheMiss
+    instead, for offline re-analysis of a finished sweep.
+
+    Eviction is least recently used: `max_entries` bounds the number of responses and
+    `max_age_days` drops the responses unused for longer (None for no limit).
+
+    Safe to share between the threads of the concurrent runner.
+
+    Attributes:
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups not in the cache.
+    """
+
+    def __init__(self, db_path="llm_response_cache.sqlite", max_entries=None, max_age_days=None, replay_only=False,
+                 stats_every=None):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.replay_only = replay_only
+        self.stats_every = stats_every  # print the statistics every n lookups, None to never print them
+        self.hits = 0
+        self.misses = 0
+        self._puts_since_eviction = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model_name TEXT NOT NULL,
+                temperature REAL NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used_at)")
+        self.connection.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(model_name, temperature, system_prompt, user_prompt, max_tokens):
+        payload = json.dumps([model_name, float(temperature), system_prompt or "", user_prompt, max_tokens])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, model_name, temperature, system_prompt, user_prompt, max_tokens):
+        """
+        Returns:
+            The cached response to the request, None if there is none.
+
+        Raises:
+            CacheMiss: In replay-only mode, if there is none.
+        """
+        key = self.make_key(model_name, temperature, system_prompt, user_prompt, max_tokens)
+        with self._lock:
+            row = self.connection.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.hits += 1
+                self.connection.execute("UPDATE responses SET last_used_at = ? WHERE key = ?", (time.time(), key))
+                self.connection.commit()
+            else:
+                self.misses += 1
+            lookups = self.hits + self.misses
+
+        if self.stats_every and lookups % self.stats_every == 0:
+            self.print_stats()
+        if row is None and self.replay_only:
+            raise CacheMiss(f"No cached response of {model_name} at temperature {temperature} for this prompt")
+        return row[0] if row is not None else None
+
+    def put(self, model_name, temperature, system_prompt, user_prompt, max_tokens, response):
+        key = self.make_key(model_name, temperature, system_prompt, user_prompt, max_tokens)
+        now = time.time()
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, model_name, temperature, response, created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, float(temperature), response, now, now))
+            self.connection.commit()
+            self._puts_since_eviction += 1
+            evict = self._puts_since_eviction >= 1000
+        if evict:
+            self.evict()
+
+    def get_or_call(self, model_name, temperature, system_prompt, user_prompt, max_tokens, request):
+        """
+        Returns the cached response to the request, or calls `request()` and caches the response it returns.
+        """
+        response = self.get(model_name, temperature, system_prompt, user_prompt, max_tokens)
+        if response is None:
+            response = request()
+            self.put(model_name, temperature, system_prompt, user_prompt, max_tokens, response)
+        return response
+
+    def evict(self):
+        with self._lock:
+            if self.max_age_days is not None:
+                self.connection.execute("DELETE FROM responses WHERE last_used_at < ?", (time.time() - self.max_age_days * 86400,))
+            if self.max_entries is not None:
+                self.connection.execute("""
+                    DELETE FROM responses WHERE key IN (
+                        SELECT key FROM responses ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+            self.connection.commit()
+            self._puts_since_eviction = 0
+
+    def stats(self):
+        with self._lock:
+            entries = self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"💾 Response cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%} hit rate), {stats['entries']} responses stored")
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
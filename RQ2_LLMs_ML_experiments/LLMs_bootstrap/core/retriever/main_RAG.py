@@ -10,7 +10,10 @@ from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.gemini_model import Gemi
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.gemma_model import GemmaModel
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.open_router_model import OpenRouterModel
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.qween import QwenModel
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.response_cache import ResponseCache
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.retriever.new_rag_runner import run_rag_from_files_new_runners
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.async_executor import get_provider_budget, run_rag_async, run_all
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.batch_executor import run_rag_batch
 
 LABELS = [
     "Computing Management Debt",
@@ -56,20 +59,20 @@ def build_output_path(project_root: str, model_key: str, temperature: float, ret
     return os.path.join(results_dir, filename)
 
 
-def get_model(model_key, temperature):
+def get_model(model_key, temperature, response_cache=None):
     if model_key == "gemini":
-        return GeminiModel(gemini_key_manager)
+        return GeminiModel(gemini_key_manager, response_cache=response_cache)
 
     elif model_key == "deepseek":
-        return OpenRouterModel(api_key=os.environ.get("OPENROUTER_API_KEY", "YOUR_KEY"), model_name="deepseek/deepseek-chat-v3-0324", temperature=temperature)
+        return OpenRouterModel(api_key=os.environ.get("OPENROUTER_API_KEY", "YOUR_KEY"), model_name="deepseek/deepseek-chat-v3-0324", temperature=temperature, response_cache=response_cache)
     elif model_key == "claude":
-        return ClaudeModel(api_key=os.environ.get("CLAUDE_API_KEY", "YOUR_KEY"), temperature=temperature)
+        return ClaudeModel(api_key=os.environ.get("CLAUDE_API_KEY", "YOUR_KEY"), temperature=temperature, response_cache=response_cache)
     elif model_key == "chatgpt":
-        return ChatGPTModel(api_key=os.environ.get("OPENAI_API_KEY", "YOUR_KEY"), temperature=temperature)
+        return ChatGPTModel(api_key=os.environ.get("OPENAI_API_KEY", "YOUR_KEY"), temperature=temperature, response_cache=response_cache)
     elif model_key == "qwen":
-        return QwenModel(temperature=temperature)
+        return QwenModel(temperature=temperature, response_cache=response_cache)
     elif model_key == "gemma":
-        return GemmaModel(temperature=temperature)
+        return GemmaModel(temperature=temperature, response_cache=response_cache)
     else:
         raise ValueError(f"Model {model_key} not found.")
 
@@ -156,24 +159,69 @@ if __name__ == '__main__':
     PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../../"))
     folds_dir = os.path.join(PROJECT_ROOT, "RQ2_LLMs_ML_experiments", "Data_Splitting", "stratified_cleaned_folds")
 
-    for temp in [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6]:
-        print(f"🔁 Running {selected_model_key} with temp={temp}, retrieval={retrieval_mode}")
-        model = get_model(selected_model_key, temperature=temp)
+    temperatures = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6]
+    use_async = True  # 🔁 False for the sequential runner 🔁
+    use_batch = False  # 🔁 True for the provider batch API (chatgpt, claude) 🔁
 
+    # Responses already obtained are not requested again; replay_only=True re-runs a sweep offline
+    response_cache = ResponseCache(
+        os.path.join(PROJECT_ROOT, "llm_crossval_runner", "results", "llm_response_cache.sqlite"),
+        replay_only=False,  # 🔁 Switch True/False 🔁
+        stats_every=100
+    )
+
+    def output_path_for(temp):
         if is_prompt_generation_only:
-            output_path = build_ground_truth_output_path(PROJECT_ROOT)
-        else:
-            output_path = build_output_path(PROJECT_ROOT, selected_model_key, temp, retrieval_mode)
-
-        run_rag_from_files_new_runners(
-            model=model,
-            folds_dir=folds_dir,
-            output_path=output_path,
-            labels=LABELS,
-            num_folds=5,
-            default_retrieval_mode=retrieval_mode,
-            is_prompt_generation_only=is_prompt_generation_only
-        )
-
-        # 🔁 NEW: in-depth retry step
-        # retry_failed_instances(model, folds_dir, output_path, LABELS, retrieval_mode)
+            return build_ground_truth_output_path(PROJECT_ROOT)
+        return build_output_path(PROJECT_ROOT, selected_model_key, temp, retrieval_mode)
+
+    if use_batch and not is_prompt_generation_only:
+        # Submit the batches of every temperature first, then collect them
+        for wait in (False, True):
+            for temp in temperatures:
+                run_rag_batch(
+                    model=get_model(selected_model_key, temperature=temp, response_cache=response_cache),
+                    folds_dir=folds_dir,
+                    output_path=output_path_for(temp),
+                    labels=LABELS,
+                    num_folds=5,
+                    default_retrieval_mode=retrieval_mode,
+                    wait=wait
+                )
+    elif use_async:
+        # One temperature at a time, each fold building its own retrieval index, the rows of a fold
+        # being sent concurrently within the concurrency and token budget of the provider
+        budget = get_provider_budget(selected_model_key)
+        run_all(*[
+            run_rag_async(
+                model=get_model(selected_model_key, temperature=temp, response_cache=response_cache),
+                budget=budget,
+                folds_dir=folds_dir,
+                output_path=output_path_for(temp),
+                labels=LABELS,
+                num_folds=5,
+                default_retrieval_mode=retrieval_mode,
+                is_prompt_generation_only=is_prompt_generation_only
+            )
+            for temp in temperatures
+        ], sequential=True)
+    else:
+        for temp in temperatures:
+            print(f"🔁 Running {selected_model_key} with temp={temp}, retrieval={retrieval_mode}")
+            model = get_model(selected_model_key, temperature=temp, response_cache=response_cache)
+
+            run_rag_from_files_new_runners(
+                model=model,
+                folds_dir=folds_dir,
+                output_path=output_path_for(temp),
+                labels=LABELS,
+                num_folds=5,
+                default_retrieval_mode=retrieval_mode,
+                is_prompt_generation_only=is_prompt_generation_only
+            )
+
+            # 🔁 NEW: in-depth retry step
+            # retry_failed_instances(model, folds_dir, output_path_for(temp), LABELS, retrieval_mode)
+
+    response_cache.print_stats()
+    response_cache.close()
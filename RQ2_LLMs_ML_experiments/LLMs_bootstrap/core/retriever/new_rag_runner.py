@@ -1,11 +1,11 @@
 # run_rag_from_files.py
 import os
-import time
 
 import pandas as pd
 
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.main import LABELS
-from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.utils import save_row_to_csv, save_row_prompt
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.response_cache import CacheMiss
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.utils import save_row_to_csv, save_row_prompt, is_retryable_error
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.retriever.retriever_strategies.builder import make_retrieval, free_retrieval_bundle
 from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.retriever.retrieval_engine import RetrievalEngine
 
@@ -76,16 +76,26 @@ def run_rag_from_files_new_runners(
             # ✅ NEW: provide query_vec for precomputed-OpenAI modes
             query_vec = _maybe_query_vec(engine, i, retrieval_mode)
 
-            result, response, prompt = model.rag_implementation_for_single_prompts(
-                train_data=train_df,
-                comment=row["SATD Comment"],
-                context=row["context"],
-                code_block=row["bloc of first occurrence"],
-                labels=LABELS,
-                retrieval_engine=engine,  # <—<— pass the engine
-                query_vec=query_vec,  # <—<— None for non-openai modes
-                generate_prompt_only=is_prompt_generation_only
-            )
+            try:
+                result, response, prompt = model.rag_implementation_for_single_prompts(
+                    train_data=train_df,
+                    comment=row["SATD Comment"],
+                    context=row["context"],
+                    code_block=row["bloc of first occurrence"],
+                    labels=LABELS,
+                    retrieval_engine=engine,  # <—<— pass the engine
+                    query_vec=query_vec,  # <—<— None for non-openai modes
+                    generate_prompt_only=is_prompt_generation_only
+                )
+            except Exception as e:
+                if not isinstance(e, CacheMiss) and not is_retryable_error(e):
+                    raise
+                # Replay-only miss or provider error: log the row as failed so it can be retried later
+                print(f"❌ Giving up on Fold {fold} Row {i}: {e}")
+                with open("failed_requests.csv", "a") as f:
+                    error_msg = str(e).replace('"', "'")
+                    f.write(f"{fold},{i},\"{error_msg}\"\n")
+                continue
 
             if is_prompt_generation_only:
                 save_row_prompt(output_path, fold, i, row, labels, prompt)
@@ -97,7 +107,6 @@ def run_rag_from_files_new_runners(
 
                 save_row_to_csv(output_path, fold, i, row, response, label_flags, predicted, labels)
                 print(f"✅ Fold {fold} Row {i} processed successfully.")
-                time.sleep(3)
 
         # 3) Free GPU/FAISS
         engine.free()
@@ -0,0 +1,179 @@
+import json
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import default
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class BatchStubServer:
+    """
+    Local stand-in for the OpenAI Batch API and the Anthropic Message Batches API.
+
+    Point ChatGPTModel at `openai_base_url` and ClaudeModel at `anthropic_base_url`. A job reports
+    itself in progress on its first poll and ended on the next ones. Each request is answered
+    "ANSWER: 1", unless its prompt contains "EXPIRE" (the request expires) or "FAIL" (the request
+    fails with an error).
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.batches = {}
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.openai_base_url = f"{self.url}/v1"
+        self.anthropic_base_url = self.url
+        self.thread = threading.Thread(target=self.server.serve_forever, name="batch-stub-server", daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def new_id(self, prefix):
+        return f"{prefix}_{len(self.files) + len(self.batches)}"
+
+    def poll(self, batch_id):
+        batch = self.batches[batch_id]
+        batch["polls"] += 1
+        return batch["polls"] > 1
+
+    # OpenAI
+
+    def create_file(self, content):
+        file_id = self.new_id("file")
+        self.files[file_id] = content
+        return {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                "filename": "batch_requests.jsonl", "purpose": "batch", "status": "processed"}
+
+    def create_openai_batch(self, body):
+        batch_id = self.new_id("batch")
+        output, errors = [], []
+        for line in self.files[body["input_file_id"]].decode("utf-8").splitlines():
+            request = json.loads(line)
+            prompt = request["body"]["messages"][-1]["content"]
+            if "EXPIRE" in prompt:
+                errors.append({"id": f"req_{request['custom_id']}", "custom_id": request["custom_id"], "response": None,
+                               "error": {"code": "batch_expired", "message": "This request could not be executed before the completion window expired."}})
+            elif "FAIL" in prompt:
+                output.append({"id": f"req_{request['custom_id']}", "custom_id": request["custom_id"], "error": None,
+                               "response": {"status_code": 400, "request_id": "stub", "body": {"error": {"message": "Invalid request", "type": "invalid_request_error"}}}})
+            else:
+                output.append({"id": f"req_{request['custom_id']}", "custom_id": request["custom_id"], "error": None,
+                               "response": {"status_code": 200, "request_id": "stub", "body": {
+                                   "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()), "model": request["body"]["model"],
+                                   "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ANSWER: 1"}}]}}})
+
+        batch = {"id": batch_id, "object": "batch", "endpoint": body["endpoint"], "errors": None, "input_file_id": body["input_file_id"],
+                 "completion_window": body["completion_window"], "status": "in_progress", "output_file_id": None, "error_file_id": None,
+                 "created_at": int(time.time()), "request_counts": {"total": len(output) + len(errors), "completed": 0, "failed": 0}}
+        self.batches[batch_id] = {"polls": 0, "batch": batch, "output": output, "errors": errors}
+        return batch
+
+    def retrieve_openai_batch(self, batch_id):
+        entry = self.batches[batch_id]
+        batch = entry["batch"]
+        if self.poll(batch_id) and batch["status"] == "in_progress":
+            batch["status"] = "completed"
+            batch["request_counts"]["completed"] = len(entry["output"])
+            batch["request_counts"]["failed"] = len(entry["errors"])
+            for key, lines in (("output_file_id", entry["output"]), ("error_file_id", entry["errors"])):
+                if lines:
+                    batch[key] = self.create_file("\n".join(json.dumps(line) for line in lines).encode("utf-8"))["id"]
+        return batch
+
+    # Anthropic
+
+    def create_anthropic_batch(self, body):
+        batch_id = self.new_id("msgbatch")
+        results = []
+        for request in body["requests"]:
+            prompt = request["params"]["messages"][-1]["content"]
+            if "EXPIRE" in prompt:
+                result = {"type": "expired"}
+            elif "FAIL" in prompt:
+                result = {"type": "errored", "error": {"type": "error", "error": {"type": "invalid_request_error", "message": "Invalid request"}}}
+            else:
+                result = {"type": "succeeded", "message": {
+                    "id": "msg_stub", "type": "message", "role": "assistant", "model": request["params"]["model"],
+                    "content": [{"type": "text", "text": "ANSWER: 1"}], "stop_reason": "end_turn", "stop_sequence": None,
+                    "usage": {"input_tokens": 1, "output_tokens": 1}}}
+            results.append({"custom_id": request["custom_id"], "result": result})
+
+        batch = {"id": batch_id, "type": "message_batch", "processing_status": "in_progress",
+                 "request_counts": {"processing": len(results), "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0},
+                 "created_at": "2025-01-01T00:00:00Z", "expires_at": "2025-01-02T00:00:00Z", "ended_at": None,
+                 "archived_at": None, "cancel_initiated_at": None, "results_url": None}
+        self.batches[batch_id] = {"polls": 0, "batch": batch, "results": results}
+        return batch
+
+    def retrieve_anthropic_batch(self, batch_id):
+        entry = self.batches[batch_id]
+        batch = entry["batch"]
+        if self.poll(batch_id) and batch["processing_status"] == "in_progress":
+            batch["processing_status"] = "ended"
+            batch["ended_at"] = "2025-01-01T01:00:00Z"
+            batch["results_url"] = f"{self.url}/v1/messages/batches/{batch_id}/results"
+            counts = batch["request_counts"]
+            counts["processing"] = 0
+            for entry_result in entry["results"]:
+                counts[entry_result["result"]["type"]] += 1
+        return batch
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                pass
+
+            def send(self, body, content_type="application/json", status=200):
+                data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def read_body(self):
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def do_POST(self):
+                path = self.path.split("?")[0]
+                body = self.read_body()
+                with stub.lock:
+                    if path == "/v1/files":
+                        # multipart/form-data upload of the JSONL file
+                        message = BytesParser(policy=default).parsebytes(
+                            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + body)
+                        for part in message.iter_parts():
+                            if part.get_param("name", header="content-disposition") == "file":
+                                return self.send(stub.create_file(part.get_payload(decode=True)))
+                        return self.send({"error": {"message": "missing file"}}, status=400)
+                    if path == "/v1/batches":
+                        return self.send(stub.create_openai_batch(json.loads(body)))
+                    if path == "/v1/messages/batches":
+                        return self.send(stub.create_anthropic_batch(json.loads(body)))
+                self.send({"error": {"message": f"unknown path {path}"}}, status=404)
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                with stub.lock:
+                    if parts[:2] == ["v1", "files"] and len(parts) == 4 and parts[3] == "content":
+                        return self.send(stub.files[parts[2]], content_type="application/binary")
+                    if parts[:2] == ["v1", "batches"] and len(parts) == 3:
+                        return self.send(stub.retrieve_openai_batch(parts[2]))
+                    if parts[:3] == ["v1", "messages", "batches"] and len(parts) == 4:
+                        return self.send(stub.retrieve_anthropic_batch(parts[3]))
+                    if parts[:3] == ["v1", "messages", "batches"] and len(parts) == 5 and parts[4] == "results":
+                        results = "\n".join(json.dumps(result) for result in stub.batches[parts[3]]["results"])
+                        return self.send(results.encode("utf-8"), content_type="application/binary")
+                self.send({"error": {"message": f"unknown path {self.path}"}}, status=404)
+
+        return Handler
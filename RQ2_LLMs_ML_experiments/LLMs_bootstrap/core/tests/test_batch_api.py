@@ -0,0 +1,41 @@
+import pytest
+
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.chagpt_model import ChatGPTModel
+from RQ2_LLMs_ML_experiments.LLMs_bootstrap.core.models.claude_model import ClaudeModel
+
+from batch_stub_server import BatchStubServer
+
+
+@pytest.fixture
+def stub():
+    with BatchStubServer() as server:
+        yield server
+
+
+def run_batch(model):
+    prompts = {"fold0-row0": "Classify this comment", "fold0-row1": "EXPIRE this one", "fold0-row2": "FAIL this one"}
+    batch_id = model.batch_client.submit([model.batch_request(custom_id, prompt) for custom_id, prompt in prompts.items()])
+
+    # In progress on the first poll, ended on the next one
+    assert not model.batch_client.is_ended(batch_id)
+    assert model.batch_client.is_ended(batch_id)
+    return model.batch_client.results(batch_id)
+
+
+def test_openai_batch_client(stub):
+    results = run_batch(ChatGPTModel(api_key="test", base_url=stub.openai_base_url))
+
+    assert results["fold0-row0"] == ("ANSWER: 1", None)
+    response, error = results["fold0-row1"]
+    assert response is None and "batch_expired" in error
+    response, error = results["fold0-row2"]
+    assert response is None and "invalid_request_error" in error
+
+
+def test_anthropic_batch_client(stub):
+    results = run_batch(ClaudeModel(api_key="test", base_url=stub.anthropic_base_url))
+
+    assert results["fold0-row0"] == ("ANSWER: 1", None)
+    assert results["fold0-row1"] == (None, "expired")
+    response, error = results["fold0-row2"]
+    assert response is None and error.startswith("errored:") and "invalid_request_error" in error